@@ -0,0 +1,3 @@
+# Core modules (scanner, registry, categorizer, planner, pipeline, cli, ...) import
+# nothing GUI-related and load heavy or platform-specific dependencies (requests,
+# reportlab, winreg) on first use. Only main.py and list_view.py need customtkinter.
@@ -0,0 +1,71 @@
+from typing import Dict, Iterable, List, Optional
+
+# Per-request token budgets (prompt + completion) for the models offered in Settings.
+# Kept well below each model's context and output limits so JSON replies are not truncated.
+MODEL_TOKEN_BUDGETS: Dict[str, int] = {
+    "llama-3.3-70b-versatile": 4000,
+    "llama-3.1-8b-instant": 2500,
+    "mixtral-8x7b-32768": 4000,
+}
+DEFAULT_TOKEN_BUDGET = 2500
+
+# Fixed instructions in Categorizer._build_payload, plus the JSON wrapper around each result
+PROMPT_OVERHEAD_TOKENS = 450
+RESULT_OVERHEAD_TOKENS = 18
+# A ', "confidence": 0.95' field per result when the cascade asks for one
+CONFIDENCE_OVERHEAD_TOKENS = 7
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for Latin text, rounded up
+    return (len(text) + 3) // 4
+
+
+def estimate_name_cost(name: str, with_confidence: bool = False) -> int:
+    # The name appears once in the prompt list and again as the key of its result
+    name_tokens = estimate_tokens(name) + 2
+    return name_tokens * 2 + RESULT_OVERHEAD_TOKENS + (CONFIDENCE_OVERHEAD_TOKENS if with_confidence else 0)
+
+
+class BatchPacker:
+    def __init__(self, model: str, token_budget: Optional[int] = None, max_items: int = 100,
+                 with_confidence: bool = False):
+        self.model = model
+        self.token_budget = token_budget or MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+        self.max_items = max_items
+        self.with_confidence = with_confidence
+        self._current: List[str] = []
+        self._used = 0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._current)
+
+    def add(self, name: str) -> Optional[List[str]]:
+        # Incremental packing for streams: returns a full batch once `name` no longer fits
+        available = max(self.token_budget - PROMPT_OVERHEAD_TOKENS, 1)
+        cost = estimate_name_cost(name, self.with_confidence)
+        full = None
+        if self._current and (self._used + cost > available or len(self._current) >= self.max_items):
+            full = self._current
+            self._current, self._used = [], 0
+        self._current.append(name)
+        self._used += cost
+        return full
+
+    def flush(self) -> Optional[List[str]]:
+        batch = self._current or None
+        self._current, self._used = [], 0
+        return batch
+
+    def pack(self, names: Iterable[str]) -> List[List[str]]:
+        # Greedy fill in input order: each batch holds as many names as fit the budget
+        batches: List[List[str]] = []
+        for name in names:
+            full = self.add(name)
+            if full:
+                batches.append(full)
+        last = self.flush()
+        if last:
+            batches.append(last)
+        return batches
@@ -0,0 +1,284 @@
+import heapq
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from appnort.cache_store import CacheEntry, CacheStore
+
+# Read-only classification bundle (*.apnb), little-endian:
+#
+#   header   magic, format version, entry count, vocabulary size, created (unix time),
+#            and the offsets/lengths of the three sections below
+#   vocab    category and risk strings, each stored once: u8 length + UTF-8
+#   keys     all cache keys, UTF-8, concatenated in sorted byte order
+#   index    one 8-byte record per key, in the same order:
+#            u32 key offset (into keys), u16 key length, u8 category id, u8 risk id
+#
+# Lookups binary-search the index straight from a memory map, so opening a
+# bundle reads only the header and vocabulary and RSS grows only by the pages
+# a lookup actually touches.
+BUNDLE_MAGIC = b"APNB"
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = ".apnb"
+# Bundles in this directory are mounted by Categorizer at startup
+DEFAULT_BUNDLE_DIR = "bundles"
+_HEADER = struct.Struct("<4sHHIIQQQQQ")
+_RECORD = struct.Struct("<IHBB")
+
+
+class BundleError(ValueError):
+    pass
+
+
+def write_bundle(entries: Iterable[Tuple[str, CacheEntry]], path: str) -> int:
+    # Writes to a temporary file and renames it into place. Unknown categories
+    # are left out: a bundle only carries answers worth sharing.
+    vocab: Dict[str, int] = {}
+    rows = []
+    for key, entry in entries:
+        category = entry.get("category", "Unknown")
+        if category == "Unknown":
+            continue
+        ids = []
+        for value in (category, entry.get("security", "Unknown")):
+            if value not in vocab:
+                if len(vocab) == 255:
+                    raise BundleError("more than 255 distinct category/risk values")
+                vocab[value] = len(vocab)
+            ids.append(vocab[value])
+        encoded = key.encode("utf-8")
+        if len(encoded) > 0xFFFF:
+            continue
+        rows.append((encoded, ids[0], ids[1]))
+    rows.sort(key=lambda row: row[0])
+
+    vocab_blob = b"".join(struct.pack("<B", len(v.encode("utf-8"))) + v.encode("utf-8") for v in vocab)
+    keys_blob = bytearray()
+    index_blob = bytearray(_RECORD.size * len(rows))
+    previous = None
+    count = 0
+    for encoded, category, security in rows:
+        if encoded == previous:
+            continue  # duplicate key: the first one wins
+        previous = encoded
+        _RECORD.pack_into(index_blob, count * _RECORD.size, len(keys_blob), len(encoded), category, security)
+        keys_blob += encoded
+        count += 1
+    if len(keys_blob) > 0xFFFFFFFF:
+        raise BundleError("key data exceeds 4 GiB")
+    del index_blob[count * _RECORD.size:]
+
+    vocab_offset = _HEADER.size
+    keys_offset = vocab_offset + len(vocab_blob)
+    index_offset = keys_offset + len(keys_blob)
+    header = _HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, count, len(vocab), int(time.time()),
+                          vocab_offset, keys_offset, len(keys_blob), index_offset)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(vocab_blob)
+        f.write(keys_blob)
+        f.write(index_blob)
+    os.replace(temp_path, path)
+    return count
+
+
+class ClassificationBundle:
+    # Memory-mapped, read-only view of one bundle file
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < _HEADER.size:
+                raise BundleError(f"{path} is not an Appnort bundle")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, BundleError):
+            self._file.close()
+            raise
+        (magic, version, _flags, self.count, vocab_size, self.created,
+         vocab_offset, self._keys_offset, keys_length, self._index_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != BUNDLE_MAGIC:
+            self.close()
+            raise BundleError(f"{path} is not an Appnort bundle")
+        if version > BUNDLE_VERSION:
+            self.close()
+            raise BundleError(f"{path} uses bundle format {version}; this Appnort reads up to {BUNDLE_VERSION}")
+        if (self._index_offset + self.count * _RECORD.size > size or self._keys_offset + keys_length > size
+                or not _HEADER.size <= vocab_offset <= self._keys_offset):
+            self.close()
+            raise BundleError(f"{path} is truncated")
+        self.version = version
+        self.vocab: List[str] = []
+        # The vocabulary runs from vocab_offset up to the key section; a length
+        # byte pointing past it means a damaged file, not a longer string
+        position = vocab_offset
+        for _ in range(vocab_size):
+            if position >= self._keys_offset or position + 1 + self._map[position] > self._keys_offset:
+                self.close()
+                raise BundleError(f"{path} has a damaged vocabulary")
+            length = self._map[position]
+            try:
+                self.vocab.append(self._map[position + 1:position + 1 + length].decode("utf-8"))
+            except UnicodeDecodeError:
+                self.close()
+                raise BundleError(f"{path} has a damaged vocabulary")
+            position += 1 + length
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, i: int) -> Tuple[int, int, int, int]:
+        return _RECORD.unpack_from(self._map, self._index_offset + i * _RECORD.size)
+
+    def _key_at(self, offset: int, length: int) -> bytes:
+        start = self._keys_offset + offset
+        return self._map[start:start + length]
+
+    def _entry(self, category: int, security: int) -> CacheEntry:
+        return {"category": self.vocab[category], "security": self.vocab[security]}
+
+    def _search(self, key: bytes, lo: int = 0) -> Tuple[int, bool]:
+        # Leftmost position of `key` at or after `lo`, and whether it is there
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, length, _, _ = self._record(mid)
+            if self._key_at(offset, length) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            offset, length, _, _ = self._record(lo)
+            return lo, self._key_at(offset, length) == key
+        return lo, False
+
+    def get(self, key: str, default=None) -> Optional[CacheEntry]:
+        position, found = self._search(key.encode("utf-8"))
+        if not found:
+            return default
+        _, _, category, security = self._record(position)
+        return self._entry(category, security)
+
+    def __contains__(self, key: str) -> bool:
+        return self._search(key.encode("utf-8"))[1]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        # Sorted probes: each search starts where the previous one ended
+        found = {}
+        lo = 0
+        for encoded, key in sorted((k.encode("utf-8"), k) for k in set(keys)):
+            lo, hit = self._search(encoded, lo)
+            if hit:
+                _, _, category, security = self._record(lo)
+                found[key] = self._entry(category, security)
+        return found
+
+    def items(self) -> Iterator[Tuple[str, CacheEntry]]:
+        # In sorted key order
+        for i in range(self.count):
+            offset, length, category, security = self._record(i)
+            yield self._key_at(offset, length).decode("utf-8"), self._entry(category, security)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def merge_bundles(paths: List[str], output_path: str) -> int:
+    # Later bundles win on conflicting keys. Inputs are read in key order and
+    # merged as streams; only the merged output is held before it is written.
+    bundles = [ClassificationBundle(path) for path in paths]
+
+    def ranked(bundle: ClassificationBundle, rank: int):
+        for key, entry in bundle.items():
+            yield key.encode("utf-8"), -rank, key, entry
+
+    def merged():
+        previous = None
+        for encoded, _, key, entry in heapq.merge(*(ranked(b, rank) for rank, b in enumerate(bundles))):
+            if encoded != previous:
+                previous = encoded
+                yield key, entry
+
+    try:
+        return write_bundle(merged(), output_path)
+    finally:
+        for bundle in bundles:
+            bundle.close()
+
+
+def find_bundles(directory: str) -> List[str]:
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(BUNDLE_EXTENSION))
+
+
+class LayeredCacheStore(CacheStore):
+    # Local cache first, then each mounted bundle in order. Writes only ever go
+    # to the local store; a local "Unknown" does not hide a bundle's answer.
+    def __init__(self, local: CacheStore, bundles: List[ClassificationBundle]):
+        self.local = local
+        self.bundles = bundles
+
+    def get(self, key, default=None):
+        entry = self.local.get(key)
+        if isinstance(entry, dict) and entry.get("category", "Unknown") != "Unknown":
+            return entry
+        for bundle in self.bundles:
+            shared = bundle.get(key)
+            if shared is not None:
+                return shared
+        return entry if entry is not None else default
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        found = self.local.get_many(keys)
+        missing = [k for k in keys if not isinstance(found.get(k), dict) or found[k].get("category") == "Unknown"]
+        for bundle in self.bundles:
+            if not missing:
+                break
+            shared = bundle.get_many(missing)
+            found.update(shared)
+            missing = [k for k in missing if k not in shared]
+        return found
+
+    def set(self, key, entry):
+        self.local.set(key, entry)
+
+    def items(self):
+        # Same answers as get(): local entries, then bundle entries the local cache
+        # does not override, then the local "Unknown"s no bundle could answer
+        seen = set()
+        unknown = []
+        for key, entry in self.local.items():
+            if not isinstance(entry, dict) or entry.get("category", "Unknown") == "Unknown":
+                unknown.append((key, entry))
+                continue
+            seen.add(key)
+            yield key, entry
+        for bundle in self.bundles:
+            for key, entry in bundle.items():
+                if key not in seen:
+                    seen.add(key)
+                    yield key, entry
+        for key, entry in unknown:
+            if key not in seen:
+                yield key, entry
+
+    def commit(self):
+        self.local.commit()
+
+    def close(self):
+        self.local.close()
+        for bundle in self.bundles:
+            bundle.close()
+
+    def __len__(self):
+        # Upper bound: keys present in several layers are counted once per layer
+        return len(self.local) + sum(len(bundle) for bundle in self.bundles)
@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+CacheEntry = Dict[str, str]
+
+
+class CacheStore(ABC):
+    # Dict-like category cache. Writes are buffered until commit(), so a scan
+    # pays for one transaction per batch instead of rewriting the whole cache.
+    @abstractmethod
+    def get(self, key: str, default=None):
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        found = {}
+        for key in keys:
+            entry = self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry):
+        ...
+
+    def update(self, entries: Dict[str, CacheEntry]):
+        for key, entry in entries.items():
+            self.set(key, entry)
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, CacheEntry]]:
+        ...
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.commit()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key: str, entry: CacheEntry):
+        self.set(key, entry)
+
+
+class MemoryCacheStore(CacheStore):
+    # Non-persistent store for headless runs and benchmarks
+    def __init__(self, entries: Optional[Dict[str, CacheEntry]] = None):
+        self._data: Dict[str, CacheEntry] = dict(entries or {})
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, entry):
+        self._data[key] = {"category": entry.get("category", "Unknown"), "security": entry.get("security", "Unknown")}
+
+    def items(self):
+        return iter(list(self._data.items()))
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheStore(CacheStore):
+    # SQLite in WAL mode: rows are read on demand (no full parse at startup),
+    # commits are atomic, and a crash mid-write never corrupts existing entries.
+    #
+    # ttl_seconds expires entries by age; max_entries evicts the least recently
+    # used rows at commit time.
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._pending: Dict[str, CacheEntry] = {}
+        self._touched: Dict[str, float] = {}
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, category TEXT NOT NULL, security TEXT NOT NULL,"
+            " updated REAL NOT NULL, last_used REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);"
+            "CREATE INDEX IF NOT EXISTS entries_updated ON entries(updated);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._conn.commit()
+
+    def _is_fresh(self, updated: float) -> bool:
+        return self.ttl_seconds is None or updated >= time.time() - self.ttl_seconds
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            row = self._conn.execute(
+                "SELECT category, security, updated FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or not self._is_fresh(row[2]):
+                return default
+            self._touched[key] = time.time()
+            return {"category": row[0], "security": row[1]}
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            lookup = []
+            for key in keys:
+                if key in self._pending:
+                    found[key] = self._pending[key]
+                else:
+                    lookup.append(key)
+            now = time.time()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(lookup), 500):
+                chunk = lookup[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, category, security, updated FROM entries WHERE key IN ({placeholders})", chunk
+                )
+                for key, category, security, updated in rows:
+                    if self._is_fresh(updated):
+                        found[key] = {"category": category, "security": security}
+                        self._touched[key] = now
+        return found
+
+    def set(self, key, entry):
+        with self._lock:
+            self._pending[key] = {
+                "category": entry.get("category", "Unknown"),
+                "security": entry.get("security", "Unknown")
+            }
+
+    def items(self):
+        self.commit()
+        with self._lock:
+            rows = self._conn.execute("SELECT key, category, security, updated FROM entries").fetchall()
+        for key, category, security, updated in rows:
+            if self._is_fresh(updated):
+                yield key, {"category": category, "security": security}
+
+    def __len__(self):
+        self.commit()
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds is not None else 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries WHERE updated >= ?", (cutoff,)).fetchone()[0]
+
+    def commit(self):
+        with self._lock:
+            if not self._pending and not self._touched:
+                return
+            now = time.time()
+            with self._conn:
+                if self._pending:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, category, security, updated, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(k, v["category"], v["security"], now, now) for k, v in self._pending.items()]
+                    )
+                if self._touched:
+                    self._conn.executemany(
+                        "UPDATE entries SET last_used = ? WHERE key = ?",
+                        [(t, k) for k, t in self._touched.items()]
+                    )
+                self._evict(now)
+            self._pending.clear()
+            self._touched.clear()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM entries WHERE updated < ?", (now - self.ttl_seconds,))
+        if self.max_entries is not None:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)", (excess,)
+                )
+
+    def close(self):
+        with self._lock:
+            self.commit()
+            self._conn.close()
+
+    # --- Migration ---
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _known(entry: CacheEntry) -> Tuple[bool, bool]:
+        return (entry.get("category", "Unknown") != "Unknown", entry.get("security", "Unknown") != "Unknown")
+
+    def migrate_json(self, json_path: str, key_func: Optional[Callable[[str], str]] = None) -> int:
+        # One-time import of the legacy category_cache.json (old str values included).
+        # The JSON file is renamed afterwards so it is never imported twice.
+        if self.get_meta("migrated_json") or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+
+        # Several legacy names can share one canonical key ("7-Zip 23.01", "7-Zip 24.07").
+        # A later entry wins unless it knows less: an "Unknown" never replaces an answer.
+        merged: Dict[str, CacheEntry] = {}
+        for key, value in data.items():
+            if isinstance(value, str):
+                value = {"category": value, "security": "Unknown"}
+            if not isinstance(value, dict):
+                continue
+            key = key_func(key) if key_func else key
+            previous = merged.get(key)
+            if previous is None or self._known(value) >= self._known(previous):
+                merged[key] = value
+        for key, value in merged.items():
+            self.set(key, value)
+        self.commit()
+        self.set_meta("migrated_json", json_path)
+        try:
+            os.replace(json_path, json_path + ".bak")
+        except OSError:
+            pass
+        return len(data)
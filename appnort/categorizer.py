@@ -1,53 +1,109 @@
 import json
-import os
-import requests
-from typing import Dict, Optional, List
+import sqlite3
+import threading
+from typing import Dict, Optional, List, Iterable
+from appnort.batching import BatchPacker
+from appnort.bundle import (DEFAULT_BUNDLE_DIR, BundleError, ClassificationBundle, LayeredCacheStore,
+                            find_bundles)
+from appnort.cache_store import CacheStore, MemoryCacheStore, SQLiteCacheStore
+from appnort.events import CancelToken
+from appnort.metrics import metrics
+from appnort.normalize import canonical_name
+from appnort.groq_client import GroqClient, GROQ_CHAT_URL
+from appnort.risk import RiskEngine
+from appnort.rule_engine import RuleEngine
+
+# Risk levels the model may answer with; anything else counts as "Unknown"
+RISK_LEVELS = ("Low", "Medium", "High")
+FAST_MODEL = "llama-3.1-8b-instant"
 
 class Categorizer:
-    def __init__(self, groq_api_key: Optional[str] = None, model: str = "llama-3.3-70b-versatile"):
+    def __init__(self, groq_api_key: Optional[str] = None, model: str = "llama-3.3-70b-versatile",
+                 cache_ttl_days: Optional[float] = None, cache_max_entries: Optional[int] = None):
         self.groq_api_key = groq_api_key
         self.model = model
+        self.api_url = GROQ_CHAT_URL
+        # Pooled keep-alive session with timeout, retry and rate-limit handling
+        self.client = GroqClient()
+        self._lock = threading.Lock()
         self.rules = {
-            "Development": ["python", "java", "vscode", "visual studio", "git", "docker", "node", "sdk", "compiler"],
+            "Development": ["python", "java", "vscode", "visual studio", "git", "github", "docker", "node", "sdk", "compiler"],
             "Productivity": ["office", "word", "excel", "powerpoint", "notion", "obsidian", "todo", "calendar"],
             "Games": ["steam", "game", "minecraft", "unity", "unreal", "epic games", "xbox"],
             "Browsers": ["chrome", "firefox", "edge", "brave", "opera", "safari"],
             "Media": ["vlc", "spotify", "music", "video", "player", "adobe", "photoshop", "gimp", "obs"],
             "System": ["driver", "nvidia", "intel", "amd", "realtek", "microsoft visual c++"],
             "Communication": ["zoom", "discord", "skype", "teams", "slack", "whatsapp", "telegram"],
-            "Utilities": ["zip", "rar", "cleaner", "antivirus", "vpn", "calculator"]
+            "Utilities": ["zip", "rar", "winzip", "winrar", "cleaner", "ccleaner", "antivirus", "vpn", "calculator"]
         }
-        self.cache_file = "category_cache.json"
+        # Extra keyword packs (*.json, category -> keywords) merged on top of the built-in rules
+        self.rules_dir = "rules"
+        self.rule_engine = RuleEngine(self.rules, self.rules_dir)
+        # Local publisher-trust risk scoring; only results below the threshold go to the AI
+        self.risk_engine = RiskEngine(pack_path="risk_rules.json")
+        self.risk_confidence_threshold = 0.8
+        self.cache_file = "category_cache.db"
+        self.legacy_cache_file = "category_cache.json"
+        self.cache_ttl_seconds = cache_ttl_days * 86400 if cache_ttl_days else None
+        self.cache_max_entries = cache_max_entries
+        # Read-only classification bundles (*.apnb) consulted after the local cache
+        self.bundle_dir = DEFAULT_BUNDLE_DIR
         self.cache = self._load_cache()
+        # Model cascade: batches go to fast_model first, asking for a confidence per item.
+        # Answers below cascade_threshold or outside the category/risk vocabulary are
+        # re-asked of self.model; everything else is final after the cheap call.
+        # BatchDispatcher pools the escalated names into full batches for the next tier.
+        self.cascade = False
+        self.fast_model = FAST_MODEL
+        self.cascade_threshold = 0.7
+
+    @property
+    def tiers(self) -> List[str]:
+        if self.cascade and self.fast_model and self.fast_model != self.model:
+            return [self.fast_model, self.model]
+        return [self.model]
+
+    def batch_packer(self, token_budget: Optional[int] = None, tier: int = 0) -> BatchPacker:
+        # Batches are sized for the model they are sent to; all but the last tier answer with a confidence
+        tiers = self.tiers
+        return BatchPacker(tiers[tier], token_budget, with_confidence=tier < len(tiers) - 1)
+
+    def _load_cache(self) -> CacheStore:
+        try:
+            store = SQLiteCacheStore(self.cache_file, self.cache_ttl_seconds, self.cache_max_entries)
+        except sqlite3.Error as e:
+            print(f"Failed to open category cache ({e}). Using in-memory cache.")
+            store = MemoryCacheStore()
+        else:
+            # Migration: import the old JSON cache (including str entries) once
+            store.migrate_json(self.legacy_cache_file, self.cache_key)
+        return self._mount_bundles(store)
 
-    def _load_cache(self) -> Dict[str, Dict[str, str]]:
-        if os.path.exists(self.cache_file):
+    def _mount_bundles(self, store: CacheStore) -> CacheStore:
+        bundles = []
+        for path in find_bundles(self.bundle_dir):
             try:
-                with open(self.cache_file, 'r') as f:
-                    data = json.load(f)
-                    # Migration: If old cache (str), convert to dict
-                    new_data = {}
-                    for k, v in data.items():
-                        if isinstance(v, str):
-                            new_data[k] = {"category": v, "security": "Unknown"}
-                        else:
-                            new_data[k] = v
-                    return new_data
-            except json.JSONDecodeError:
-                pass
-        return {}
+                bundles.append(ClassificationBundle(path))
+            except (OSError, BundleError) as e:
+                print(f"Skipping bundle {path}: {e}")
+        return LayeredCacheStore(store, bundles) if bundles else store
 
     def _save_cache(self):
+        # Commits only the entries changed since the last save, atomically
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=4)
-        except IOError:
-            print("Failed to save category cache.")
+            self.cache.commit()
+        except sqlite3.Error as e:
+            print(f"Failed to save category cache: {e}")
+
+    def cache_key(self, program_name: str) -> str:
+        # Version/arch/locale-insensitive key, so one classification covers every release
+        return canonical_name(program_name)
 
     def categorize(self, program_name: str) -> Dict[str, str]:
+        key = self.cache_key(program_name)
         # Check cache first
-        if program_name in self.cache:
-            entry = self.cache[program_name]
+        if key in self.cache:
+            entry = self.cache[key]
             # Ensure entry is dict
             if isinstance(entry, str):
                 entry = {"category": entry, "security": "Unknown"}
@@ -72,21 +128,76 @@ class Categorizer:
             except Exception as e:
                 print(f"AI Categorization error: {e}")
         
-        self.cache[program_name] = result
+        self.cache[key] = result
         self._save_cache()
         return result
 
     def batch_categorize(self, program_names: List[str]) -> Dict[str, Dict[str, str]]:
+        # Returns results keyed by the original names in program_names
+        return self.request_batch(program_names) or {}
+
+    def request_batch(self, program_names: List[str], cancel: Optional[CancelToken] = None,
+                      model: Optional[str] = None) -> Optional[Dict[str, Dict[str, str]]]:
+        # None means the request itself failed (network/HTTP); a dict, possibly partial,
+        # means the model answered and only the names it covered are included.
+        # For a cascade tier below self.model, only settled answers are returned
+        # and cached; the caller escalates the rest (see BatchDispatcher).
         if not self.groq_api_key or not program_names:
             return {}
 
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.groq_api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        folders = list(self.rules.keys())
+        model = model or self.model
+        final = model == self.model
+        with metrics.timer("ai_tier", tier=model):
+            answers = self._request_tier(program_names, model, cancel, with_confidence=not final)
+        metrics.incr("ai_tier_requested", len(program_names), tier=model)
+        if answers is None:
+            return None
+
+        matched = {}
+        for name, entry in answers.items():
+            if final or self._is_settled(entry):
+                entry.pop("confidence", None)
+                matched[name] = entry
+        metrics.incr("ai_tier_accepted", len(matched), tier=model)
+        if not final:
+            metrics.incr("ai_escalated", len(program_names) - len(matched), tier=model)
+
+        self._store_results(matched)
+        if model == self.tiers[0]:
+            metrics.incr("ai_names_requested", len(program_names))
+        metrics.incr("ai_names_answered", len(matched))
+        with metrics.timer("cache_write"):
+            self._save_cache()
+        return matched
+
+    def _request_tier(self, program_names: List[str], model: str, cancel: Optional[CancelToken],
+                      with_confidence: bool = False) -> Optional[Dict[str, Dict]]:
+        payload = self._build_payload(program_names, model, with_confidence)
+        response = self.client.post_chat(self.api_url, self.groq_api_key, payload, cancel)
+        if response is None:
+            return None
+        try:
+            content = response['choices'][0]['message']['content']
+            results = json.loads(content)
+            if not isinstance(results, dict):
+                raise ValueError("response is not a JSON object")
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"Batch AI Error: malformed response for {len(program_names)} programs ({e})")
+            metrics.incr("errors", source="ai_response")
+            return {}
+        return self._apply_results(program_names, results)
+
+    def _is_settled(self, entry: Dict) -> bool:
+        # A fast-tier answer is final only if it is in vocabulary and confident enough
+        confidence = entry.get("confidence")
+        return (entry["category"] != "Unknown" and entry["security"] != "Unknown"
+                and confidence is not None and confidence >= self.cascade_threshold)
+
+    def _build_payload(self, program_names: List[str], model: Optional[str] = None,
+                       with_confidence: bool = False) -> Dict:
+        folders = list(self.rule_engine.categories)
+        confidence = (", and 'confidence' (number from 0 to 1: how sure you are of both answers)"
+                      if with_confidence else "")
         prompt = (
             f"Classify the following software programs: {program_names}.\n\n"
             f"TASK 1 - CATEGORY: Assign exactly one category from this list: {folders}. "
@@ -103,13 +214,13 @@ class Categorizer:
             "- Base judgment on the software's legitimate version, not hypothetical compromised states.\n"
             "- Evaluate each program independently.\n\n"
             "OUTPUT: Return ONLY a valid JSON object. Keys are exact program names; values are objects "
-            "with 'category' (string) and 'security' (string) keys.\n"
+            f"with 'category' (string) and 'security' (string) keys{confidence}.\n"
             "Example: {\"Notepad\": {\"category\": \"Productivity\", \"security\": \"Low\"}, "
             "\"qBittorrent\": {\"category\": \"Utilities\", \"security\": \"Medium\"}}"
         )
         
-        data = {
-            "model": self.model,
+        return {
+            "model": model or self.model,
             "messages": [
                 {"role": "system", "content": "You are a software analysis engine. Return purely JSON."},
                 {"role": "user", "content": prompt}
@@ -117,59 +228,106 @@ class Categorizer:
             "temperature": 0.1,
             "response_format": {"type": "json_object"}
         }
-        
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                results = json.loads(content)
-                
-                # Update cache
-                for name, data in results.items():
-                    # Sanitize
-                    cat = data.get("category", "Unknown")
-                    sec = data.get("security", "Unknown")
-                    clean_entry = {"category": cat, "security": sec}
-                    
-                    # Fuzzy match name back to original list
-                    match_found = False
-                    if name in program_names:
-                        self.cache[name] = clean_entry
-                        match_found = True
-                    else:
-                        # Case-insensitive match
-                        for original in program_names:
-                            if original.lower() == name.lower():
-                                self.cache[original] = clean_entry
-                                match_found = True
-                                break
-                        
-                        # Substring match (if AI simplified the name)
-                        if not match_found:
-                            for original in program_names:
-                                # Check if AI name is part of original (e.g. "Audacity" in "Audacity 3.7.7")
-                                # OR original is part of AI name
-                                if name.lower() in original.lower() or original.lower() in name.lower():
-                                    self.cache[original] = clean_entry
-                                    match_found = True
-                                    break
-                
-                self._save_cache()
-                return results
+
+    @staticmethod
+    def _clean_entry(data: Dict, categories: Dict[str, str]) -> Dict:
+        # Category and risk must come from the allowed vocabulary (case-insensitive);
+        # anything else is recorded as "Unknown" so the next scan asks again
+        risks = {r.lower(): r for r in RISK_LEVELS}
+        cat = data.get("category")
+        sec = data.get("security")
+        entry = {
+            "category": categories.get(cat.strip().lower(), "Unknown") if isinstance(cat, str) else "Unknown",
+            "security": risks.get(sec.strip().lower(), "Unknown") if isinstance(sec, str) else "Unknown",
+        }
+        confidence = data.get("confidence")
+        if isinstance(confidence, (int, float)) and not isinstance(confidence, bool):
+            entry["confidence"] = min(max(float(confidence), 0.0), 1.0)
+        if entry["category"] == "Unknown" or entry["security"] == "Unknown":
+            metrics.incr("ai_out_of_vocabulary")
+        return entry
+
+    def _apply_results(self, program_names: List[str], results: Dict) -> Dict[str, Dict[str, str]]:
+        # Reconcile the AI's keys with the batch through the canonical index: O(1) per result,
+        # and "Audacity" in the reply still lands on "Audacity 3.7.7" in the batch.
+        index: Dict[str, List[str]] = {}
+        for original in program_names:
+            index.setdefault(self.cache_key(original), []).append(original)
+
+        categories = {c.lower(): c for c in self.rule_engine.categories}
+        matched = {}
+        for name, data in results.items():
+            if not isinstance(data, dict):
+                continue
+            key = self.cache_key(name)
+            originals = index.get(key)
+            if originals is None and len(index) == 1:
+                # Single-program request: whatever name the model used refers to it
+                key, originals = next(iter(index.items()))
+            if originals is None:
+                continue
+            for original in originals:
+                matched[original] = self._clean_entry(data, categories)
+        return matched
+
+    def _store_results(self, matched: Dict[str, Dict[str, str]]):
+        with self._lock:
+            for name, entry in matched.items():
+                self.cache[self.cache_key(name)] = entry
+
+    def categorize_many(self, program_names: Iterable[str],
+                        publishers: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, str]]:
+        # Bulk offline pass: cache first, then a single compiled rule scan per name and
+        # a local risk assessment from the publisher. No network.
+        publishers = publishers or {}
+        names = list(dict.fromkeys(program_names))
+        with metrics.timer("cache_lookup"):
+            keys = {name: self.cache_key(name) for name in names}
+            cached = self.cache.get_many(keys.values())
+        results = {}
+        misses = []
+        for name in names:
+            entry = cached.get(keys[name])
+            if isinstance(entry, str):
+                entry = {"category": entry, "security": "Unknown"}
+            if entry and entry.get("category", "Unknown") != "Unknown":
+                results[name] = dict(entry)
             else:
-                print(f"Groq API Error: {response.status_code} - {response.text}")
-                return {}
-        except Exception as e:
-            print(f"Batch AI Error: {e}")
-            return {}
+                misses.append(name)
+        metrics.incr("cache_hits", len(names) - len(misses))
+        metrics.incr("cache_misses", len(misses))
+
+        with metrics.timer("rule_match"):
+            for name in misses:
+                results[name] = {"category": self.rule_engine.match(name), "security": "Unknown"}
+
+        assessed = {}
+        with metrics.timer("risk_assess"):
+            for name in names:
+                entry = results[name]
+                # Without a known cached verdict, record the local one. A cached (AI) verdict is only
+                # ever raised, by a confident local one (P2P/remote/hack heuristics, deny list); a
+                # trusted publisher never talks a cached "High" down.
+                risk = self.risk_engine.assess(name, publishers.get(name))
+                cached_risk = entry.get("security", "Unknown")
+                if cached_risk not in RISK_LEVELS or (
+                        risk["confidence"] >= self.risk_confidence_threshold and risk["security"] in RISK_LEVELS
+                        and RISK_LEVELS.index(risk["security"]) > RISK_LEVELS.index(cached_risk)):
+                    entry["security"] = risk["security"]
+                    entry["risk_confidence"] = risk["confidence"]
+                assessed[name] = entry
+        return assessed
+
+    def is_confident(self, entry: Dict) -> bool:
+        # AI and cached answers carry no confidence and are taken as final
+        return entry.get("risk_confidence", 1.0) >= self.risk_confidence_threshold
+
+    def reload_rules(self) -> bool:
+        # Pick up added/edited rule packs without restarting
+        return self.rule_engine.reload_if_changed()
 
     def _rule_based_categorize(self, program_name: str) -> str:
-        program_name_lower = program_name.lower()
-        for category, keywords in self.rules.items():
-            for keyword in keywords:
-                if keyword in program_name_lower:
-                    return category
-        return "Unknown"
+        return self.rule_engine.match(program_name)
 
     # _ai_categorize Removed/Deprecated in favor of batch_categorize logic
     def _ai_categorize(self, program_name: str) -> str:
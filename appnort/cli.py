@@ -0,0 +1,367 @@
+import argparse
+import filecmp
+import itertools
+import json
+import os
+import shutil
+import socket
+import sys
+import time
+from typing import List, Optional
+
+from appnort.categorizer import Categorizer
+from appnort.config import ConfigManager
+from appnort.exporters import EXPORTERS, exporter_for_path, get_exporter
+from appnort.fleet import FleetAuditor, MachineInventory, find_inventories
+from appnort.history import DEFAULT_HISTORY_PATH
+from appnort.metrics import metrics, profiled
+from appnort.planner import ScanPlanner
+
+
+def build_planner(config: ConfigManager, api_key: Optional[str] = None, model: Optional[str] = None,
+                  cascade: Optional[bool] = None) -> ScanPlanner:
+    # Same wiring as the GUI; the key falls back to GROQ_API_KEY, then config.json
+    categorizer = Categorizer(
+        api_key or os.environ.get("GROQ_API_KEY") or config.get("groq_api_key"),
+        model or config.get("groq_model", "llama-3.3-70b-versatile"),
+        cache_ttl_days=config.get("cache_ttl_days"),
+        cache_max_entries=config.get("cache_max_entries")
+    )
+    categorizer.risk_confidence_threshold = config.get("risk_confidence_threshold", 0.8)
+    categorizer.cascade = config.get("ai_cascade", False) if cascade is None else cascade
+    categorizer.fast_model = config.get("cascade_fast_model", "llama-3.1-8b-instant")
+    categorizer.cascade_threshold = config.get("cascade_threshold", 0.7)
+    return ScanPlanner(
+        categorizer,
+        token_budget=config.get("ai_token_budget"),
+        max_workers=config.get("ai_max_workers", 4)
+    )
+
+
+def _progress(stage: str, done: int, total: int):
+    if stage == "ai":
+        print(f"AI Analyzing: {done}/{total} products...", file=sys.stderr)
+
+
+def cmd_scan(args) -> int:
+    # Export this machine's inventory for a later fleet audit
+    from appnort.scanner import Scanner
+    config = ConfigManager()
+    programs = Scanner().scan_installed_programs()
+    if args.classify:
+        build_planner(config, args.api_key, args.model, args.cascade).run(programs, _progress)
+    if args.hash:
+        from appnort.hashing import ExecutableHasher, HashCache
+        cache = HashCache()
+        try:
+            budget_mb = config.get("hash_io_budget_mb", 2048)
+            stats = ExecutableHasher(
+                cache,
+                max_file_size=config.get("hash_max_file_mb", 256) * 1024 * 1024,
+                io_budget=budget_mb * 1024 * 1024 if budget_mb else None
+            ).enrich(programs)
+        finally:
+            cache.close()
+        print(f"Hashed {stats['hashed']} files ({stats['cached']} unchanged) in {stats['locations']} locations")
+    MachineInventory(args.machine or socket.gethostname(), programs).save(args.output)
+    print(f"Wrote {len(programs)} programs to {args.output}")
+    if args.history:
+        _record_history(args.history, [MachineInventory(args.machine or socket.gethostname(), programs)], config)
+    return 0
+
+
+def _record_history(path: str, inventories: List[MachineInventory], config: ConfigManager):
+    from appnort.history import ScanHistory
+    history = ScanHistory(path)
+    try:
+        for inventory in inventories:
+            history.record(inventory.programs, inventory.machine)
+        history.compact(config.get("history_keep_scans"), config.get("history_max_age_days"))
+    finally:
+        history.close()
+    print(f"Recorded {len(inventories)} scans in {path}")
+
+
+def cmd_audit(args) -> int:
+    inventories: List[MachineInventory] = []
+    for path in find_inventories(args.inventories):
+        try:
+            inventories.append(MachineInventory.load(path))
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+    if not inventories:
+        print("No inventories to audit.", file=sys.stderr)
+        return 1
+
+    planner = build_planner(ConfigManager(), args.api_key, args.model, args.cascade)
+    auditor = FleetAuditor(planner, report_workers=args.workers)
+    with metrics.timer("classify"), profiled(args.profile):
+        auditor.classify(inventories, _progress)
+    installs = sum(len(i.programs) for i in inventories)
+    print(f"Classified {installs} installs on {len(inventories)} machines "
+          f"({auditor.unique_count} unique products).")
+    if planner.unresolved:
+        print(f"{len(planner.unresolved)} products could not be classified by AI.")
+
+    formats = [] if args.summary_only else (args.format or ["pdf"])
+    with metrics.timer("write_reports"):
+        result = auditor.write_reports(inventories, args.output, formats=formats, pdf_mode=args.report)
+    print(f"Wrote {len(result['files'])} report files to {args.output}")
+    if args.history:
+        _record_history(args.history, inventories, ConfigManager())
+    if args.metrics:
+        metrics.write(args.metrics, "audit")
+    return 0
+
+
+def cmd_export(args) -> int:
+    # Convert one inventory to another format without re-classifying it
+    try:
+        inventory = MachineInventory.load(args.inventory)
+        exporter = get_exporter(args.format, args.report) if args.format else exporter_for_path(args.output)
+        count = exporter.export(inventory.programs, args.output)
+    except (OSError, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {count} programs to {args.output}")
+    return 0
+
+
+def cmd_processes(args) -> int:
+    # Which installed programs are running, and which running executables belong to none
+    from appnort.processes import ProcessCorrelator, snapshot_processes
+    if args.inventory:
+        programs = MachineInventory.load(args.inventory).programs
+    else:
+        from appnort.scanner import Scanner
+        programs = Scanner().scan_installed_programs()
+    processes = snapshot_processes()
+    result = ProcessCorrelator(programs).correlate(processes)
+    print(f"{len(processes)} processes: {len(result['running'])} installed programs running, "
+          f"{len(result['unmanaged'])} unmanaged, {len(result['uninspectable'])} not inspectable")
+    for proc in sorted(result["unmanaged"], key=lambda p: p["exe"].lower()):
+        print(f"  {proc['pid']:>7}  {proc['exe']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "running": [{"name": p.get('name'), "version": p.get('version'), "processes": p['processes']}
+                            for p in result["running"]],
+                "unmanaged": result["unmanaged"],
+            }, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+def _import_target(path: str, directory: str, extension: str) -> Optional[str]:
+    # A bundle of the same name that is already mounted is never overwritten: an
+    # identical copy means there is nothing to do, anything else gets "-1", "-2", ...
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for n in itertools.count():
+        target = os.path.join(directory, f"{stem}-{n}{extension}" if n else stem + extension)
+        if not os.path.exists(target):
+            return target
+        if filecmp.cmp(path, target, shallow=False):
+            return None
+
+
+def cmd_bundle(args) -> int:
+    # Share classifications between installs as read-only *.apnb bundles
+    from appnort.bundle import (BUNDLE_EXTENSION, DEFAULT_BUNDLE_DIR, BundleError, ClassificationBundle,
+                                merge_bundles, write_bundle)
+    if args.action == "export":
+        # Everything this install knows: local cache plus mounted bundles
+        categorizer = Categorizer()
+        try:
+            count = write_bundle(categorizer.cache.items(), args.output)
+        except (OSError, BundleError) as e:
+            print(f"Bundle export failed: {e}", file=sys.stderr)
+            return 1
+        finally:
+            categorizer.cache.close()
+        print(f"Wrote {count} classifications to {args.output}")
+    elif args.action == "merge":
+        try:
+            count = merge_bundles(args.bundles, args.output)
+        except (OSError, BundleError) as e:
+            print(f"Bundle merge failed: {e}", file=sys.stderr)
+            return 1
+        print(f"Merged {len(args.bundles)} bundles into {args.output} ({count} classifications)")
+    elif args.action == "import":
+        # Imported bundles are mounted read-only on the next start, behind the local cache
+        directory = DEFAULT_BUNDLE_DIR
+        os.makedirs(directory, exist_ok=True)
+        for path in args.bundles:
+            try:
+                ClassificationBundle(path).close()
+            except (OSError, BundleError) as e:
+                print(f"Skipping {path}: {e}", file=sys.stderr)
+                continue
+            target = _import_target(path, directory, BUNDLE_EXTENSION)
+            if target is None:
+                print(f"{path} is already mounted")
+                continue
+            shutil.copyfile(path, target)
+            print(f"Mounted {path} as {target}")
+    else:
+        failed = 0
+        for path in args.bundles:
+            try:
+                bundle = ClassificationBundle(path)
+            except (OSError, BundleError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(bundle.created))
+            print(f"{path}: format {bundle.version}, {len(bundle)} classifications, created {created}")
+            bundle.close()
+        return 1 if failed else 0
+    return 0
+
+
+def _when(taken: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(taken))
+
+
+def _label(prog) -> str:
+    return " ".join(str(prog[field]) for field in ("name", "version") if prog.get(field))
+
+
+def cmd_history(args) -> int:
+    # Drift queries over scans recorded with --history (or by the GUI)
+    from appnort.history import ScanHistory
+    if not os.path.exists(args.db):
+        print(f"No scan history at {args.db}", file=sys.stderr)
+        return 1
+    history = ScanHistory(args.db)
+    try:
+        if args.action == "list":
+            for scan in history.scans(args.machine):
+                print(f"{scan['id']:>6}  {_when(scan['taken'])}  {scan['machine']}  {scan['programs']} programs")
+        elif args.action == "diff":
+            new = args.new or history.latest(args.machine)
+            old = args.old or (history.latest(args.machine, before=new) if new else None)
+            if old is None or new is None:
+                print("Need two recorded scans to diff.", file=sys.stderr)
+                return 1
+            diff = history.diff(old, new)
+            print(f"Scan {old} ({_when(diff['old_taken'])}) -> scan {new} ({_when(diff['new_taken'])})")
+            for prog in diff["added"]:
+                print(f"  + {_label(prog)}  [{prog.get('security', 'Unknown')}]")
+            for prog in diff["removed"]:
+                print(f"  - {_label(prog)}")
+            for change in diff["changed"]:
+                before, after = change["before"], change["after"]
+                details = ", ".join(f"{field}: {before.get(field)} -> {after.get(field)}" for field in change["fields"]
+                                    if field in ("version", "security", "category", "publisher"))
+                print(f"  ~ {after.get('name')}  {details or ', '.join(change['fields'])}")
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(diff, f, indent=2)
+        elif args.action == "product":
+            sightings = history.product_history(args.name, args.machine)
+            if not sightings:
+                print(f"{args.name} was never seen.")
+            for seen in sightings:
+                state = "still installed" if seen["present"] else f"last seen {_when(seen['last_seen'])}"
+                print(f"{seen['machine']}: {seen['name']} first seen {_when(seen['first_seen'])}, {state}")
+        elif args.action == "risk":
+            for change in history.risk_changes(args.name, args.machine):
+                print(f"{_when(change['taken'])}  {change['machine']}  {_label(change)}"
+                      f"  {change['before']} -> {change['after']}")
+        else:
+            config = ConfigManager()
+            keep = args.keep if args.keep is not None else config.get("history_keep_scans")
+            max_age = args.max_age_days if args.max_age_days is not None else config.get("history_max_age_days")
+            result = history.compact(keep, max_age)
+            print(f"Removed {result['scans']} scans and {result['rows']} program versions; "
+                  f"{os.path.getsize(args.db) // 1024} KB on disk")
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+    finally:
+        history.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="appnort-cli", description="Headless Appnort software audit")
+    parser.add_argument("--api-key", help="Groq API key (default: GROQ_API_KEY or config.json)")
+    parser.add_argument("--model", help="Groq model (default: config.json)")
+    parser.add_argument("--cascade", action="store_true", default=None,
+                        help="Ask the fast model first and escalate only unsure results to --model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Scan this machine and write its inventory JSON")
+    scan.add_argument("-o", "--output", default="inventory.json")
+    scan.add_argument("--machine", help="Machine name stored in the inventory (default: hostname)")
+    scan.add_argument("--classify", action="store_true", help="Also categorize programs before writing")
+    scan.add_argument("--hash", action="store_true", help="Add SHA-256 digests of installed executables")
+    scan.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_PATH, metavar="DB",
+                      help=f"Also record the scan in a history database (default: {DEFAULT_HISTORY_PATH})")
+    scan.set_defaults(func=cmd_scan)
+
+    audit = commands.add_parser("audit", help="Categorize inventories from many machines and write reports")
+    audit.add_argument("inventories", nargs="+", help="Inventory JSON files or directories of them")
+    audit.add_argument("-o", "--output", default="reports")
+    audit.add_argument("--workers", type=int, default=None, help="Report processes (default: CPU count)")
+    audit.add_argument("--format", action="append", choices=list(EXPORTERS),
+                       help="Report format; repeat for several (default: pdf)")
+    audit.add_argument("--summary-only", action="store_true", help="Only write fleet_summary.json")
+    audit.add_argument("--report", choices=["full", "top-risk", "summary"], default="full",
+                       help="PDF content: every program, High/Medium risk only, or statistics only")
+    audit.add_argument("--metrics", metavar="DIR", help="Write audit.json / audit.prom run metrics to DIR")
+    audit.add_argument("--profile", metavar="FILE", help="Write a cProfile dump of the classification step")
+    audit.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_PATH, metavar="DB",
+                       help="Record every classified inventory in a history database")
+    audit.set_defaults(func=cmd_audit)
+
+    export = commands.add_parser("export", help="Write an inventory JSON as PDF, CSV, JSON Lines, HTML or XLSX")
+    export.add_argument("inventory")
+    export.add_argument("-o", "--output", required=True, help="Output file; the extension picks the format")
+    export.add_argument("--format", choices=list(EXPORTERS), help="Override the format implied by --output")
+    export.add_argument("--report", choices=["full", "top-risk", "summary"], default="full",
+                        help="PDF content (PDF only)")
+    export.set_defaults(func=cmd_export)
+
+    processes = commands.add_parser("processes", help="List running programs and executables outside any install")
+    processes.add_argument("--inventory", help="Match against an inventory JSON instead of scanning this machine")
+    processes.add_argument("-o", "--output", help="Also write the result as JSON")
+    processes.set_defaults(func=cmd_processes)
+
+    bundle = commands.add_parser("bundle", help="Export, import, merge or inspect classification bundles")
+    bundle_actions = bundle.add_subparsers(dest="action", required=True)
+    bundle_export = bundle_actions.add_parser("export", help="Pack this install's classifications into a bundle")
+    bundle_export.add_argument("-o", "--output", default="classifications.apnb")
+    bundle_import = bundle_actions.add_parser("import", help="Mount bundles for lookups after the local cache")
+    bundle_import.add_argument("bundles", nargs="+")
+    bundle_merge = bundle_actions.add_parser("merge", help="Combine bundles; later ones win on conflicts")
+    bundle_merge.add_argument("bundles", nargs="+")
+    bundle_merge.add_argument("-o", "--output", required=True)
+    bundle_info = bundle_actions.add_parser("info", help="Show a bundle's format version and size")
+    bundle_info.add_argument("bundles", nargs="+")
+    bundle.set_defaults(func=cmd_bundle)
+
+    history = commands.add_parser("history", help="Diff recorded scans, first-seen dates and risk changes")
+    history.add_argument("--db", default=DEFAULT_HISTORY_PATH, help="History database")
+    history.add_argument("--machine", help="Machine name (default: every machine / this host for diff)")
+    history_actions = history.add_subparsers(dest="action", required=True)
+    history_actions.add_parser("list", help="List recorded scans")
+    history_diff = history_actions.add_parser("diff", help="Programs added, removed or changed between two scans")
+    history_diff.add_argument("old", nargs="?", type=int, help="Older scan id (default: the one before NEW)")
+    history_diff.add_argument("new", nargs="?", type=int, help="Newer scan id (default: the latest)")
+    history_diff.add_argument("-o", "--output", help="Also write the diff as JSON")
+    history_product = history_actions.add_parser("product", help="When a product was first and last seen")
+    history_product.add_argument("name")
+    history_risk = history_actions.add_parser("risk", help="Risk level changes over time")
+    history_risk.add_argument("name", nargs="?")
+    history_compact = history_actions.add_parser("compact", help="Apply the retention policy and shrink the file")
+    history_compact.add_argument("--keep", type=int, help="Scans to keep per machine (default: config.json)")
+    history_compact.add_argument("--max-age-days", type=float, help="Drop older scans (default: config.json)")
+    history.set_defaults(func=cmd_history)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    metrics.enabled = bool(getattr(args, "metrics", None))
+    return args.func(args)
@@ -9,7 +9,27 @@ class ConfigManager:
         self.config: Dict[str, Any] = {
             "groq_api_key": "",
             "theme": "System",  # System, Dark, Light
-            "autosave_reports": True
+            "autosave_reports": True,
+            "ai_max_workers": 4,
+            "ai_token_budget": None,  # None = per-model default (see batching.MODEL_TOKEN_BUDGETS)
+            "cache_ttl_days": None,  # None = cached classifications never expire
+            "cache_max_entries": 100000,
+            "risk_confidence_threshold": 0.8,  # Local risk scores below this are sent to the AI
+            "ai_cascade": False,  # Ask cascade_fast_model first; escalate unsure answers to groq_model
+            "cascade_fast_model": "llama-3.1-8b-instant",
+            "cascade_threshold": 0.7,  # Fast-model answers below this confidence are escalated
+            "metrics_enabled": False,  # Write per-scan timings/counters to metrics_dir
+            "metrics_dir": "metrics",
+            "profile_scan": False,  # Also write a cProfile dump of the next scan
+            "hash_executables": False,  # Hash .exe/.dll files under each install location after a scan
+            "hash_max_file_mb": 256,
+            "hash_io_budget_mb": 2048,  # Stop hashing new files after reading this much per scan
+            # Both opt-in, like hashing: process correlation lists every running executable,
+            # and history keeps a growing database of past inventories on disk
+            "correlate_processes": False,  # Mark programs that are running and list unmanaged executables
+            "history_enabled": False,  # Record each scan in scan_history.db for diffs and first-seen dates
+            "history_keep_scans": 365,  # Per machine; older scans are compacted away
+            "history_max_age_days": 730
         }
         self.load_config()
 
@@ -0,0 +1,158 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from appnort.batching import BatchPacker
+from appnort.events import CancelToken, ScanCancelled
+from appnort.metrics import metrics
+
+BatchResult = Tuple[List[str], Dict[str, Dict[str, str]]]
+
+
+class BatchDispatcher:
+    # Runs several batch requests at once over the categorizer's shared
+    # connection pool and yields each batch as soon as it finishes.
+    #
+    # When the model answers but leaves names out (malformed, truncated or
+    # partial JSON), or handling the batch raises, only the missing names are
+    # retried, split in half so a single bad item cannot sink its neighbours.
+    # Names that still fail on their own end up in self.unresolved.
+    #
+    # With a model cascade (categorizer.tiers), batches start at tier 0. Names a
+    # lower tier does not settle are packed into new batches for the next tier,
+    # pooled across batches so the large model sees full batches; a partial one
+    # goes out once no lower-tier batch is left in flight.
+    #
+    # dispatch() handles a fixed list of batches. For streaming callers,
+    # start() / submit() / collect() / close() feed batches while results
+    # are already coming back.
+    def __init__(self, categorizer, max_workers: int = 4, split_on_failure: bool = True,
+                 token_budget: Optional[int] = None):
+        self.categorizer = categorizer
+        self.max_workers = max(1, max_workers)
+        self.split_on_failure = split_on_failure
+        self.token_budget = token_budget
+        self.unresolved: List[str] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # future -> (batch, tier)
+        self._futures = {}
+        self._escalation: Dict[int, BatchPacker] = {}
+        self._tiers: List[str] = []
+        self._cancel: Optional[CancelToken] = None
+
+    def _retry_batches(self, missing: List[str]) -> List[List[str]]:
+        if len(missing) > 1:
+            mid = len(missing) // 2
+            return [missing[:mid], missing[mid:]]
+        return []
+
+    def start(self, cancel: Optional[CancelToken] = None):
+        self.unresolved = []
+        self._futures = {}
+        self._escalation = {}
+        # Fixed for the whole run, even if settings change mid-scan
+        self._tiers = self.categorizer.tiers
+        self._cancel = cancel
+        # Keep the HTTP pool at least as wide as the worker count
+        self.categorizer.client.pool_size = max(self.categorizer.client.pool_size, self.max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="appnort-ai")
+
+    def submit(self, batch: List[str], tier: int = 0):
+        if batch:
+            self._futures[self._executor.submit(self._request, batch, tier)] = (batch, tier)
+
+    def _request(self, batch: List[str], tier: int = 0):
+        # One batch end to end, including retries and rate-limit waits
+        metrics.incr("ai_batches")
+        with metrics.timer("ai_batch"):
+            return self.categorizer.request_batch(batch, self._cancel, self._tiers[tier])
+
+    def _escalate(self, names: List[str], tier: int):
+        packer = self._escalation.get(tier)
+        if packer is None:
+            packer = self._escalation[tier] = self.categorizer.batch_packer(self.token_budget, tier)
+        for name in names:
+            full = packer.add(name)
+            if full:
+                self.submit(full, tier)
+
+    def _flush_escalations(self):
+        # Send partial escalation batches for tiers nothing below can still feed
+        for tier, packer in self._escalation.items():
+            if packer.pending_count and not any(t < tier for _, t in self._futures.values()):
+                self.submit(packer.flush(), tier)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._futures)
+
+    def collect(self, wait_all: bool = False) -> Iterator[BatchResult]:
+        # Yields finished batches; with wait_all, blocks until nothing is left in flight.
+        # Raises ScanCancelled once the cancel token fires.
+        while self._futures:
+            if self._cancel is not None:
+                self._cancel.raise_if_cancelled()
+            # Wake up regularly while blocking so cancellation is noticed
+            done, _ = wait(self._futures, timeout=0.25 if wait_all else 0, return_when=FIRST_COMPLETED)
+            if not done:
+                if wait_all:
+                    continue
+                return
+            for future in done:
+                batch, tier = self._futures.pop(future)
+                try:
+                    results = future.result()
+                except ScanCancelled:
+                    raise
+                except Exception as e:
+                    # Typically a reply the parser choked on: treat it like one that answered
+                    # nothing, so the batch is split and retried instead of given up whole
+                    print(f"Batch AI Error: {e}")
+                    metrics.incr("errors", source="ai_batch")
+                    results = {}
+
+                if tier < len(self._tiers) - 1:
+                    # Cascade tier: whatever it did not settle (including failures) goes up a tier
+                    settled = [name for name in batch if results and name in results]
+                    self._escalate([name for name in batch if not results or name not in results], tier + 1)
+                    yield settled, results or {}
+                    continue
+
+                if results is None:
+                    # Transport failure after retries: splitting would not help
+                    self.unresolved.extend(batch)
+                    metrics.incr("ai_unresolved", len(batch))
+                    yield batch, {}
+                    continue
+
+                missing = [name for name in batch if name not in results]
+                retries = self._retry_batches(missing) if self.split_on_failure else []
+                for retry in retries:
+                    self.submit(retry, tier)
+                if retries:
+                    metrics.incr("ai_split_retries", len(retries))
+                else:
+                    self.unresolved.extend(missing)
+                    metrics.incr("ai_unresolved", len(missing))
+
+                # Report only the names this batch settled; retried names come back later
+                settled = [name for name in batch if name in results or not retries]
+                yield settled, results
+            self._flush_escalations()
+
+    def close(self):
+        if self._executor is not None:
+            # On cancel, drop queued batches and do not wait for in-flight requests;
+            # they end on their own within one request timeout.
+            cancelled = self._cancel is not None and self._cancel.cancelled
+            self._executor.shutdown(wait=not cancelled, cancel_futures=True)
+            self._executor = None
+            self._futures = {}
+
+    def dispatch(self, batches: Iterable[List[str]], cancel: Optional[CancelToken] = None) -> Iterator[BatchResult]:
+        self.start(cancel)
+        try:
+            for batch in batches:
+                self.submit(batch)
+            yield from self.collect(wait_all=True)
+        finally:
+            self.close()
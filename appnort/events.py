@@ -0,0 +1,100 @@
+import queue
+import threading
+from collections import namedtuple
+from typing import Callable, List, Optional
+
+# Typed events published by worker threads (scanner, categorizer, exporter)
+# and drained on the Tk thread.
+ProgressEvent = namedtuple("ProgressEvent", ["stage", "done", "total"])
+StatusEvent = namedtuple("StatusEvent", ["message"])
+ProgramResolvedEvent = namedtuple("ProgramResolvedEvent", ["program"])
+ErrorEvent = namedtuple("ErrorEvent", ["message"])
+TaskDoneEvent = namedtuple("TaskDoneEvent", ["task", "result"])
+TaskCancelledEvent = namedtuple("TaskCancelledEvent", ["task"])
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ScanCancelled()
+
+    def sleep(self, seconds: float) -> bool:
+        # Interruptible sleep; returns True if cancelled while waiting
+        return self._event.wait(seconds)
+
+
+def cancellable_sleep(seconds: float, cancel: Optional[CancelToken] = None):
+    if seconds <= 0:
+        return
+    if cancel is None:
+        threading.Event().wait(seconds)
+    elif cancel.sleep(seconds):
+        raise ScanCancelled()
+
+
+class EventBus:
+    # Thread-safe channel: publish() from any thread, drain() on the UI thread.
+    # Subscribers are called from drain(), so they run on the draining thread too.
+    def __init__(self):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable] = []
+
+    def publish(self, event):
+        self._queue.put(event)
+
+    def subscribe(self, callback: Callable) -> Callable:
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def drain(self, max_events: int = 10000) -> List:
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        events = self.coalesce(events)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                callback(event)
+        return events
+
+    @staticmethod
+    def coalesce(events: List) -> List:
+        # Only the latest progress per stage and the latest status matter for one frame;
+        # everything else is kept in order.
+        latest_progress = {}
+        latest_status = None
+        for i, event in enumerate(events):
+            if isinstance(event, ProgressEvent):
+                latest_progress[event.stage] = i
+            elif isinstance(event, StatusEvent):
+                latest_status = i
+        keep = set(latest_progress.values())
+        if latest_status is not None:
+            keep.add(latest_status)
+        return [e for i, e in enumerate(events)
+                if i in keep or not isinstance(e, (ProgressEvent, StatusEvent))]
@@ -0,0 +1,274 @@
+import csv
+import html
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from appnort.events import CancelToken, EventBus, StatusEvent
+from appnort.inventory import Inventory
+from appnort.metrics import metrics
+
+# Full, untruncated program fields written by the row-based exporters
+EXPORT_FIELDS = ["name", "version", "publisher", "category", "security",
+                 "install_date", "size_kb", "location", "os"]
+
+# Rows between progress callbacks / cancellation checks
+PROGRESS_EVERY = 1000
+
+ExportProgress = Callable[[str, int, int], None]
+
+
+class Exporter(ABC):
+    # One output format. Subclasses set format/label/extension and implement export().
+    format = ""
+    label = ""
+    extension = ""
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def export(self, programs: Iterable[Dict[str, Any]], output_path: str, fields: Optional[List[str]] = None,
+               progress: Optional[ExportProgress] = None, cancel: Optional[CancelToken] = None,
+               events: Optional[EventBus] = None) -> int:
+        # Returns the number of rows written; completion is announced on `events`
+        ...
+
+    def _announce(self, output_path: str, events: Optional[EventBus]):
+        if events is not None:
+            events.publish(StatusEvent(f"{self.label} exported to {output_path}"))
+
+
+class RowExporter(Exporter):
+    # Streams program rows to disk one at a time: header, rows, footer.
+    # Subclasses implement write_row() and, when needed, begin() / end().
+    def export(self, programs: Iterable[Dict[str, Any]], output_path: str, fields: Optional[List[str]] = None,
+               progress: Optional[ExportProgress] = None, cancel: Optional[CancelToken] = None,
+               events: Optional[EventBus] = None) -> int:
+        # Returns the number of rows written. `programs` may be any iterable,
+        # so callers can stream rows without building a list first.
+        # Like the PDF report, the file is written next to output_path and moved into
+        # place once complete, so a cancelled or failed export never leaves a partial file.
+        fields = fields or EXPORT_FIELDS
+        total = len(programs) if hasattr(programs, "__len__") else 0
+        count = 0
+        temp_path = output_path + ".tmp"
+        try:
+            with metrics.timer("export", format=self.format), self.open(temp_path) as f:
+                state = self.begin(f, fields)
+                for prog in programs:
+                    self.write_row(f, state, fields, prog)
+                    count += 1
+                    if count % PROGRESS_EVERY == 0:
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        if progress:
+                            progress("export", count, total)
+                self.end(f, state, count)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+        metrics.incr("export_rows", count, format=self.format)
+        if progress:
+            progress("export", count, total or count)
+        self._announce(output_path, events)
+        return count
+
+    def open(self, output_path: str):
+        return open(output_path, 'w', encoding='utf-8', newline='')
+
+    def begin(self, f, fields: List[str]) -> Any:
+        return None
+
+    @abstractmethod
+    def write_row(self, f, state: Any, fields: List[str], prog: Dict[str, Any]):
+        ...
+
+    def end(self, f, state: Any, count: int):
+        pass
+
+
+class CSVExporter(RowExporter):
+    format = "csv"
+    label = "CSV"
+    extension = ".csv"
+
+    def begin(self, f, fields):
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        return writer
+
+    def write_row(self, f, writer, fields, prog):
+        writer.writerow([_text(prog.get(field)) for field in fields])
+
+
+class JSONLinesExporter(RowExporter):
+    format = "jsonl"
+    label = "JSON Lines"
+    extension = ".jsonl"
+
+    def write_row(self, f, state, fields, prog):
+        f.write(json.dumps({field: prog.get(field) for field in fields}, ensure_ascii=False))
+        f.write("\n")
+
+
+class HTMLExporter(RowExporter):
+    # Single self-contained file: inline CSS and a tiny filter script, no external assets
+    format = "html"
+    label = "HTML Report"
+    extension = ".html"
+
+    STYLE = (
+        "body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222}"
+        "table{border-collapse:collapse;width:100%;font-size:13px}"
+        "th,td{border:1px solid #ccc;padding:4px 6px;text-align:left;vertical-align:top}"
+        "th{background:#e8e8e8;position:sticky;top:0}"
+        "tr:nth-child(even){background:#f7f7f7}"
+        ".High{color:#c00;font-weight:bold}.Medium{color:#d80}.Low{color:#080}"
+        "#filter{margin:8px 0;padding:4px;width:300px}"
+    )
+    SCRIPT = (
+        "document.getElementById('filter').addEventListener('input',function(e){"
+        "var q=e.target.value.toLowerCase();"
+        "document.querySelectorAll('tbody tr').forEach(function(r){"
+        "r.style.display=r.textContent.toLowerCase().indexOf(q)<0?'none':''});});"
+    )
+
+    def begin(self, f, fields):
+        f.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+                f"<title>Appnort Software Audit Report</title><style>{self.STYLE}</style></head><body>\n")
+        f.write(f"<h1>Appnort Software Audit Report - {datetime.now().strftime('%Y-%m-%d')}</h1>\n")
+        f.write("<input id=\"filter\" placeholder=\"Filter...\">\n<table><thead><tr>")
+        f.write("".join(f"<th>{html.escape(field.replace('_', ' ').title())}</th>" for field in fields))
+        f.write("</tr></thead><tbody>\n")
+        return fields.index("security") if "security" in fields else -1
+
+    # Risk levels that have a style; any other value gets no class attribute
+    RISK_CLASSES = {"High": "High", "Medium": "Medium", "Low": "Low"}
+
+    def write_row(self, f, security_col, fields, prog):
+        cells = []
+        for i, field in enumerate(fields):
+            raw = _text(prog.get(field))
+            value = html.escape(raw)
+            css = self.RISK_CLASSES.get(raw) if i == security_col else None
+            cells.append(f"<td class=\"{css}\">{value}</td>" if css else f"<td>{value}</td>")
+        f.write("<tr>" + "".join(cells) + "</tr>\n")
+
+    def end(self, f, state, count):
+        f.write(f"</tbody></table><p>Total: {count}</p><script>{self.SCRIPT}</script></body></html>\n")
+
+
+class XLSXExporter(Exporter):
+    # Optional: needs openpyxl. Uses its write-only mode, which streams rows to disk.
+    format = "xlsx"
+    label = "Excel Workbook"
+    extension = ".xlsx"
+
+    def available(self) -> bool:
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def export(self, programs, output_path, fields=None, progress=None, cancel=None, events=None):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("XLSX export requires openpyxl (pip install openpyxl)")
+        fields = fields or EXPORT_FIELDS
+        total = len(programs) if hasattr(programs, "__len__") else 0
+        count = 0
+        temp_path = output_path + ".tmp"
+        try:
+            with metrics.timer("export", format=self.format):
+                workbook = Workbook(write_only=True)
+                sheet = workbook.create_sheet("Programs")
+                sheet.append(fields)
+                for prog in programs:
+                    sheet.append([_cell(prog.get(field)) for field in fields])
+                    count += 1
+                    if count % PROGRESS_EVERY == 0:
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        if progress:
+                            progress("export", count, total)
+                workbook.save(temp_path)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+        metrics.incr("export_rows", count, format=self.format)
+        if progress:
+            progress("export", count, total or count)
+        self._announce(output_path, events)
+        return count
+
+
+class PDFExporter(Exporter):
+    # Adapter so the PDF report shares the registry; reportlab loads on first use
+    format = "pdf"
+    label = "PDF Report"
+    extension = ".pdf"
+
+    def __init__(self, mode: str = "full"):
+        self.mode = mode
+
+    def export(self, programs, output_path, fields=None, progress=None, cancel=None, events=None):
+        from appnort.pdf_generator import PDFGenerator
+        programs = programs if isinstance(programs, (list, Inventory)) else list(programs)
+        PDFGenerator().generate_report(programs, output_path, progress=progress, cancel=cancel, mode=self.mode,
+                                       events=events)
+        return len(programs)
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _cell(value: Any) -> Any:
+    return value if isinstance(value, (int, float)) or value is None else str(value)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+EXPORTERS: Dict[str, Exporter] = {}
+
+
+def register_exporter(exporter: Exporter):
+    EXPORTERS[exporter.format] = exporter
+
+
+for _exporter in (PDFExporter(), CSVExporter(), JSONLinesExporter(), HTMLExporter(), XLSXExporter()):
+    register_exporter(_exporter)
+
+
+def available_formats() -> List[str]:
+    return [fmt for fmt, exporter in EXPORTERS.items() if exporter.available()]
+
+
+def get_exporter(fmt: str, pdf_mode: str = "full") -> Exporter:
+    fmt = fmt.lower().lstrip(".")
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "pdf" and pdf_mode != "full":
+        return PDFExporter(pdf_mode)
+    return EXPORTERS[fmt]
+
+
+def exporter_for_path(path: str, default: str = "pdf") -> Exporter:
+    # Picks the exporter from the file extension chosen in a save dialog
+    extension = os.path.splitext(path)[1].lower()
+    for exporter in EXPORTERS.values():
+        if exporter.extension == extension:
+            return exporter
+    return get_exporter(default)
@@ -0,0 +1,172 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from appnort.events import CancelToken
+from appnort.exporters import EXPORT_FIELDS, get_exporter
+from appnort.inventory import Inventory
+from appnort.planner import ProgressCallback, ScanPlanner
+
+
+class MachineInventory:
+    # One endpoint's program list, in the same dict shape Scanner produces. Held
+    # as an Inventory: a fleet keeps every machine in memory and ships each one
+    # to a report worker, and the columnar form is several times smaller to hold and pickle.
+    def __init__(self, machine: str, programs: List[Dict[str, Any]], source: Optional[str] = None):
+        self.machine = machine
+        self.programs = Inventory.from_programs(programs)
+        self.source = source
+
+    @classmethod
+    def load(cls, path: str) -> "MachineInventory":
+        # Accepts either a bare program list or {"machine": ..., "programs": [...]}
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        machine = os.path.splitext(os.path.basename(path))[0]
+        if isinstance(data, dict):
+            machine = data.get("machine") or data.get("hostname") or machine
+            data = data.get("programs", [])
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: expected a list of programs")
+        programs = Inventory(p for p in data if isinstance(p, dict) and p.get('name'))
+        return cls(machine, programs, path)
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"machine": self.machine, "programs": self.programs.to_dicts()}, f, indent=2)
+
+
+def find_inventories(paths: Iterable[str]) -> List[str]:
+    # Expands directories to the *.json files directly inside them
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".json")))
+        else:
+            files.append(path)
+    return files
+
+
+def _safe_filename(machine: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', machine).strip('._') or "machine"
+
+
+def _write_report(job: Tuple[str, str, List[Dict[str, Any]], str, Optional[List[str]]]) -> str:
+    # Runs in a worker process; reportlab / openpyxl are imported there only
+    fmt, pdf_mode, programs, path, fields = job
+    get_exporter(fmt, pdf_mode).export(programs, path, fields=fields)
+    return path
+
+
+class FleetAuditor:
+    # Classifies inventories from many machines at the cost of one:
+    #   1. every distinct (name, publisher) pair across the fleet is collected once
+    #   2. those unique products go through ScanPlanner (cache -> rules -> one AI dispatch,
+    #      itself deduplicated by canonical name)
+    #   3. the answers are fanned back out to every machine's programs
+    # Report files are written in a process pool because PDF layout is CPU bound;
+    # any format from the exporter registry can be requested.
+    def __init__(self, planner: ScanPlanner, report_workers: Optional[int] = None):
+        self.planner = planner
+        self.report_workers = report_workers
+        self.unique_count = 0
+
+    def classify(self, inventories: List[MachineInventory], progress: Optional[ProgressCallback] = None,
+                 cancel: Optional[CancelToken] = None) -> List[MachineInventory]:
+        products: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        keys = []
+        for inventory in inventories:
+            # Read straight from the name/publisher columns instead of building row views
+            programs = inventory.programs
+            machine_keys = [(name, publisher or "") for name, publisher in
+                            zip(programs.column('name'), programs.column('publisher'))]
+            keys.append(machine_keys)
+            for key in machine_keys:
+                if key not in products:
+                    products[key] = {'name': key[0], 'publisher': key[1] or None}
+        self.unique_count = len(products)
+
+        self.planner.run(list(products.values()), progress, cancel)
+
+        for inventory, machine_keys in zip(inventories, keys):
+            programs = inventory.programs
+            for i, key in enumerate(machine_keys):
+                product = products[key]
+                programs.set_value(i, 'category', product['category'])
+                programs.set_value(i, 'security', product['security'])
+        return inventories
+
+    @staticmethod
+    def summarize(inventories: List[MachineInventory]) -> Dict[str, Any]:
+        # Products are (name, publisher) pairs, the same identity classify() uses
+        products: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        machines = []
+        for inventory in inventories:
+            programs = inventory.programs
+            machines.append({
+                "machine": inventory.machine,
+                "programs": len(programs),
+                "risk": programs.counts('security'),
+                "high_risk": sorted(p['name'] for p in programs.rows(programs.filter(security='High'))),
+            })
+            for prog in inventory.programs:
+                publisher = prog.get('publisher') or 'Unknown'
+                product = products.setdefault((prog['name'], publisher), {
+                    "name": prog['name'],
+                    "publisher": publisher,
+                    "category": prog.get('category', 'Unknown'),
+                    "security": prog.get('security', 'Unknown'),
+                    "machines": 0,
+                })
+                product["machines"] += 1
+
+        return {
+            "machines": machines,
+            "products": sorted(products.values(),
+                               key=lambda p: (-p["machines"], p["name"].lower(), p["publisher"].lower())),
+            "totals": {
+                "machines": len(inventories),
+                "installs": sum(m["programs"] for m in machines),
+                "unique_products": len(products),
+                "risk": dict(sum((Counter(m["risk"]) for m in machines), Counter())),
+            },
+        }
+
+    def write_reports(self, inventories: List[MachineInventory], output_dir: str,
+                      formats: Iterable[str] = ("pdf",), pdf_mode: str = "full") -> Dict[str, Any]:
+        # One file per machine and format plus fleet_report.<ext>; an empty `formats`
+        # writes only fleet_summary.json. pdf_mode: see pdf_generator.REPORT_MODES.
+        os.makedirs(output_dir, exist_ok=True)
+        summary = self.summarize(inventories)
+        summary_path = os.path.join(output_dir, "fleet_summary.json")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        written = [summary_path]
+        names = []
+        used = set()
+        for inventory in inventories:
+            name = _safe_filename(inventory.machine)
+            while name in used:
+                name += "_"
+            used.add(name)
+            names.append(name)
+
+        jobs = []
+        for fmt in formats:
+            extension = get_exporter(fmt).extension
+            for inventory, name in zip(inventories, names):
+                jobs.append((fmt, pdf_mode, inventory.programs, os.path.join(output_dir, name + extension), None))
+            # Aggregate report: one row per product across the fleet
+            jobs.append((fmt, pdf_mode, summary["products"], os.path.join(output_dir, "fleet_report" + extension),
+                         EXPORT_FIELDS[:5] + ["machines"]))
+
+        if len(jobs) > 2 and self.report_workers != 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.report_workers) as pool:
+                written.extend(pool.map(_write_report, jobs, chunksize=max(1, len(jobs) // 64)))
+        else:
+            written.extend(_write_report(job) for job in jobs)
+        return {"summary": summary, "files": written}
@@ -0,0 +1,201 @@
+import json
+import random
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from appnort.events import CancelToken, cancellable_sleep
+from appnort.metrics import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    # Groq reset headers look like "7.66s", "2m59.56s" or "120ms"; Retry-After is plain seconds
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in _DURATION_PART.findall(value):
+        matched = True
+        amount = float(amount)
+        if unit == "h":
+            total += amount * 3600
+        elif unit == "m":
+            total += amount * 60
+        elif unit == "s":
+            total += amount
+        else:
+            total += amount / 1000
+    return total if matched else None
+
+
+class RateLimiter:
+    # Shared by every worker: once the server reports an exhausted budget,
+    # all requests hold off until the advertised reset time.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self, cancel: Optional[CancelToken] = None):
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        cancellable_sleep(delay, cancel)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def update(self, headers):
+        for budget in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{budget}")
+            if remaining is None:
+                continue
+            try:
+                exhausted = float(remaining) <= 0
+            except ValueError:
+                continue
+            if exhausted:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{budget}"))
+                if reset:
+                    self.pause(reset)
+
+
+class GroqClient:
+    def __init__(self, timeout: float = 30.0, max_retries: int = 4, pool_size: int = 8,
+                 backoff_base: float = 0.5, backoff_cap: float = 20.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._pool_size = pool_size
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rate_limiter = RateLimiter()
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool_size
+
+    @pool_size.setter
+    def pool_size(self, size: int):
+        # The adapter's pool is sized when it is created, so a live session gets a
+        # new one. The session object itself (cookies, headers) is kept.
+        with self._session_lock:
+            if size == self._pool_size:
+                return
+            self._pool_size = size
+            if self._session is not None:
+                self._mount(self._session)
+
+    def _mount(self, session: "requests.Session"):
+        from requests.adapters import HTTPAdapter
+        old = session.adapters.get("https://")
+        adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if old is not None:
+            old.close()
+
+    @property
+    def session(self) -> "requests.Session":
+        # One keep-alive connection pool shared by all dispatcher threads.
+        # requests is imported here: it is the slowest import in the app and
+        # only needed once the first batch goes out.
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                session = requests.Session()
+                self._mount(session)
+                self._session = session
+            return self._session
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def post_chat(self, url: str, api_key: str, payload: Dict[str, Any],
+                  cancel: Optional[CancelToken] = None) -> Optional[Dict[str, Any]]:
+        # Raises ScanCancelled if `cancel` fires between attempts or while waiting;
+        # an in-flight request is bounded by self.timeout.
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        import requests
+        body = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.max_retries + 1):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            self.rate_limiter.wait(cancel)
+            if attempt:
+                metrics.incr("ai_retries")
+            try:
+                with metrics.timer("ai_request"):
+                    response = self.session.post(url, headers=headers, data=body, timeout=self.timeout)
+            except requests.RequestException as e:
+                # Connection resets and timeouts, but also redirect loops and bodies cut short
+                metrics.incr("ai_status", status=type(e).__name__)
+                if attempt == self.max_retries:
+                    print(f"Groq request failed: {e}")
+                    metrics.incr("errors", source="ai_request")
+                    return None
+                cancellable_sleep(self._backoff(attempt), cancel)
+                continue
+
+            self.rate_limiter.update(response.headers)
+            metrics.incr("ai_status", status=response.status_code)
+            metrics.incr("ai_bytes_sent", len(body))
+            metrics.incr("ai_bytes_received", len(response.content))
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except ValueError:
+                    # A 200 that is not JSON comes from something in between (a proxy error page)
+                    metrics.incr("ai_status", status="invalid_json")
+                    if attempt == self.max_retries:
+                        print(f"Groq API Error: response is not JSON - {response.text[:200]}")
+                        metrics.incr("errors", source="ai_request")
+                        return None
+                    cancellable_sleep(self._backoff(attempt), cancel)
+                    continue
+                usage = data.get("usage") if isinstance(data, dict) else None
+                if isinstance(usage, dict):
+                    for field in ("prompt_tokens", "completion_tokens"):
+                        if isinstance(usage.get(field), (int, float)):
+                            metrics.incr("ai_tokens", usage[field], kind=field.split("_")[0])
+                return data
+
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == self.max_retries:
+                print(f"Groq API Error: {response.status_code} - {response.text}")
+                metrics.incr("errors", source="ai_request")
+                return None
+
+            retry_after = None
+            if response.status_code == 429:
+                retry_after = parse_duration(response.headers.get("retry-after"))
+            if retry_after is not None:
+                # Honored by rate_limiter.wait() at the top of the next attempt, for every worker
+                self.rate_limiter.pause(retry_after)
+            else:
+                cancellable_sleep(self._backoff(attempt), cancel)
+        return None
@@ -0,0 +1,246 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from appnort.events import CancelToken
+from appnort.metrics import metrics
+
+# Files worth hashing for threat-intel matching
+EXECUTABLE_EXTENSIONS = (".exe", ".dll", ".sys", ".ocx", ".cpl", ".scr", ".msi", ".com", ".so", ".dylib")
+
+# (path, size, mtime_ns)
+FileStat = Tuple[str, int, int]
+
+
+class HashCache:
+    # Persistent digests keyed by path; a row is only reused while the file's
+    # size and mtime still match, so rescans hash changed files only.
+    def __init__(self, path: str = "hash_cache.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, files: List[FileStat]) -> Dict[str, str]:
+        found = {}
+        with self._lock:
+            wanted = {path: (size, mtime) for path, size, mtime in files}
+            paths = list(wanted)
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT path, size, mtime_ns, sha256 FROM digests WHERE path IN ({placeholders})", chunk
+                )
+                for path, size, mtime, digest in rows:
+                    if wanted[path] == (size, mtime):
+                        found[path] = digest
+        return found
+
+    def set(self, path: str, size: int, mtime_ns: int, digest: str):
+        with self._lock:
+            self._pending[path] = (size, mtime_ns, digest)
+
+    def commit(self):
+        with self._lock:
+            if not self._pending:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO digests (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                    [(p, s, m, d) for p, (s, m, d) in self._pending.items()]
+                )
+            self._pending.clear()
+
+    def prune(self, seen: Iterable[str]) -> int:
+        # Drops digests of files the latest walk did not find (uninstalled programs,
+        # replaced files), so the cache follows the machine instead of growing forever
+        self.commit()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM seen")
+            self._conn.executemany("INSERT OR IGNORE INTO seen (path) VALUES (?)", ((path,) for path in seen))
+            removed = self._conn.execute("DELETE FROM digests WHERE path NOT IN (SELECT path FROM seen)").rowcount
+            self._conn.execute("DROP TABLE seen")
+        return removed
+
+    def close(self):
+        self.commit()
+        with self._lock:
+            self._conn.close()
+
+
+class ExecutableHasher:
+    # Optional enrichment stage: walks each program's install location, hashes
+    # executables and libraries (SHA-256) on a thread pool and attaches
+    #   program["executables"] = [{"path", "size", "sha256"}, ...]
+    #
+    # Limits keep a scan bounded: files above max_file_size are listed without
+    # a digest, hashing stops scheduling new files once io_budget bytes have
+    # been read, and each location is walked at most max_depth levels /
+    # max_files_per_location files deep (an InstallLocation of "C:\Program
+    # Files" must not turn into a full disk walk).
+    #
+    # enrich() is given the whole inventory, so with prune_cache a completed run
+    # also drops cached digests of files it no longer finds.
+    def __init__(self, cache: Optional[HashCache] = None, max_workers: int = 8,
+                 max_file_size: int = 256 * 1024 * 1024, io_budget: Optional[int] = 2 * 1024 * 1024 * 1024,
+                 max_depth: int = 6, max_files_per_location: int = 5000, chunk_size: int = 1024 * 1024,
+                 mmap_threshold: int = 8 * 1024 * 1024, prune_cache: bool = True):
+        self.cache = cache
+        self.prune_cache = prune_cache
+        self.max_workers = max(1, max_workers)
+        self.max_file_size = max_file_size
+        self.io_budget = io_budget
+        self.max_depth = max_depth
+        self.max_files_per_location = max_files_per_location
+        self.chunk_size = chunk_size
+        # Larger files are hashed from a memory map in one call (releases the GIL for the whole file)
+        self.mmap_threshold = mmap_threshold
+        self.extensions = EXECUTABLE_EXTENSIONS
+        self.last_stats: Dict[str, int] = {}
+
+    # --- Walking ---
+
+    @staticmethod
+    def normalize_location(location: Optional[str]) -> Optional[str]:
+        # Registry values often carry quotes or a trailing separator
+        if not location or location == "Unknown":
+            return None
+        location = location.strip().strip('"').rstrip("\\/")
+        if not location or not os.path.isdir(location):
+            return None
+        return os.path.normcase(os.path.abspath(location))
+
+    def iter_executables(self, root: str) -> Iterator[FileStat]:
+        stack = [(root, 0)]
+        found = 0
+        while stack:
+            directory, depth = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if depth < self.max_depth:
+                                    stack.append((entry.path, depth + 1))
+                            elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(self.extensions):
+                                st = entry.stat(follow_symlinks=False)
+                                yield entry.path, st.st_size, st.st_mtime_ns
+                                found += 1
+                                if found >= self.max_files_per_location:
+                                    return
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    # --- Hashing ---
+
+    def hash_file(self, path: str, size: int) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            if size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+            else:
+                buffer = bytearray(min(self.chunk_size, max(size, 1)))
+                view = memoryview(buffer)
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+        return digest.hexdigest()
+
+    def enrich(self, programs: List[Dict[str, Any]], progress: Optional[Callable[[str, int, int], None]] = None,
+               cancel: Optional[CancelToken] = None) -> Dict[str, int]:
+        stats = {"locations": 0, "files": 0, "cached": 0, "hashed": 0, "too_large": 0,
+                 "over_budget": 0, "errors": 0, "bytes_read": 0, "pruned": 0}
+
+        # Several programs (or versions) can share one install location
+        by_location: Dict[str, List[Dict[str, Any]]] = {}
+        for prog in programs:
+            location = self.normalize_location(prog.get('location'))
+            if location:
+                by_location.setdefault(location, []).append(prog)
+        stats["locations"] = len(by_location)
+
+        with metrics.timer("hash_enrich"), ThreadPoolExecutor(max_workers=self.max_workers,
+                                                               thread_name_prefix="appnort-hash") as pool:
+            # Walk all locations in parallel
+            walked = dict(zip(by_location, pool.map(lambda root: list(self.iter_executables(root)), by_location)))
+            files: Dict[str, FileStat] = {}
+            for stats_list in walked.values():
+                for stat in stats_list:
+                    files[stat[0]] = stat
+            stats["files"] = len(files)
+
+            digests = self.cache.get_many(list(files.values())) if self.cache else {}
+            stats["cached"] = len(digests)
+
+            todo = []
+            budget = self.io_budget
+            for path, size, mtime in files.values():
+                if path in digests:
+                    continue
+                if size > self.max_file_size:
+                    stats["too_large"] += 1
+                    continue
+                if budget is not None:
+                    if size > budget:
+                        stats["over_budget"] += 1
+                        continue
+                    budget -= size
+                todo.append((path, size, mtime))
+
+            if progress:
+                progress("hash", 0, len(todo))
+            futures = {pool.submit(self.hash_file, path, size): (path, size, mtime) for path, size, mtime in todo}
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    path, size, mtime = futures[future]
+                    try:
+                        digests[path] = future.result()
+                    except (OSError, ValueError):
+                        # Locked, vanished or unreadable: listed without a digest
+                        stats["errors"] += 1
+                    else:
+                        stats["hashed"] += 1
+                        stats["bytes_read"] += size
+                        if self.cache:
+                            self.cache.set(path, size, mtime, digests[path])
+                    if cancel is not None and cancel.cancelled:
+                        for pending in futures:
+                            pending.cancel()
+                        cancel.raise_if_cancelled()
+                    if progress and (done % 50 == 0 or done == len(futures)):
+                        progress("hash", done, len(futures))
+            finally:
+                if self.cache:
+                    self.cache.commit()
+            # Not reached on cancel: a cancelled run keeps every digest
+            if self.cache and self.prune_cache:
+                stats["pruned"] = self.cache.prune(files)
+
+        for location, progs in by_location.items():
+            executables = [{"path": path, "size": size, "sha256": digests.get(path)}
+                           for path, size, _ in walked[location]]
+            for prog in progs:
+                prog['executables'] = executables
+
+        for key in ("files", "cached", "hashed", "too_large", "over_budget", "errors", "bytes_read", "pruned"):
+            metrics.incr(f"hash_{key}", stats[key])
+        self.last_stats = stats
+        return stats
@@ -0,0 +1,403 @@
+import hashlib
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from appnort.metrics import metrics
+from appnort.normalize import canonical_name
+
+DEFAULT_HISTORY_PATH = "scan_history.db"
+
+# Fields kept per program version. "running" / "processes" change on every scan
+# and executables are large, so they are not part of a row's identity.
+HISTORY_FIELDS = ("name", "version", "publisher", "category", "security", "location", "install_date",
+                  "size_kb", "os", "source")
+_ROW_COLUMNS = ", ".join(f"r.{field}" for field in HISTORY_FIELDS)
+
+# Stay under SQLite's bound-parameter limit
+_CHUNK = 500
+
+# compact() rewrites the file with VACUUM only once this much of it is free pages
+# (at least VACUUM_MIN_FREE_PAGES, and VACUUM_MIN_FREE_FRACTION of the file).
+# Below that, later scans simply reuse the free pages.
+VACUUM_MIN_FREE_PAGES = 256
+VACUUM_MIN_FREE_FRACTION = 0.25
+
+
+def _chunks(items: List[Any]) -> Iterable[List[Any]]:
+    for i in range(0, len(items), _CHUNK):
+        yield items[i:i + _CHUNK]
+
+
+def product_key(program: Dict[str, Any]) -> Tuple[str, str]:
+    # (canonical name, key): upgrades of the same product share a key, so they show up as changes
+    canonical = canonical_name(program.get('name') or "")
+    return canonical, f"{canonical}\x1f{(program.get('publisher') or '').lower()}"
+
+
+class ScanHistory:
+    # Every recorded scan, stored as spans instead of copies. A distinct program
+    # version (all HISTORY_FIELDS equal) is one row; a span says "this row was
+    # present on this machine in every scan from first_scan to last_scan". A scan
+    # that changes nothing only moves the open spans' last_scan forward, so the
+    # store grows with the changes between scans, not with their number.
+    #
+    # Scan ids increase over time, so "present in scan S" is
+    # first_scan <= S <= last_scan, and the diff between two scans A < B of one
+    # machine is two index range reads:
+    #   added   - spans that start after A and are still open at B
+    #   removed - spans that were open at A and end before B
+    # Cost follows the size of the difference, not of the inventories.
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS machines (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS scans ("
+            " id INTEGER PRIMARY KEY, machine_id INTEGER NOT NULL, taken REAL NOT NULL, programs INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS scans_machine ON scans(machine_id, id);"
+            "CREATE TABLE IF NOT EXISTS products ("
+            " id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, canonical TEXT NOT NULL,"
+            " name TEXT, publisher TEXT);"
+            "CREATE INDEX IF NOT EXISTS products_canonical ON products(canonical);"
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " id INTEGER PRIMARY KEY, fingerprint BLOB UNIQUE NOT NULL, product_id INTEGER NOT NULL, "
+            + ", ".join(HISTORY_FIELDS) + ");"
+            "CREATE INDEX IF NOT EXISTS rows_product ON rows(product_id);"
+            "CREATE TABLE IF NOT EXISTS spans ("
+            " id INTEGER PRIMARY KEY, machine_id INTEGER NOT NULL, row_id INTEGER NOT NULL,"
+            " first_scan INTEGER NOT NULL, last_scan INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS spans_first ON spans(machine_id, first_scan);"
+            "CREATE INDEX IF NOT EXISTS spans_last ON spans(machine_id, last_scan);"
+            "CREATE INDEX IF NOT EXISTS spans_row ON spans(row_id);"
+            # First/last sighting per machine and product; survives compaction of the scans themselves
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " machine_id INTEGER NOT NULL, product_id INTEGER NOT NULL, first_scan INTEGER NOT NULL,"
+            " first_taken REAL NOT NULL, last_scan INTEGER NOT NULL, last_taken REAL NOT NULL,"
+            " PRIMARY KEY (machine_id, product_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS seen_product ON seen(product_id);"
+        )
+        self._conn.commit()
+
+    # --- Recording ---
+
+    @staticmethod
+    def _row(program: Dict[str, Any]) -> Tuple[bytes, str, str, Tuple[Any, ...]]:
+        values = tuple(program.get(field) for field in HISTORY_FIELDS)
+        fingerprint = hashlib.blake2b("\x1f".join("" if v is None else str(v) for v in values).encode("utf-8"),
+                                      digest_size=16).digest()
+        canonical, key = product_key(program)
+        return fingerprint, canonical, key, values
+
+    def _machine_id(self, machine: str, create: bool = False) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM machines WHERE name = ?", (machine,)).fetchone()
+        if row is None and create:
+            return self._conn.execute("INSERT INTO machines (name) VALUES (?)", (machine,)).lastrowid
+        return row[0] if row else None
+
+    def _ids(self, table: str, column: str, values: List[Any]) -> Dict[Any, int]:
+        found = {}
+        for chunk in _chunks(values):
+            placeholders = ",".join("?" * len(chunk))
+            found.update(self._conn.execute(
+                f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})", chunk))
+        return found
+
+    def record(self, programs: Iterable[Dict[str, Any]], machine: Optional[str] = None,
+               taken: Optional[float] = None) -> int:
+        # Stores one scan and returns its id. Programs identical to one in the
+        # machine's previous scan only extend that row's span.
+        machine = machine or socket.gethostname()
+        taken = time.time() if taken is None else taken
+        rows = [self._row(p) for p in programs]
+        with metrics.timer("history_record"), self._lock, self._conn:
+            machine_id = self._machine_id(machine, create=True)
+            previous = self._latest(machine_id)
+            scan_id = self._conn.execute("INSERT INTO scans (machine_id, taken, programs) VALUES (?, ?, ?)",
+                                         (machine_id, taken, len(rows))).lastrowid
+
+            open_spans: Dict[bytes, List[int]] = {}
+            if previous is not None:
+                for span_id, fingerprint in self._conn.execute(
+                        "SELECT s.id, r.fingerprint FROM spans s JOIN rows r ON r.id = s.row_id"
+                        " WHERE s.machine_id = ? AND s.last_scan = ?", (machine_id, previous)):
+                    open_spans.setdefault(fingerprint, []).append(span_id)
+            new_rows = []
+            for row in rows:
+                spans = open_spans.get(row[0])
+                if spans:
+                    spans.pop()
+                else:
+                    new_rows.append(row)
+
+            if previous is not None:
+                # Extend every open span, then close the ones whose program is gone
+                self._conn.execute("UPDATE spans SET last_scan = ? WHERE machine_id = ? AND last_scan = ?",
+                                   (scan_id, machine_id, previous))
+                closed = [span_id for spans in open_spans.values() for span_id in spans]
+                for chunk in _chunks(closed):
+                    self._conn.execute(f"UPDATE spans SET last_scan = ? WHERE id IN ({','.join('?' * len(chunk))})",
+                                       [previous] + chunk)
+
+            if new_rows:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO products (key, canonical, name, publisher) VALUES (?, ?, ?, ?)",
+                    [(key, canonical, values[0], values[2]) for _, canonical, key, values in new_rows])
+                products = self._ids("products", "key", list({row[2] for row in new_rows}))
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO rows (fingerprint, product_id, {', '.join(HISTORY_FIELDS)})"
+                    f" VALUES (?, ?, {', '.join('?' * len(HISTORY_FIELDS))})",
+                    [(fingerprint, products[key]) + values for fingerprint, _, key, values in new_rows])
+                row_ids = self._ids("rows", "fingerprint", list({row[0] for row in new_rows}))
+                self._conn.executemany(
+                    "INSERT INTO spans (machine_id, row_id, first_scan, last_scan) VALUES (?, ?, ?, ?)",
+                    [(machine_id, row_ids[row[0]], scan_id, scan_id) for row in new_rows])
+                # Only a new span can bring a product this machine has never had
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO seen"
+                    " (machine_id, product_id, first_scan, first_taken, last_scan, last_taken)"
+                    " SELECT DISTINCT ?, r.product_id, ?, ?, ?, ? FROM spans s JOIN rows r ON r.id = s.row_id"
+                    " WHERE s.machine_id = ? AND s.first_scan = ?",
+                    (machine_id, scan_id, taken, scan_id, taken, machine_id, scan_id))
+            self._conn.execute(
+                "UPDATE seen SET last_scan = ?, last_taken = ? WHERE machine_id = ? AND product_id IN"
+                " (SELECT r.product_id FROM spans s JOIN rows r ON r.id = s.row_id"
+                " WHERE s.machine_id = ? AND s.last_scan = ?)",
+                (scan_id, taken, machine_id, machine_id, scan_id))
+        metrics.incr("history_rows_new", len(new_rows))
+        metrics.incr("history_rows_unchanged", len(rows) - len(new_rows))
+        return scan_id
+
+    # --- Scans ---
+
+    def _latest(self, machine_id: int, before: Optional[int] = None) -> Optional[int]:
+        if before is None:
+            row = self._conn.execute("SELECT MAX(id) FROM scans WHERE machine_id = ?", (machine_id,)).fetchone()
+        else:
+            row = self._conn.execute("SELECT MAX(id) FROM scans WHERE machine_id = ? AND id < ?",
+                                     (machine_id, before)).fetchone()
+        return row[0]
+
+    def scans(self, machine: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT s.id, m.name, s.taken, s.programs FROM scans s JOIN machines m ON m.id = s.machine_id"
+        params: Tuple[Any, ...] = ()
+        if machine:
+            query += " WHERE m.name = ?"
+            params = (machine,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY s.id", params).fetchall()
+        return [{"id": i, "machine": m, "taken": t, "programs": n} for i, m, t, n in rows]
+
+    def latest(self, machine: Optional[str] = None, before: Optional[int] = None) -> Optional[int]:
+        # Newest scan of `machine`, optionally older than scan `before`. The machine
+        # defaults to the one that took `before`, else this host.
+        with self._lock:
+            if machine is None and before is not None:
+                machine_id = self._scan(before)[0]
+            else:
+                machine_id = self._machine_id(machine or socket.gethostname())
+            return None if machine_id is None else self._latest(machine_id, before)
+
+    def _scan(self, scan_id: int) -> Tuple[int, float]:
+        row = self._conn.execute("SELECT machine_id, taken FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No scan {scan_id} in {self.path}")
+        return row
+
+    @staticmethod
+    def _program(values: Tuple[Any, ...]) -> Dict[str, Any]:
+        return {field: value for field, value in zip(HISTORY_FIELDS, values) if value is not None}
+
+    def programs_at(self, scan_id: int) -> List[Dict[str, Any]]:
+        # The inventory as it was recorded in `scan_id`
+        with self._lock:
+            machine_id, _ = self._scan(scan_id)
+            rows = self._conn.execute(
+                f"SELECT {_ROW_COLUMNS} FROM spans s JOIN rows r ON r.id = s.row_id"
+                " WHERE s.machine_id = ? AND s.first_scan <= ? AND s.last_scan >= ? ORDER BY s.id",
+                (machine_id, scan_id, scan_id)).fetchall()
+        return [self._program(values) for values in rows]
+
+    # --- Queries ---
+
+    def diff(self, old_scan: int, new_scan: int) -> Dict[str, Any]:
+        # {"added": [programs], "removed": [programs], "changed": [{"before", "after", "fields"}]}.
+        # A product whose version, risk or other field changed is one "changed" entry.
+        with metrics.timer("history_diff"), self._lock:
+            old_machine, old_taken = self._scan(old_scan)
+            new_machine, new_taken = self._scan(new_scan)
+            select = f"SELECT s.row_id, r.product_id, {_ROW_COLUMNS} FROM spans s JOIN rows r ON r.id = s.row_id"
+            if old_machine != new_machine:
+                # Two machines: compare the full inventories
+                present = " WHERE s.machine_id = ? AND s.first_scan <= ? AND s.last_scan >= ?"
+                removed = self._conn.execute(select + present, (old_machine, old_scan, old_scan)).fetchall()
+                added = self._conn.execute(select + present, (new_machine, new_scan, new_scan)).fetchall()
+            else:
+                low, high = min(old_scan, new_scan), max(old_scan, new_scan)
+                starts = self._conn.execute(
+                    select + " WHERE s.machine_id = ? AND s.first_scan > ? AND s.first_scan <= ? AND s.last_scan >= ?",
+                    (new_machine, low, high, high)).fetchall()
+                ends = self._conn.execute(
+                    select + " WHERE s.machine_id = ? AND s.last_scan >= ? AND s.last_scan < ? AND s.first_scan <= ?",
+                    (new_machine, low, high, low)).fetchall()
+                added, removed = (starts, ends) if old_scan <= new_scan else (ends, starts)
+        result = self._match(removed, added)
+        result.update(old_scan=old_scan, new_scan=new_scan, old_taken=old_taken, new_taken=new_taken)
+        return result
+
+    def _match(self, removed: List[Tuple[Any, ...]], added: List[Tuple[Any, ...]]) -> Dict[str, Any]:
+        # Rows present on both sides (removed and re-added in between) are unchanged
+        remaining: Dict[int, int] = {}
+        for row in removed:
+            remaining[row[0]] = remaining.get(row[0], 0) + 1
+        kept_added = []
+        for row in added:
+            if remaining.get(row[0]):
+                remaining[row[0]] -= 1
+            else:
+                kept_added.append(row)
+        kept_removed = []
+        for row in removed:
+            if remaining.get(row[0]):
+                remaining[row[0]] -= 1
+                kept_removed.append(row)
+
+        by_product: Dict[int, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+        for side, rows in ((0, kept_removed), (1, kept_added)):
+            for row in rows:
+                by_product.setdefault(row[1], ([], []))[side].append(self._program(row[2:]))
+        result: Dict[str, Any] = {"added": [], "removed": [], "changed": []}
+        for before, after in by_product.values():
+            # Several installs of one product: pair them in version order
+            before.sort(key=lambda p: str(p.get('version', '')))
+            after.sort(key=lambda p: str(p.get('version', '')))
+            for old, new in zip(before, after):
+                fields = [field for field in HISTORY_FIELDS if old.get(field) != new.get(field)]
+                result["changed"].append({"before": old, "after": new, "fields": fields})
+            pairs = min(len(before), len(after))
+            result["removed"].extend(before[pairs:])
+            result["added"].extend(after[pairs:])
+        for key in ("added", "removed"):
+            result[key].sort(key=lambda p: str(p.get('name', '')).lower())
+        result["changed"].sort(key=lambda c: str(c["after"].get('name', '')).lower())
+        return result
+
+    def product_history(self, name: str, machine: Optional[str] = None) -> List[Dict[str, Any]]:
+        # First and last sighting of a product (any version) per machine, e.g. when a
+        # High-risk app first appeared. "present" is whether the newest scan still has it.
+        query = ("SELECT m.name, p.name, p.publisher, se.first_scan, se.first_taken, se.last_scan, se.last_taken,"
+                 " (SELECT MAX(id) FROM scans WHERE machine_id = se.machine_id)"
+                 " FROM seen se JOIN products p ON p.id = se.product_id JOIN machines m ON m.id = se.machine_id"
+                 " WHERE p.canonical = ?")
+        params: Tuple[Any, ...] = (canonical_name(name),)
+        if machine:
+            query += " AND m.name = ?"
+            params += (machine,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY se.first_taken", params).fetchall()
+        return [{"machine": m, "name": n, "publisher": pub, "first_scan": fs, "first_seen": ft,
+                 "last_scan": ls, "last_seen": lt, "present": ls == latest}
+                for m, n, pub, fs, ft, ls, lt, latest in rows]
+
+    def risk_changes(self, name: Optional[str] = None, machine: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Scans in which a product version replaced one with a different risk level.
+        # A version counts as a replacement when it first appears in the scan right
+        # after another version of the same product was last seen, so several installs
+        # side by side (two Python versions) do not read as risk flapping.
+        query = ("SELECT s.machine_id, m.name, r.product_id, s.first_scan, s.last_scan, sc.taken,"
+                 " r.name, r.version, r.security"
+                 " FROM spans s JOIN rows r ON r.id = s.row_id JOIN machines m ON m.id = s.machine_id"
+                 " JOIN scans sc ON sc.id = s.first_scan")
+        conditions = []
+        params: Tuple[Any, ...] = ()
+        if name:
+            conditions.append("r.product_id IN (SELECT id FROM products WHERE canonical = ?)")
+            params += (canonical_name(name),)
+        if machine:
+            conditions.append("m.name = ?")
+            params += (machine,)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with metrics.timer("history_risk_changes"), self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            previous_scan: Dict[int, int] = {}
+            for machine_id in {row[0] for row in rows}:
+                scan_ids = [i for (i,) in self._conn.execute(
+                    "SELECT id FROM scans WHERE machine_id = ? ORDER BY id", (machine_id,))]
+                previous_scan.update(zip(scan_ids[1:], scan_ids))
+
+        # (machine, product, last scan) -> risk levels of the versions last seen there
+        ended: Dict[Tuple[int, int, int], List[str]] = {}
+        for machine_id, _, product, _, last_scan, _, _, _, security in rows:
+            ended.setdefault((machine_id, product, last_scan), []).append(security or "Unknown")
+        changes = []
+        for machine_id, machine_name, product, first_scan, _, taken, program, version, security in rows:
+            security = security or "Unknown"
+            replaced = ended.get((machine_id, product, previous_scan.get(first_scan)))
+            if replaced and security not in replaced:
+                changes.append({"machine": machine_name, "name": program, "version": version, "scan": first_scan,
+                                "taken": taken, "before": replaced[0], "after": security})
+        changes.sort(key=lambda c: (c["taken"], c["machine"], str(c["name"]).lower()))
+        return changes
+
+    # --- Retention ---
+
+    def compact(self, keep_scans: Optional[int] = None, max_age_days: Optional[float] = None,
+                now: Optional[float] = None) -> Dict[str, int]:
+        # Drops scans beyond the newest `keep_scans` per machine and scans older than
+        # `max_age_days`; each machine's newest scan is always kept. Program versions
+        # no longer present in any kept scan are deleted, and the file is vacuumed once
+        # enough of it is free (see VACUUM_MIN_FREE_PAGES), so disk use is bounded by
+        # the retained scans. First/last-seen dates are kept.
+        if keep_scans is None and max_age_days is None:
+            return {"scans": 0, "rows": 0}
+        cutoff = None if max_age_days is None else (now or time.time()) - max_age_days * 86400
+        with self._lock:
+            doomed = []
+            machine_ids = [row[0] for row in self._conn.execute("SELECT id FROM machines")]
+            for machine_id in machine_ids:
+                scans = self._conn.execute("SELECT id, taken FROM scans WHERE machine_id = ? ORDER BY id DESC",
+                                           (machine_id,)).fetchall()
+                for position, (scan_id, taken) in enumerate(scans[1:], start=1):
+                    if (keep_scans is not None and position >= keep_scans) or (cutoff is not None and taken < cutoff):
+                        doomed.append(scan_id)
+            if not doomed:
+                return {"scans": 0, "rows": 0}
+
+            with self._conn:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS doomed (id INTEGER PRIMARY KEY)")
+                self._conn.execute("DELETE FROM doomed")
+                self._conn.executemany("INSERT INTO doomed (id) VALUES (?)", [(i,) for i in doomed])
+                self._conn.execute("DELETE FROM scans WHERE id IN (SELECT id FROM doomed)")
+                # Spans left without any kept scan go; the others shrink to their kept scans
+                self._conn.execute(
+                    "DELETE FROM spans WHERE"
+                    " (first_scan IN (SELECT id FROM doomed) OR last_scan IN (SELECT id FROM doomed))"
+                    " AND NOT EXISTS (SELECT 1 FROM scans WHERE machine_id = spans.machine_id"
+                    " AND id BETWEEN spans.first_scan AND spans.last_scan)")
+                self._conn.execute(
+                    "UPDATE spans SET"
+                    " first_scan = (SELECT MIN(id) FROM scans WHERE machine_id = spans.machine_id"
+                    " AND id BETWEEN spans.first_scan AND spans.last_scan),"
+                    " last_scan = (SELECT MAX(id) FROM scans WHERE machine_id = spans.machine_id"
+                    " AND id BETWEEN spans.first_scan AND spans.last_scan)"
+                    " WHERE first_scan IN (SELECT id FROM doomed) OR last_scan IN (SELECT id FROM doomed)")
+                rows = self._conn.execute("DELETE FROM rows WHERE id NOT IN (SELECT row_id FROM spans)").rowcount
+                self._conn.execute("DROP TABLE doomed")
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            total_pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            if free_pages >= max(VACUUM_MIN_FREE_PAGES, total_pages * VACUUM_MIN_FREE_FRACTION):
+                self._conn.execute("VACUUM")
+                metrics.incr("history_vacuums")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        metrics.incr("history_scans_compacted", len(doomed))
+        return {"scans": len(doomed), "rows": rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
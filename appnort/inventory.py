@@ -0,0 +1,305 @@
+import sys
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+# Column layout. Low-cardinality fields are dictionary-encoded (one code per row
+# into a per-column vocabulary); free text is interned; numbers live in typed arrays.
+CATEGORICAL_FIELDS = ("publisher", "category", "security", "os", "source", "running", "install_date")
+TEXT_FIELDS = ("name", "version", "location")
+INT_FIELDS = ("size_kb", "processes")
+FLAG_FIELDS = ("system_component",)
+FIELD_ORDER = ("name", "version", "location", "publisher", "os", "size_kb", "install_date", "system_component",
+               "category", "security", "source", "running", "processes")
+
+# Absent values inside the typed columns
+_NO_INT = -(2 ** 63)
+_NO_FLAG = -1
+_ABSENT = object()
+
+
+class _Categorical:
+    # Code 0 means "field not set"; codes are 4 bytes, so a fleet can hold any number of publishers
+    __slots__ = ("values", "lookup", "codes")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.lookup: Dict[str, int] = {}
+        self.codes = array('I')
+
+    def encode(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+
+class ProgramRow(MutableMapping):
+    # Dict-compatible view of one Inventory row. Reads and writes go straight to
+    # the columns, so prog['category'] = ... in existing code updates the inventory.
+    __slots__ = ("inventory", "index")
+
+    def __init__(self, inventory: "Inventory", index: int):
+        self.inventory = inventory
+        self.index = index
+
+    def __getitem__(self, key):
+        value = self.inventory.value(self.index, key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        # Hot path in every exporter and view; avoids Mapping.get's try/except
+        return self.inventory.value(self.index, key, default)
+
+    def __contains__(self, key):
+        return self.inventory.value(self.index, key, _ABSENT) is not _ABSENT
+
+    def __setitem__(self, key, value):
+        self.inventory.set_value(self.index, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.inventory.delete_value(self.index, key)
+
+    def __iter__(self):
+        return iter(self.inventory.fields_of(self.index))
+
+    def __len__(self):
+        return len(self.inventory.fields_of(self.index))
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"ProgramRow({self.copy()!r})"
+
+
+class Inventory:
+    # Columnar program list. Iterating or indexing yields ProgramRow views, so
+    # code written for a list of dicts keeps working, while counts(), group_by()
+    # and filter() run over the encoded columns without touching per-row dicts.
+    # Values that do not fit a column's type, and fields outside the layout
+    # (executables, hashes, ...), are kept per row in a sparse side table.
+    def __init__(self, programs: Optional[Iterable[Mapping[str, Any]]] = None):
+        self._categorical = {field: _Categorical() for field in CATEGORICAL_FIELDS}
+        self._text: Dict[str, List[Optional[str]]] = {field: [] for field in TEXT_FIELDS}
+        self._ints = {field: array('q') for field in INT_FIELDS}
+        self._flags = {field: array('b') for field in FLAG_FIELDS}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._count = 0
+        if programs is not None:
+            self.extend(programs)
+
+    @classmethod
+    def from_programs(cls, programs: Iterable[Mapping[str, Any]]) -> "Inventory":
+        if isinstance(programs, Inventory):
+            return programs
+        return cls(programs)
+
+    # --- Rows ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ProgramRow(self, i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("inventory index out of range")
+        return ProgramRow(self, index)
+
+    def __iter__(self) -> Iterator[ProgramRow]:
+        for i in range(self._count):
+            yield ProgramRow(self, i)
+
+    def rows(self, indexes: Iterable[int]) -> List[ProgramRow]:
+        return [ProgramRow(self, i) for i in indexes]
+
+    def append(self, program: Mapping[str, Any]):
+        index = self._count
+        for column in self._categorical.values():
+            column.codes.append(0)
+        for column in self._text.values():
+            column.append(None)
+        for column in self._ints.values():
+            column.append(_NO_INT)
+        for column in self._flags.values():
+            column.append(_NO_FLAG)
+        self._count += 1
+        for key, value in program.items():
+            self.set_value(index, key, value)
+
+    def extend(self, programs: Iterable[Mapping[str, Any]]):
+        for program in programs:
+            self.append(program)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [dict(row.items()) for row in self]
+
+    # --- Cells ---
+
+    def value(self, index: int, field: str, default=None):
+        extra = self._extras.get(index)
+        if extra is not None and field in extra:
+            return extra[field]
+        column = self._categorical.get(field)
+        if column is not None:
+            code = column.codes[index]
+            return column.values[code] if code else default
+        text = self._text.get(field)
+        if text is not None:
+            value = text[index]
+            return default if value is None else value
+        ints = self._ints.get(field)
+        if ints is not None:
+            value = ints[index]
+            return default if value == _NO_INT else value
+        flags = self._flags.get(field)
+        if flags is not None:
+            value = flags[index]
+            return default if value == _NO_FLAG else bool(value)
+        return default
+
+    def set_value(self, index: int, field: str, value: Any):
+        stored = False
+        if field in self._categorical:
+            if isinstance(value, str):
+                self._categorical[field].codes[index] = self._categorical[field].encode(value)
+                stored = True
+            else:
+                self._categorical[field].codes[index] = 0
+        elif field in self._text:
+            if isinstance(value, str):
+                self._text[field][index] = sys.intern(value) if len(value) < 64 else value
+                stored = True
+            else:
+                self._text[field][index] = None
+        elif field in self._ints:
+            if isinstance(value, int) and not isinstance(value, bool) and _NO_INT < value < 2 ** 63:
+                self._ints[field][index] = value
+                stored = True
+            else:
+                self._ints[field][index] = _NO_INT
+        elif field in self._flags:
+            if isinstance(value, bool):
+                self._flags[field][index] = int(value)
+                stored = True
+            else:
+                self._flags[field][index] = _NO_FLAG
+
+        extra = self._extras.get(index)
+        if stored:
+            if extra is not None and field in extra:
+                del extra[field]
+                if not extra:
+                    del self._extras[index]
+        else:
+            if extra is None:
+                extra = self._extras[index] = {}
+            extra[field] = value
+
+    def delete_value(self, index: int, field: str):
+        extra = self._extras.get(index)
+        if extra is not None and field in extra:
+            del extra[field]
+            if not extra:
+                del self._extras[index]
+        if field in self._categorical:
+            self._categorical[field].codes[index] = 0
+        elif field in self._text:
+            self._text[field][index] = None
+        elif field in self._ints:
+            self._ints[field][index] = _NO_INT
+        elif field in self._flags:
+            self._flags[field][index] = _NO_FLAG
+
+    def fields_of(self, index: int) -> List[str]:
+        fields = [field for field in FIELD_ORDER if self.value(index, field, _ABSENT) is not _ABSENT]
+        extra = self._extras.get(index)
+        if extra:
+            fields.extend(field for field in extra if field not in fields)
+        return fields
+
+    # --- Column operations ---
+
+    def _overrides(self, field: str) -> Dict[int, Any]:
+        # Rows whose value for `field` lives in the side table
+        return {i: extra[field] for i, extra in self._extras.items() if field in extra}
+
+    def column(self, field: str, missing: Any = None) -> List[Any]:
+        if field in self._categorical:
+            column = self._categorical[field]
+            values = [missing if v is None else v for v in column.values]
+            result = [values[code] for code in column.codes]
+        elif field in self._text:
+            result = [missing if v is None else v for v in self._text[field]]
+        else:
+            result = [self.value(i, field, missing) for i in range(self._count)]
+            return result
+        for i, value in self._overrides(field).items():
+            result[i] = value
+        return result
+
+    def counts(self, field: str, missing: Any = "Unknown") -> Dict[Any, int]:
+        # Same grouping as Counter(p.get(field, missing) for p in programs)
+        column = self._categorical.get(field)
+        if column is None:
+            return dict(Counter(self.column(field, missing)))
+        tally = Counter(column.codes)
+        result: Dict[Any, int] = {}
+        for code, count in tally.items():
+            key = missing if code == 0 else column.values[code]
+            result[key] = result.get(key, 0) + count
+        for i, value in self._overrides(field).items():
+            # Overridden rows were tallied under the empty code
+            result[missing] -= 1
+            if not result[missing]:
+                del result[missing]
+            result[value] = result.get(value, 0) + 1
+        return result
+
+    def group_by(self, field: str, missing: Any = "Unknown") -> Dict[Any, List[int]]:
+        # Row indexes per value, in first-seen order of the values
+        column = self._categorical.get(field)
+        overrides = self._overrides(field)
+        if column is None or overrides:
+            groups: Dict[Any, List[int]] = {}
+            for i, value in enumerate(self.column(field, missing)):
+                groups.setdefault(value, []).append(i)
+            return groups
+        buckets: List[List[int]] = [[] for _ in column.values]
+        order: List[int] = []
+        for i, code in enumerate(column.codes):
+            bucket = buckets[code]
+            if not bucket:
+                order.append(code)
+            bucket.append(i)
+        groups = {}
+        for code in order:
+            key = missing if code == 0 else column.values[code]
+            if key in groups:
+                # Unset rows and rows holding the `missing` value itself share a group
+                groups[key] = sorted(groups[key] + buckets[code])
+            else:
+                groups[key] = buckets[code]
+        return groups
+
+    def filter(self, rows: Optional[Iterable[int]] = None, **criteria: Any) -> List[int]:
+        # Row indexes matching every field=value criterion, e.g. filter(security="High")
+        candidates = range(self._count) if rows is None else rows
+        for field, wanted in criteria.items():
+            column = self._categorical.get(field)
+            if column is not None and not self._overrides(field):
+                code = column.lookup.get(wanted, -1) if wanted is not None else 0
+                codes = column.codes
+                candidates = [i for i in candidates if codes[i] == code]
+            else:
+                candidates = [i for i in candidates if self.value(i, field) == wanted]
+        return list(candidates)
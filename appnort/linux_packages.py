@@ -0,0 +1,401 @@
+import configparser
+import json
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from xml.etree import ElementTree
+
+from appnort.metrics import metrics
+
+# Directories shared by many packages never identify a single install
+SHARED_PREFIXES = {
+    "/etc", "/usr/bin", "/usr/sbin", "/bin", "/sbin", "/usr/include", "/usr/share/doc", "/usr/share/man",
+    "/usr/share/info", "/usr/share/locale", "/usr/share/lintian", "/usr/share/icons", "/usr/share/applications",
+    "/usr/share/pixmaps", "/usr/share/bash-completion", "/usr/share/zsh", "/usr/share/perl5", "/usr/lib/python3",
+    "/usr/lib/systemd", "/usr/lib/udev", "/usr/lib64", "/usr/lib/debug", "/lib/systemd", "/var/lib", "/var/log",
+    "/usr/share/bug", "/usr/share/doc-base", "/usr/share/aclocal", "/usr/share/dbus-1", "/usr/share/polkit-1",
+    "/usr/share/mime", "/usr/share/metainfo", "/usr/share/gtk-doc", "/usr/lib/tmpfiles.d", "/usr/lib/sysctl.d",
+}
+_EMAIL = re.compile(r"\s*<[^>]*>")
+
+# RPM header tags and data types (rpmtag.h)
+RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH = 1000, 1001, 1002, 1003
+RPMTAG_INSTALLTIME, RPMTAG_SIZE, RPMTAG_VENDOR, RPMTAG_PACKAGER, RPMTAG_DIRNAMES = 1008, 1009, 1011, 1015, 1118
+RPM_INT32, RPM_STRING, RPM_STRING_ARRAY, RPM_I18NSTRING = 4, 6, 8, 9
+RPM_QUERY_FORMAT = "%{NAME}\t%{EPOCH}\t%{VERSION}-%{RELEASE}\t%{VENDOR}\t%{PACKAGER}\t%{SIZE}\t%{INSTALLTIME}\n"
+
+
+def _program(name: str, version: Optional[str], publisher: Optional[str], location: Optional[str],
+             size_kb: int, install_date: Optional[str], source: str) -> Dict[str, Any]:
+    # Same shape as Scanner._program_from_values, plus the package source
+    return {
+        "name": name,
+        "version": version or "Unknown",
+        "location": location or "Unknown",
+        "publisher": publisher or "Unknown",
+        "os": "Linux",
+        "size_kb": size_kb,
+        "install_date": install_date or "Unknown",
+        "system_component": False,
+        "source": source
+    }
+
+
+def _date(timestamp: Optional[float]) -> Optional[str]:
+    # YYYYMMDD, the registry's InstallDate format
+    if not timestamp:
+        return None
+    return time.strftime("%Y%m%d", time.localtime(timestamp))
+
+
+def location_from_paths(paths: Iterable[str]) -> Optional[str]:
+    # Package managers record files, not an install directory. The directory
+    # three levels deep holding most of the package's entries (/usr/lib/git-core,
+    # /opt/google/chrome) is the closest equivalent to InstallLocation.
+    counts: Dict[str, int] = {}
+    for path in paths:
+        parts = path.split("/", 4)
+        if len(parts) < 4 or not parts[3].strip():  # "", "usr", "lib", "<dir>"
+            continue
+        prefix = f"/{parts[1]}/{parts[2]}/{parts[3].rstrip()}"
+        counts[prefix] = counts.get(prefix, 0) + 1
+    candidates = [prefix for prefix in counts
+                  if prefix not in SHARED_PREFIXES and prefix[:prefix.rindex("/")] not in SHARED_PREFIXES
+                  and "-linux-gnu" not in prefix]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda prefix: (counts[prefix], -len(prefix)))
+
+
+class LinuxPackageScanner:
+    # Installed packages from dpkg, RPM, Flatpak and Snap. Every source is read
+    # on its own thread; a missing database simply contributes nothing. All
+    # paths are resolved under `root`, so a directory of fixture databases can
+    # stand in for a real host.
+    def __init__(self, root: str = "/"):
+        self.root = root
+        self.sources = {
+            "dpkg": self.scan_dpkg,
+            "rpm": self.scan_rpm,
+            "flatpak": self.scan_flatpak,
+            "snap": self.scan_snap,
+        }
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.root, *(p.lstrip("/") for p in parts))
+
+    def scan(self) -> List[Dict[str, Any]]:
+        def run(source):
+            try:
+                with metrics.timer("package_source", source=source):
+                    programs = self.sources[source]()
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"Error reading {source} packages: {e}")
+                metrics.incr("errors", source=source)
+                return []
+            metrics.incr("packages_read", len(programs), source=source)
+            return programs
+
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="appnort-pkg") as pool:
+            results = list(pool.map(run, self.sources))
+        return [program for programs in results for program in programs]
+
+    # --- dpkg ---
+
+    @staticmethod
+    def iter_dpkg_records(path: str) -> Iterator[Dict[str, str]]:
+        # Streams stanzas out of a memory-mapped status file. Only the single-line
+        # fields we use are decoded; Description and Conffiles bodies are skipped.
+        wanted = (b"Package", b"Status", b"Version", b"Maintainer", b"Installed-Size", b"Architecture")
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = 0
+                end = len(data)
+                while start < end:
+                    stop = data.find(b"\n\n", start)
+                    if stop == -1:
+                        stop = end
+                    record = {}
+                    for line in data[start:stop].split(b"\n"):
+                        if not line or line[0] in b" \t":
+                            continue
+                        key, _, value = line.partition(b":")
+                        if key in wanted:
+                            record[key.decode("ascii")] = value.strip().decode("utf-8", "replace")
+                    if record:
+                        yield record
+                    start = stop + 2
+
+    def _dpkg_files(self, package: str, arch: Optional[str]) -> Optional[str]:
+        # /var/lib/dpkg/info/<pkg>.list, or <pkg>:<arch>.list for multi-arch packages
+        info = self.path("var/lib/dpkg/info")
+        for name in (f"{package}.list", f"{package}:{arch}.list" if arch else None):
+            if name and os.path.exists(os.path.join(info, name)):
+                return os.path.join(info, name)
+        return None
+
+    def _dpkg_program(self, record: Dict[str, str]) -> Dict[str, Any]:
+        location = install_date = None
+        list_path = self._dpkg_files(record["Package"], record.get("Architecture"))
+        if list_path:
+            try:
+                with open(list_path, 'r', encoding='utf-8', errors='replace') as f:
+                    location = location_from_paths(f.read().splitlines())
+                install_date = _date(os.stat(list_path).st_mtime)
+            except OSError:
+                pass
+        size = record.get("Installed-Size", "")
+        program = _program(
+            record["Package"],
+            record.get("Version"),
+            _EMAIL.sub("", record.get("Maintainer", "")).strip(),
+            location,
+            int(size) if size.isdigit() else 0,
+            install_date,
+            "dpkg"
+        )
+        # Multi-arch installs (libc6:amd64 and libc6:i386) are separate packages
+        if record.get("Architecture"):
+            program["architecture"] = record["Architecture"]
+        return program
+
+    def scan_dpkg(self) -> List[Dict[str, Any]]:
+        status = self.path("var/lib/dpkg/status")
+        if not os.path.exists(status):
+            return []
+        # "install ok installed"; removed-but-configured packages are skipped
+        records = [r for r in self.iter_dpkg_records(status)
+                   if "Package" in r and r.get("Status", "").endswith(" installed")]
+        # Reading the small per-package file lists serially beats a thread pool here:
+        # the work is mostly parsing, and the files sit in the page cache after boot
+        return [self._dpkg_program(record) for record in records]
+
+    # --- RPM ---
+
+    @staticmethod
+    def parse_rpm_header(blob: bytes) -> Dict[int, Any]:
+        # Header blob as stored in rpmdb.sqlite: index count, data length,
+        # 16-byte index entries (tag, type, offset, count), then the data store.
+        # A damaged blob (short, or offsets past the data store) raises ValueError
+        if len(blob) < 8:
+            raise ValueError("RPM header too short")
+        il, dl = struct.unpack_from(">II", blob, 0)
+        store = 8 + il * 16
+        if store + dl > len(blob):
+            raise ValueError(f"RPM header truncated ({len(blob)} bytes, {store + dl} expected)")
+        end = store + dl
+        tags: Dict[int, Any] = {}
+        wanted = (RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH, RPMTAG_INSTALLTIME,
+                  RPMTAG_SIZE, RPMTAG_VENDOR, RPMTAG_PACKAGER, RPMTAG_DIRNAMES)
+        for i in range(il):
+            tag, kind, offset, count = struct.unpack_from(">iIiI", blob, 8 + i * 16)
+            if tag not in wanted or not 0 <= offset < dl or count == 0:
+                continue
+            position = store + offset
+            if kind == RPM_INT32:
+                if position + 4 > end:
+                    raise ValueError(f"RPM tag {tag} runs past the data store")
+                tags[tag] = struct.unpack_from(">I", blob, position)[0]
+            elif kind in (RPM_STRING, RPM_STRING_ARRAY, RPM_I18NSTRING):
+                values = []
+                for _ in range(1 if kind == RPM_STRING else count):
+                    stop = blob.find(b"\0", position, end)
+                    if stop == -1:
+                        raise ValueError(f"RPM tag {tag} has an unterminated string")
+                    values.append(blob[position:stop].decode("utf-8", "replace"))
+                    position = stop + 1
+                tags[tag] = values if kind == RPM_STRING_ARRAY else values[0]
+        return tags
+
+    def scan_rpm(self) -> List[Dict[str, Any]]:
+        database = self.path("var/lib/rpm/rpmdb.sqlite")
+        if os.path.exists(database):
+            return self._scan_rpm_sqlite(database)
+        # Older BerkeleyDB databases: only the rpm tool can read them
+        if self.root == "/" and os.path.exists("/var/lib/rpm/Packages"):
+            return self._scan_rpm_query()
+        return []
+
+    def _scan_rpm_sqlite(self, database: str) -> List[Dict[str, Any]]:
+        programs = []
+        conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            for hnum, blob in conn.execute("SELECT hnum, blob FROM Packages"):
+                try:
+                    tags = self.parse_rpm_header(bytes(blob))
+                except (ValueError, struct.error, IndexError) as e:
+                    # One damaged header costs that package, not the whole RPM source
+                    print(f"Skipping RPM header {hnum}: {e}")
+                    metrics.incr("errors", source="rpm_header")
+                    continue
+                if RPMTAG_NAME not in tags:
+                    continue
+                version = "-".join(v for v in (tags.get(RPMTAG_VERSION), tags.get(RPMTAG_RELEASE)) if v)
+                if tags.get(RPMTAG_EPOCH):
+                    version = f"{tags[RPMTAG_EPOCH]}:{version}"
+                programs.append(_program(
+                    tags[RPMTAG_NAME],
+                    version,
+                    tags.get(RPMTAG_VENDOR) or _EMAIL.sub("", tags.get(RPMTAG_PACKAGER, "")).strip(),
+                    location_from_paths(tags.get(RPMTAG_DIRNAMES, ())),
+                    tags.get(RPMTAG_SIZE, 0) // 1024,
+                    _date(tags.get(RPMTAG_INSTALLTIME)),
+                    "rpm"
+                ))
+        finally:
+            conn.close()
+        return programs
+
+    def _scan_rpm_query(self) -> List[Dict[str, Any]]:
+        try:
+            output = subprocess.run(["rpm", "-qa", "--queryformat", RPM_QUERY_FORMAT],
+                                    capture_output=True, text=True, timeout=60, check=True).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"rpm query failed: {e}")
+            return []
+        programs = []
+        for line in output.splitlines():
+            fields = [None if f == "(none)" else f for f in line.split("\t")]
+            if len(fields) != 7 or not fields[0]:
+                continue
+            name, epoch, version, vendor, packager, size, installed = fields
+            programs.append(_program(
+                name,
+                f"{epoch}:{version}" if epoch else version,
+                vendor or _EMAIL.sub("", packager or "").strip(),
+                None,
+                int(size) // 1024 if size and size.isdigit() else 0,
+                _date(int(installed)) if installed and installed.isdigit() else None,
+                "rpm"
+            ))
+        return programs
+
+    # --- Flatpak ---
+
+    def _flatpak_installations(self) -> List[str]:
+        installations = [self.path("var/lib/flatpak/app")]
+        if self.root == "/":
+            installations.append(os.path.expanduser("~/.local/share/flatpak/app"))
+        return [path for path in installations if os.path.isdir(path)]
+
+    @staticmethod
+    def _metainfo(files: str, app_id: str) -> Dict[str, str]:
+        # Display name, newest release and developer from the AppStream metainfo
+        for directory, suffix in (("share/metainfo", ".metainfo.xml"), ("share/appdata", ".appdata.xml")):
+            path = os.path.join(files, directory, app_id + suffix)
+            if not os.path.exists(path):
+                continue
+            try:
+                root = ElementTree.parse(path).getroot()
+            except ElementTree.ParseError:
+                return {}
+            info = {}
+            name = root.find("name")
+            if name is not None and name.text:
+                info["name"] = name.text.strip()
+            release = root.find("releases/release")
+            if release is not None and release.get("version"):
+                info["version"] = release.get("version")
+            developer = root.find("developer/name")
+            if developer is None:
+                developer = root.find("developer_name")
+            if developer is not None and developer.text:
+                info["publisher"] = developer.text.strip()
+            return info
+        return {}
+
+    def scan_flatpak(self) -> List[Dict[str, Any]]:
+        programs = []
+        for installation in self._flatpak_installations():
+            for app_id in sorted(os.listdir(installation)):
+                current = os.path.join(installation, app_id, "current", "active")
+                if not os.path.isdir(current):
+                    continue
+                deployed = os.path.realpath(current)
+                files = os.path.join(deployed, "files")
+                info = self._metainfo(files, app_id)
+                metadata = configparser.ConfigParser(interpolation=None)
+                metadata.read(os.path.join(deployed, "metadata"), encoding="utf-8")
+                publisher = info.get("publisher") or ".".join(app_id.split(".")[:2])
+                version = info.get("version") or metadata.get("Application", "runtime", fallback=None)
+                programs.append(_program(
+                    info.get("name") or app_id,
+                    version,
+                    publisher,
+                    files,
+                    0,
+                    _date(os.stat(deployed).st_mtime),
+                    "flatpak"
+                ))
+        return programs
+
+    # --- Snap ---
+
+    @staticmethod
+    def _snap_yaml(path: str) -> Dict[str, str]:
+        # Top-level scalar keys only; snap.yaml is flat where we read it
+        values = {}
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line or line[0] in " \t#-\n":
+                    continue
+                key, sep, value = line.partition(":")
+                if sep and value.strip():
+                    values[key.strip()] = value.strip().strip("'\"")
+        return values
+
+    def _snap_publishers(self) -> Dict[str, str]:
+        # snapd's state file records the store account each installed revision came
+        # from, either as a plain name or {"username": ..., "display-name": ...}
+        publishers: Dict[str, str] = {}
+        try:
+            with open(self.path("var/lib/snapd/state.json"), 'r', encoding='utf-8') as f:
+                snaps = json.load(f).get("data", {}).get("snaps", {})
+        except (OSError, ValueError, AttributeError):
+            return publishers
+        if not isinstance(snaps, dict):
+            return publishers
+        for name, state in snaps.items():
+            if not isinstance(state, dict):
+                continue
+            sequence = [side for side in state.get("sequence") or () if isinstance(side, dict)]
+            current = [side for side in sequence if side.get("revision") == state.get("current")]
+            for side in current + sequence[::-1]:
+                publisher = side.get("publisher")
+                if isinstance(publisher, dict):
+                    publisher = publisher.get("display-name") or publisher.get("username")
+                if isinstance(publisher, str) and publisher:
+                    publishers[name] = publisher
+                    break
+        return publishers
+
+    def scan_snap(self) -> List[Dict[str, Any]]:
+        snaps = self.path("snap")
+        if not os.path.isdir(snaps):
+            return []
+        publishers = self._snap_publishers()
+        programs = []
+        for name in sorted(os.listdir(snaps)):
+            current = os.path.join(snaps, name, "current")
+            meta = os.path.join(current, "meta", "snap.yaml")
+            if not os.path.exists(meta):
+                continue
+            values = self._snap_yaml(meta)
+            programs.append(_program(
+                values.get("title") or values.get("name") or name,
+                values.get("version"),
+                values.get("publisher") or publishers.get(values.get("name") or name),
+                os.path.realpath(current),
+                0,
+                _date(os.stat(meta).st_mtime),
+                "snap"
+            ))
+        return programs
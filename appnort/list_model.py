@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Optional
+
+from appnort.inventory import Inventory
+
+# Columns that can be sorted, with the program field each one reads
+SORT_COLUMNS = {
+    "name": "name",
+    "category": "category",
+    "risk": "security",
+    "publisher": "publisher",
+    "version": "version",
+    "running": "running",
+}
+RISK_ORDER = {"High": 0, "Medium": 1, "Low": 2}
+
+
+class ProgramListModel:
+    # Headless view model behind the program list. Sort orders and category /
+    # risk groupings are indexes built once per data change, so sorting and
+    # filtering never touch widgets and cost an index lookup plus one pass.
+    def __init__(self):
+        self.programs: List[Dict[str, Any]] = []
+        self.sort_column = "name"
+        self.sort_descending = False
+        self.query = ""
+        self.category: Optional[str] = None
+        self.risk: Optional[str] = None
+        self._invalidate()
+
+    def _invalidate(self):
+        self._search_text: List[str] = [self._searchable(p) for p in self.programs]
+        self._sort_index: Dict[str, List[int]] = {}
+        self._by_category: Optional[Dict[str, List[int]]] = None
+        self._by_risk: Optional[Dict[str, List[int]]] = None
+        self._last_query = ""
+        self._last_query_rows: Optional[List[int]] = None
+        self._visible: Optional[List[int]] = None
+
+    @staticmethod
+    def _searchable(program: Dict[str, Any]) -> str:
+        return f"{program.get('name', '')}\n{program.get('publisher', '')}".lower()
+
+    # --- Data ---
+
+    def set_programs(self, programs: List[Dict[str, Any]]):
+        # An Inventory is kept as-is so groupings can use its encoded columns
+        self.programs = programs if isinstance(programs, Inventory) else list(programs)
+        self._invalidate()
+
+    def append(self, program: Dict[str, Any]):
+        # Streaming updates: indexes are rebuilt lazily on the next read
+        self.programs.append(program)
+        self._search_text.append(self._searchable(program))
+        self._sort_index.clear()
+        self._by_category = self._by_risk = None
+        self._last_query_rows = None
+        self._visible = None
+
+    def refresh(self):
+        # Call after programs were mutated in place (e.g. AI results arrived)
+        self._invalidate()
+
+    # --- Indexes ---
+
+    def _sort_key(self, column: str):
+        field = SORT_COLUMNS[column]
+        if column == "risk":
+            return lambda i: (RISK_ORDER.get(self.programs[i].get(field), 3), self._search_text[i])
+        return lambda i: (str(self.programs[i].get(field, "")).lower(), i)
+
+    def sort_index(self, column: str) -> List[int]:
+        index = self._sort_index.get(column)
+        if index is None:
+            index = sorted(range(len(self.programs)), key=self._sort_key(column))
+            self._sort_index[column] = index
+        return index
+
+    def _group(self, field: str) -> Dict[str, List[int]]:
+        if isinstance(self.programs, Inventory):
+            return self.programs.group_by(field)
+        groups: Dict[str, List[int]] = {}
+        for i, program in enumerate(self.programs):
+            groups.setdefault(program.get(field, "Unknown"), []).append(i)
+        return groups
+
+    def categories(self) -> List[str]:
+        if self._by_category is None:
+            self._by_category = self._group("category")
+        return sorted(self._by_category)
+
+    def counts(self, field: str = "category") -> Dict[str, int]:
+        if isinstance(self.programs, Inventory):
+            return self.programs.counts(field)
+        return {value: len(rows) for value, rows in self._group(field).items()}
+
+    # --- View state ---
+
+    def sort_by(self, column: str, descending: Optional[bool] = None):
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: {column}")
+        if descending is None:
+            # Clicking the active column again flips the direction
+            descending = not self.sort_descending if column == self.sort_column else False
+        self.sort_column = column
+        self.sort_descending = descending
+        self._visible = None
+
+    def set_filter(self, query: Optional[str] = None, category: Optional[str] = None, risk: Optional[str] = None):
+        self.query = (query or "").strip().lower()
+        self.category = category or None
+        self.risk = risk or None
+        self._visible = None
+
+    def _query_rows(self) -> Optional[List[int]]:
+        if not self.query:
+            return None
+        # Typing extends the query: narrow the previous matches instead of rescanning everything
+        if self._last_query_rows is not None and self._last_query and self.query.startswith(self._last_query):
+            candidates = self._last_query_rows
+        else:
+            candidates = range(len(self.programs))
+        rows = [i for i in candidates if self.query in self._search_text[i]]
+        self._last_query, self._last_query_rows = self.query, rows
+        return rows
+
+    def visible_rows(self) -> List[int]:
+        if self._visible is not None:
+            return self._visible
+
+        allowed = None
+        if self.category:
+            if self._by_category is None:
+                self._by_category = self._group("category")
+            allowed = set(self._by_category.get(self.category, []))
+        if self.risk:
+            if self._by_risk is None:
+                self._by_risk = self._group("security")
+            risk_rows = set(self._by_risk.get(self.risk, []))
+            allowed = risk_rows if allowed is None else allowed & risk_rows
+        query_rows = self._query_rows()
+        if query_rows is not None:
+            allowed = set(query_rows) if allowed is None else allowed & set(query_rows)
+
+        order = self.sort_index(self.sort_column)
+        if self.sort_descending:
+            order = order[::-1]
+        self._visible = order if allowed is None else [i for i in order if i in allowed]
+        return self._visible
+
+    def __len__(self) -> int:
+        return len(self.visible_rows())
+
+    def window(self, start: int, count: int) -> List[Dict[str, Any]]:
+        rows = self.visible_rows()
+        start = max(start, 0)
+        return [self.programs[i] for i in rows[start:start + count]]
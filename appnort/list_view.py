@@ -0,0 +1,118 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Dict, List
+
+import customtkinter as ctk
+
+from appnort.list_model import ProgramListModel
+
+# (column id, heading, width, program field)
+COLUMNS = [
+    ("name", "Name", 280, "name"),
+    ("category", "Category", 120, "category"),
+    ("risk", "Risk", 80, "security"),
+    ("version", "Version", 110, "version"),
+    ("publisher", "Publisher", 200, "publisher"),
+    ("running", "Running", 70, "running"),
+]
+ROW_HEIGHT = 22
+
+
+class VirtualProgramList(ctk.CTkFrame):
+    # Virtualized list: the Treeview only ever holds the rows that fit on
+    # screen. Scrolling moves a window over ProgramListModel.visible_rows()
+    # and re-fills those few items instead of creating a widget per program.
+    def __init__(self, master, model: ProgramListModel, **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.offset = 0
+        self.page_size = 20
+
+        style = ttk.Style(self)
+        style.configure("Appnort.Treeview", rowheight=ROW_HEIGHT)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in COLUMNS], show="headings",
+                                 selectmode="browse", style="Appnort.Treeview")
+        for col_id, heading, width, _ in COLUMNS:
+            self.tree.heading(col_id, text=heading, command=lambda c=col_id: self.sort_by(c))
+            self.tree.column(col_id, width=width, anchor="w", stretch=col_id in ("name", "publisher"))
+        self.tree.tag_configure("High", foreground="red")
+        self.tree.tag_configure("Medium", foreground="orange")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+        self._items: List[str] = []
+
+    # --- Rendering ---
+
+    def render(self):
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, max(total - self.page_size, 0)))
+        rows = self.model.window(self.offset, self.page_size)
+
+        # Reuse the existing items; only their values change while scrolling
+        while len(self._items) < len(rows):
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > len(rows):
+            self.tree.delete(self._items.pop())
+        for item, program in zip(self._items, rows):
+            self.tree.item(item, values=self._values(program), tags=(program.get("security", "Unknown"),))
+
+        if total:
+            self.scrollbar.set(self.offset / total, min((self.offset + self.page_size) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    @staticmethod
+    def _values(program: Dict[str, Any]):
+        return [program.get(field, "Unknown") for _, _, _, field in COLUMNS]
+
+    def sort_by(self, column: str):
+        self.model.sort_by(column)
+        for col_id, heading, _, _ in COLUMNS:
+            marker = ""
+            if col_id == self.model.sort_column:
+                marker = " ▼" if self.model.sort_descending else " ▲"
+            self.tree.heading(col_id, text=heading + marker)
+        self.offset = 0
+        self.render()
+
+    def apply_filter(self, query: str = "", category: str = None, risk: str = None):
+        self.model.set_filter(query, category, risk)
+        self.offset = 0
+        self.render()
+
+    # --- Scrolling ---
+
+    def scroll_to(self, offset: int):
+        self.offset = offset
+        self.render()
+
+    def _on_scrollbar(self, action, *args):
+        total = len(self.model)
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(args[0]) * total))
+        elif action == tk.SCROLL:
+            amount, unit = int(float(args[0])), args[1] if len(args) > 1 else tk.UNITS
+            step = self.page_size if unit == tk.PAGES else 1
+            self.scroll_to(self.offset + amount * step)
+
+    def _on_mousewheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
+
+    def _on_resize(self, event):
+        # Header row takes one row height
+        page_size = max(1, event.height // ROW_HEIGHT - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.tree.configure(height=page_size)
+            self.render()
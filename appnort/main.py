@@ -1,12 +1,25 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox, filedialog
+import os
 import threading
-import webbrowser
+import time
 from appnort.scanner import Scanner
 from appnort.categorizer import Categorizer
-from appnort.pdf_generator import PDFGenerator
+from appnort.pipeline import ScanPipeline
+from appnort.planner import ScanPlanner
+from appnort.snapshot import ScanSnapshot
+from appnort.inventory import Inventory
+from appnort.list_model import ProgramListModel
+from appnort.list_view import VirtualProgramList
 from appnort.config import ConfigManager
+from appnort.exporters import EXPORTERS, available_formats, exporter_for_path
+from appnort.metrics import metrics, profiled
+from appnort.events import (EventBus, CancelToken, ScanCancelled, ProgressEvent, StatusEvent,
+                            ProgramResolvedEvent, ErrorEvent, TaskDoneEvent, TaskCancelledEvent)
+
+# How often the UI thread drains worker events (~30 fps)
+EVENT_POLL_MS = 33
 
 class AppnortApp(ctk.CTk):
     def __init__(self):
@@ -14,9 +27,30 @@ class AppnortApp(ctk.CTk):
 
         self.config = ConfigManager()
         self.scanner = Scanner()
-        self.categorizer = Categorizer(self.config.get("groq_api_key"), self.config.get("groq_model", "llama-3.3-70b-versatile"))
-        self.pdf_generator = PDFGenerator()
+        self.categorizer = Categorizer(
+            self.config.get("groq_api_key"),
+            self.config.get("groq_model", "llama-3.3-70b-versatile"),
+            cache_ttl_days=self.config.get("cache_ttl_days"),
+            cache_max_entries=self.config.get("cache_max_entries")
+        )
+        self.categorizer.risk_confidence_threshold = self.config.get("risk_confidence_threshold", 0.8)
+        self.categorizer.cascade = self.config.get("ai_cascade", False)
+        self.categorizer.fast_model = self.config.get("cascade_fast_model", "llama-3.1-8b-instant")
+        self.categorizer.cascade_threshold = self.config.get("cascade_threshold", 0.7)
+        self.planner = ScanPlanner(
+            self.categorizer,
+            token_budget=self.config.get("ai_token_budget"),
+            max_workers=self.config.get("ai_max_workers", 4)
+        )
+        self.pipeline = ScanPipeline(self.scanner, self.planner)
         self.programs = []
+        self.unmanaged_processes = []  # Running executables outside every install location
+        self.history_changes = None  # Diff against the previous recorded scan
+        metrics.enabled = bool(self.config.get("metrics_enabled", False))
+
+        # Worker threads publish here; only _poll_events touches widgets
+        self.events = EventBus()
+        self.cancel_token = None
 
         # Theme setup
         ctk.set_appearance_mode(self.config.get("theme", "System"))
@@ -26,6 +60,7 @@ class AppnortApp(ctk.CTk):
         self.geometry("900x600")
 
         self._create_widgets()
+        self.after(EVENT_POLL_MS, self._poll_events)
 
     def _create_widgets(self):
         # Header
@@ -38,9 +73,13 @@ class AppnortApp(ctk.CTk):
         self.scan_button = ctk.CTkButton(self.header_frame, text="Scan Programs", command=self.start_scan)
         self.scan_button.pack(side="right", padx=10)
 
-        self.export_button = ctk.CTkButton(self.header_frame, text="Export PDF", command=self.export_pdf, state="disabled")
+        self.export_button = ctk.CTkButton(self.header_frame, text="Export Report", command=self.export_report, state="disabled")
         self.export_button.pack(side="right", padx=10)
 
+        self.cancel_button = ctk.CTkButton(self.header_frame, text="Cancel", command=self.cancel_task,
+                                           state="disabled", fg_color="gray")
+        self.cancel_button.pack(side="right", padx=10)
+
         # Content Area
         self.content_frame = ctk.CTkFrame(self)
         self.content_frame.pack(fill="both", expand=True, padx=20, pady=10)
@@ -52,10 +91,32 @@ class AppnortApp(ctk.CTk):
         self.list_tab = self.tabview.add("Programs")
         self.settings_tab = self.tabview.add("Settings")
 
-        # Program List (using Text widget for simplicity for now, ideally Treeview)
-        # Using a ScrollableFrame for a list of items
-        self.program_list_frame = ctk.CTkScrollableFrame(self.list_tab)
-        self.program_list_frame.pack(fill="both", expand=True)
+        # Search / filter bar
+        self.filter_frame = ctk.CTkFrame(self.list_tab, fg_color="transparent")
+        self.filter_frame.pack(fill="x", pady=(0, 5))
+
+        self.search_var = ctk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self._apply_list_filter())
+        self.search_entry = ctk.CTkEntry(self.filter_frame, textvariable=self.search_var,
+                                         placeholder_text="Search name or publisher...", width=250)
+        self.search_entry.pack(side="left", padx=5)
+
+        self.category_filter_var = ctk.StringVar(value="All Categories")
+        self.category_filter = ctk.CTkComboBox(self.filter_frame, values=["All Categories"],
+                                               variable=self.category_filter_var,
+                                               command=lambda _: self._apply_list_filter())
+        self.category_filter.pack(side="left", padx=5)
+
+        self.risk_filter_var = ctk.StringVar(value="All Risks")
+        self.risk_filter = ctk.CTkComboBox(self.filter_frame, values=["All Risks", "High", "Medium", "Low", "Unknown"],
+                                           variable=self.risk_filter_var, width=110,
+                                           command=lambda _: self._apply_list_filter())
+        self.risk_filter.pack(side="left", padx=5)
+
+        # Program List: virtualized Treeview over a headless, indexed view model
+        self.list_model = ProgramListModel()
+        self.program_list = VirtualProgramList(self.list_tab, self.list_model)
+        self.program_list.pack(fill="both", expand=True)
         
         self.status_label = ctk.CTkLabel(self.list_tab, text="Ready to scan.")
         self.status_label.pack(side="bottom", pady=5)
@@ -83,7 +144,7 @@ class AppnortApp(ctk.CTk):
         # Link to get key
         self.link_label = ctk.CTkLabel(self.settings_tab, text="Get API Key (Groq Console)", text_color=("blue", "light blue"), cursor="hand2")
         self.link_label.pack(pady=2)
-        self.link_label.bind("<Button-1>", lambda e: webbrowser.open("https://console.groq.com/keys"))
+        self.link_label.bind("<Button-1>", lambda e: self._open_url("https://console.groq.com/keys"))
 
         self.api_key_entry = ctk.CTkEntry(self.settings_tab, width=300, show="*")
         self.api_key_entry.insert(0, self.config.get("groq_api_key", ""))
@@ -102,6 +163,14 @@ class AppnortApp(ctk.CTk):
         )
         self.model_combobox.pack(pady=5)
 
+        self.cascade_var = ctk.BooleanVar(value=self.config.get("ai_cascade", False))
+        self.cascade_checkbox = ctk.CTkCheckBox(
+            self.settings_tab,
+            text=f"Try {self.categorizer.fast_model} first (escalate unsure results)",
+            variable=self.cascade_var
+        )
+        self.cascade_checkbox.pack(pady=5)
+
         self.remember_key_var = ctk.BooleanVar(value=True)
         self.remember_key_checkbox = ctk.CTkCheckBox(self.settings_tab, text="Remember Key", variable=self.remember_key_var)
         self.remember_key_checkbox.pack(pady=5)
@@ -144,8 +213,10 @@ class AppnortApp(ctk.CTk):
         # Update current runtime categorizer
         self.categorizer.groq_api_key = key
         self.categorizer.model = model
+        self.categorizer.cascade = self.cascade_var.get()
         
         self.config.set("groq_model", model)
+        self.config.set("ai_cascade", self.categorizer.cascade)
 
         if self.remember_key_var.get():
             self.config.set("groq_api_key", key)
@@ -155,104 +226,226 @@ class AppnortApp(ctk.CTk):
             self.config.set("groq_api_key", "")
             messagebox.showinfo("Settings", "Settings applied for this session (Key not saved).")
 
+    def _set_busy(self, busy: bool):
+        self.scan_button.configure(state="disabled" if busy else "normal")
+        self.export_button.configure(state="disabled" if busy or not self.programs else "normal")
+        self.cancel_button.configure(state="normal" if busy else "disabled")
+
+    def cancel_task(self):
+        if self.cancel_token:
+            self.cancel_token.cancel()
+            self.status_label.configure(text="Cancelling...")
+
     def start_scan(self):
-        self.scan_button.configure(state="disabled")
+        self.cancel_token = CancelToken()
+        self._set_busy(True)
         self.status_label.configure(text="Scanning...")
-        threading.Thread(target=self._scan_process, daemon=True).start()
+        # Programs stream into the list as they are classified
+        self.list_model.set_programs([])
+        self.program_list.render()
+        threading.Thread(target=self._scan_process, args=(self.cancel_token,), daemon=True).start()
+
+    def _scan_process(self, cancel: CancelToken):
+        def progress(stage, done, total):
+            self.events.publish(ProgressEvent(stage, done, total))
+
+        def on_resolved(program):
+            self.events.publish(ProgramResolvedEvent(program))
+
+        run_name = time.strftime("scan-%Y%m%d-%H%M%S")
+        metrics_dir = self.config.get("metrics_dir", "metrics")
+        profile_path = None
+        if self.config.get("profile_scan", False):
+            profile_path = os.path.join(metrics_dir, f"{run_name}.prof")
+        metrics.reset()
+        # Rule packs added or edited in ./rules since the last scan
+        self.categorizer.reload_rules()
+
+        # Registry reading, rule/cache lookup and AI batching overlap. Only subkeys changed
+        # since the last scan are re-read, and unchanged programs keep their classification.
+        try:
+            with profiled(profile_path):
+                programs = self.pipeline.run(
+                    previous=self.programs,
+                    snapshot=ScanSnapshot().load(),
+                    progress=progress,
+                    on_resolved=on_resolved,
+                    cancel=cancel
+                )
+                if self.config.get("hash_executables", False):
+                    self._hash_executables(programs, progress, cancel)
+                if self.config.get("correlate_processes", False):
+                    self._correlate_processes(programs)
+                if self.config.get("history_enabled", False):
+                    self._record_history(programs)
+        except ScanCancelled:
+            self.events.publish(TaskCancelledEvent("scan"))
+        except Exception as e:
+            print(f"Scan Error: {e}")
+            metrics.incr("errors", source="scan")
+            self.events.publish(ErrorEvent(f"Scan failed: {e}"))
+        else:
+            self.events.publish(TaskDoneEvent("scan", programs))
+        finally:
+            metrics.write(metrics_dir, run_name)
 
-    def _scan_process(self):
-        raw_programs = self.scanner.scan_installed_programs()
-        self.programs = []
-        
-        total = len(raw_programs)
-        # 1. Rule-based pass on all
-        unknowns = []
-        for i, prog in enumerate(raw_programs):
-            if i % 10 == 0:
-                self.status_label.configure(text=f"Rule Check: {i+1}/{total}...")
-            
-            # This now returns dict {"category": ..., "security": ...}
-            # Only use rule-based first (or cache)
-            res = self.categorizer.categorize(prog['name'])
-            prog['category'] = res.get('category', 'Unknown')
-            prog['security'] = res.get('security', 'Unknown')
-            
-            # Add to batch if Category is Unknown OR if we want Security stats and don't have them
-            if self.categorizer.groq_api_key:
-                if prog['category'] == 'Unknown' or prog['security'] == 'Unknown':
-                    unknowns.append(prog)
-            
-            self.programs.append(prog)
-        
-        # 2. Batch AI pass for unknowns (and security checks)
-        if unknowns:
-            # We might have a lot of programs now, so batch status updates are important
-            batch_size = 20
-            total_unknowns = len(unknowns)
-            
-            for i in range(0, total_unknowns, batch_size):
-                batch = unknowns[i:i+batch_size]
-                names = [p['name'] for p in batch]
-                
-                self.status_label.configure(text=f"AI Analyzing: {i+1}/{total_unknowns} programs...")
-                
-                # Call batch API
-                results = self.categorizer.batch_categorize(names)
-                
-                # Apply results back to program objects
-                for prog in batch:
-                    if prog['name'] in results:
-                        data = results[prog['name']]
-                        prog['category'] = data.get('category', 'Unknown')
-                        prog['security'] = data.get('security', 'Unknown')
-                    # We also need to update cache in memory if needed, 
-                    # but batch_categorize already does that.
-                    
-                    # Also need to update the object in self.programs? 
-                    # self.programs contains references to the same dicts, so yes.
-
-        self.after(0, self._scan_complete)
+    def _hash_executables(self, programs, progress, cancel: CancelToken):
+        # Optional enrichment; unchanged files come from the digest cache
+        from appnort.hashing import ExecutableHasher, HashCache
+        budget_mb = self.config.get("hash_io_budget_mb", 2048)
+        cache = HashCache()
+        try:
+            ExecutableHasher(
+                cache,
+                max_file_size=self.config.get("hash_max_file_mb", 256) * 1024 * 1024,
+                io_budget=budget_mb * 1024 * 1024 if budget_mb else None
+            ).enrich(programs, progress, cancel)
+        finally:
+            cache.close()
+
+    def _correlate_processes(self, programs):
+        # One process snapshot, matched against install locations (and hashed executables)
+        from appnort.processes import correlate_running
+        try:
+            result, _ = correlate_running(programs)
+        except Exception as e:
+            print(f"Process correlation failed: {e}")
+            return
+        self.unmanaged_processes = result["unmanaged"]
+
+    def _record_history(self, programs):
+        # Keeps the scan for later diffs; a history failure never fails the scan
+        from appnort.history import ScanHistory
+        self.history_changes = None
+        try:
+            history = ScanHistory()
+            try:
+                scan_id = history.record(programs)
+                previous = history.latest(before=scan_id)
+                self.history_changes = history.diff(previous, scan_id) if previous is not None else None
+                history.compact(self.config.get("history_keep_scans"), self.config.get("history_max_age_days"))
+            finally:
+                history.close()
+        except Exception as e:
+            print(f"Scan history failed: {e}")
+
+    def _poll_events(self):
+        # Runs on the Tk thread. Events are coalesced per frame, so a burst of
+        # progress updates costs one label change and one list render.
+        list_changed = False
+        for event in self.events.drain():
+            if isinstance(event, ProgressEvent):
+                self.status_label.configure(text=self._progress_text(event))
+            elif isinstance(event, StatusEvent):
+                self.status_label.configure(text=event.message)
+            elif isinstance(event, ProgramResolvedEvent):
+                self.list_model.append(event.program)
+                list_changed = True
+            elif isinstance(event, TaskDoneEvent):
+                if event.task == "scan":
+                    self.programs = Inventory.from_programs(event.result)
+                    self._scan_complete()
+                    list_changed = False
+                else:
+                    self._export_complete(event.result)
+            elif isinstance(event, TaskCancelledEvent):
+                self._task_cancelled(event.task)
+                list_changed = False
+            elif isinstance(event, ErrorEvent):
+                self._set_busy(False)
+                self.status_label.configure(text=event.message)
+                messagebox.showerror("Error", event.message)
+        if list_changed:
+            self.program_list.render()
+        self.after(EVENT_POLL_MS, self._poll_events)
+
+    @staticmethod
+    def _progress_text(event: ProgressEvent) -> str:
+        if event.stage == "scan":
+            return f"Scanning: {event.done} programs read..."
+        if event.stage == "hash":
+            return f"Hashing executables: {event.done}/{event.total} files..."
+        if event.stage in ("pdf", "export"):
+            return f"Exporting: {event.done}/{event.total} rows..."
+        return f"AI Analyzing: {event.done}/{event.total} programs..."
 
     def _scan_complete(self):
-        self.status_label.configure(text=f"Scan complete. Found {len(self.programs)} programs.")
-        self.scan_button.configure(state="normal")
-        self.export_button.configure(state="normal")
+        status = f"Scan complete. Found {len(self.programs)} programs."
+        if self.planner.unresolved:
+            status += f" {len(self.planner.unresolved)} could not be classified by AI."
+        running = self.programs.counts('running').get("Yes", 0)
+        if running or self.unmanaged_processes:
+            status += f" {running} running, {len(self.unmanaged_processes)} unmanaged processes."
+        if self.history_changes:
+            changes = self.history_changes
+            status += (f" Since last scan: {len(changes['added'])} added, {len(changes['removed'])} removed,"
+                       f" {len(changes['changed'])} changed.")
+        self.status_label.configure(text=status)
+        self._set_busy(False)
         self._update_program_list()
 
+    def _task_cancelled(self, task: str):
+        self._set_busy(False)
+        if task == "scan":
+            # Keep showing the results of the last completed scan
+            self._update_program_list()
+            self.status_label.configure(text="Scan cancelled.")
+        else:
+            self.status_label.configure(text="Export cancelled.")
+
+    @staticmethod
+    def _open_url(url: str):
+        import webbrowser
+        webbrowser.open(url)
+
     def change_appearance_mode(self, new_appearance_mode: str):
         ctk.set_appearance_mode(new_appearance_mode)
         self.config.set("theme", new_appearance_mode)
 
     def _update_program_list(self):
-        # Clear existing
-        for widget in self.program_list_frame.winfo_children():
-            widget.destroy()
-
-        # Add header
-        header = ctk.CTkFrame(self.program_list_frame)
-        header.pack(fill="x", pady=2)
-        ctk.CTkLabel(header, text="Name", width=200, anchor="w", font=("Arial", 12, "bold")).pack(side="left", padx=5)
-        ctk.CTkLabel(header, text="Category", width=100, anchor="w", font=("Arial", 12, "bold")).pack(side="left", padx=5)
-        ctk.CTkLabel(header, text="Version", width=100, anchor="w", font=("Arial", 12, "bold")).pack(side="left", padx=5)
-
-        # Add items
-        for prog in self.programs:
-            row = ctk.CTkFrame(self.program_list_frame)
-            row.pack(fill="x", pady=2)
-            
-            ctk.CTkLabel(row, text=prog['name'][:30], width=200, anchor="w").pack(side="left", padx=5)
-            
-            # Color code category?
-            cat_label = ctk.CTkLabel(row, text=prog['category'], width=100, anchor="w")
-            cat_label.pack(side="left", padx=5)
-            
-            ctk.CTkLabel(row, text=prog['version'][:15], width=100, anchor="w").pack(side="left", padx=5)
-
-    def export_pdf(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf")])
+        self.list_model.set_programs(self.programs)
+        self.category_filter.configure(values=["All Categories"] + self.list_model.categories())
+        self._apply_list_filter()
+
+    def _apply_list_filter(self):
+        category = self.category_filter_var.get()
+        risk = self.risk_filter_var.get()
+        self.program_list.apply_filter(
+            self.search_var.get(),
+            None if category == "All Categories" else category,
+            None if risk == "All Risks" else risk
+        )
+
+    def export_report(self):
+        # The format follows the file type picked in the dialog (PDF by default)
+        filetypes = [(EXPORTERS[fmt].label, f"*{EXPORTERS[fmt].extension}") for fmt in available_formats()]
+        file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=filetypes)
         if file_path:
-            self.pdf_generator.generate_report(self.programs, file_path)
-            messagebox.showinfo("Export", f"PDF exported to {file_path}")
+            exporter = exporter_for_path(file_path)
+            self.cancel_token = CancelToken()
+            self._set_busy(True)
+            self.status_label.configure(text=f"Exporting {exporter.label}...")
+            threading.Thread(target=self._export_process,
+                             args=(exporter, self.programs, file_path, self.cancel_token), daemon=True).start()
+
+    def _export_process(self, exporter, programs, file_path: str, cancel: CancelToken):
+        def progress(stage, done, total):
+            self.events.publish(ProgressEvent(stage, done, total))
+
+        try:
+            exporter.export(programs, file_path, progress=progress, cancel=cancel, events=self.events)
+        except ScanCancelled:
+            self.events.publish(TaskCancelledEvent("export"))
+        except Exception as e:
+            print(f"Export Error: {e}")
+            self.events.publish(ErrorEvent(f"{exporter.label} export failed: {e}"))
+        else:
+            self.events.publish(TaskDoneEvent("export", file_path))
+
+    def _export_complete(self, file_path: str):
+        self._set_busy(False)
+        self.status_label.configure(text=f"Exported to {file_path}")
+        messagebox.showinfo("Export", f"Exported to {file_path}")
 
 if __name__ == "__main__":
     app = AppnortApp()
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+# Metric identity: (name, sorted label pairs)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class _NullTimer:
+    # Shared no-op context manager handed out while metrics are disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", key: MetricKey):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._observe(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    # Process-wide counters and timers. Every call returns immediately while
+    # disabled, so instrumentation can stay in hot paths.
+    #
+    #   with metrics.timer("ai_request"): ...
+    #   metrics.incr("ai_status", status=200)
+    #   metrics.incr("ai_bytes_sent", len(body))
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[MetricKey, float] = {}
+            # key -> [count, total, min, max] in seconds
+            self.timers: Dict[MetricKey, list] = {}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def incr(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self._observe(self._key(name, labels), seconds)
+
+    def _observe(self, key: MetricKey, seconds: float):
+        with self._lock:
+            stat = self.timers.get(key)
+            if stat is None:
+                self.timers[key] = [1, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = min(stat[2], seconds)
+                stat[3] = max(stat[3], seconds)
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, self._key(name, labels))
+
+    # --- Output ---
+
+    @staticmethod
+    def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+        return ",".join(f"{k}={v}" for k, v in labels)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, {})[self._label_text(labels)] = value
+            timers = {}
+            for (name, labels), (count, total, low, high) in sorted(self.timers.items()):
+                timers.setdefault(name, {})[self._label_text(labels)] = {
+                    "count": count,
+                    "total_s": round(total, 6),
+                    "mean_s": round(total / count, 6),
+                    "min_s": round(low, 6),
+                    "max_s": round(high, 6),
+                }
+        # Flatten metrics recorded without labels: {"cache_hits": 12} instead of {"cache_hits": {"": 12}}
+        for group in (counters, timers):
+            for name, values in group.items():
+                if list(values) == [""]:
+                    group[name] = values[""]
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duration_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "timers": timers,
+        }
+
+    def prometheus_text(self, prefix: str = "appnort") -> str:
+        def labels_text(labels):
+            if not labels:
+                return ""
+            escaped = ",".join(
+                '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for k, v in labels)
+            return "{" + escaped + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timers = sorted((key, list(stat)) for key, stat in self.timers.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{labels_text(labels)} {_number(value)}")
+        # Each family must be contiguous: all summaries first, then the max gauges
+        for (name, labels), (count, total, _, _) in timers:
+            metric = f"{prefix}_{name}_seconds"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_count{labels_text(labels)} {count}")
+            lines.append(f"{metric}_sum{labels_text(labels)} {total:.6f}")
+        for (name, labels), (_, _, _, high) in timers:
+            metric = f"{prefix}_{name}_seconds_max"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{labels_text(labels)} {high:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, name: str = "run") -> Optional[Dict[str, str]]:
+        # Writes <name>.json (run summary) and <name>.prom (Prometheus text format)
+        if not self.enabled:
+            return None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            json_path = os.path.join(directory, f"{name}.json")
+            prom_path = os.path.join(directory, f"{name}.prom")
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, indent=2)
+            with open(prom_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            return {"json": json_path, "prometheus": prom_path}
+        except OSError as e:
+            print(f"Failed to write metrics: {e}")
+            return None
+
+
+def _number(value: float) -> str:
+    # Exact integers for counters (":g" would print 12345678 as 1.23457e+07)
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Shared instance used by all instrumented modules
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(output_path: Optional[str]):
+    # Optional cProfile hook around a single scan; a no-op without a path.
+    # Only the calling thread is profiled.
+    if not output_path:
+        yield
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            profiler.dump_stats(output_path)
+            print(f"Profile written to {output_path}")
+        except OSError as e:
+            print(f"Failed to write profile: {e}")
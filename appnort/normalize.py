@@ -0,0 +1,84 @@
+import re
+from functools import lru_cache
+
+# Canonical product keys: "Audacity 3.7.6" and "Audacity 3.7.7" are the same product,
+# as are "7-Zip 23.01 (x64)" and "7-Zip 24.07 (x64)". Classification is cached per
+# product, so upgrades do not cost another AI call.
+
+_ARCH = r"x64|x86|x86_64|amd64|arm64|aarch64|ia32|win32|win64|(?:32|64)[ -]?bits?"
+_NOISE_WORDS = (
+    r"edition|version|build|release|beta|alpha|preview|insiders?|trial|portable|"
+    r"setup|installer|remove only|only remove|machine[- ]wide|per[- ]user|"
+    r"english|deutsch|français|francais|español|espanol|multilingual|mui|lts"
+)
+# "Update" and "User" are real words in product names ("Microsoft Edge Update",
+# "User Profile Manager"). They are noise only as suffixes: "Update 381" after a
+# version (see _UPDATE_TAG) and an install-scope "(User)" annotation.
+_BRACKET_NOISE = re.compile(r"(?<![a-z0-9])(?:user|current user|all users)(?![a-z0-9])")
+
+_TRADEMARK = re.compile(r"\((?:tm|r|c)\)|[™®©]")
+_BRACKETED = re.compile(r"[\(\[\{]([^\)\]\}]*)[\)\]\}]")
+_ARCH_TAG = re.compile(r"(?<![a-z0-9])(?:" + _ARCH + r")(?![a-z0-9])")
+_LOCALE_TAG = re.compile(r"(?<![a-z0-9-])[a-z]{2}[-_][a-z]{2}(?![a-z0-9-])")
+_UPDATE_TAG = re.compile(r"(?<![a-z0-9])(?:update|build|rev|revision|kb)\s*\d+[a-z0-9.]*")
+_VERSION = re.compile(r"(?<![a-z0-9-])v?\d+(?:[.,_]\d+)*[a-z]?\d*(?![a-z0-9]|-[a-z0-9])")
+_NOISE = re.compile(r"(?<![a-z0-9])(?:" + _NOISE_WORDS + r")(?![a-z0-9])")
+_SEPARATORS = re.compile(r"\s*[-–—_,:;/|]+\s*(?=\s|$)|(?<=\s)[-–—_,:;/|]+\s*")
+_SPACES = re.compile(r"\s+")
+# A bare number ending the name ("Windows 10", "Microsoft 365", "Office 2019") and
+# the leading component of a dotted version ("Python 3.11.4")
+_TRAILING_NUMBER = re.compile(r"(?<![a-z0-9.,_+-])(\d+)[\s\-–—_,:;/|]*$")
+_FIRST_VERSION = re.compile(r"(?<![a-z0-9-])v?(\d+)[.,_]\d")
+
+
+def _strip_tags(text: str) -> str:
+    text = _UPDATE_TAG.sub(" ", text)
+    text = _ARCH_TAG.sub(" ", text)
+    text = _LOCALE_TAG.sub(" ", text)
+    return _NOISE.sub(" ", text)
+
+
+def _strip_noise(text: str) -> str:
+    return _VERSION.sub(" ", _strip_tags(text))
+
+
+def _clean(text: str) -> str:
+    text = _SEPARATORS.sub(" ", text)
+    return _SPACES.sub(" ", text).strip(" -–—_.,")
+
+
+def _product_number(text: str, product: str) -> str:
+    # Numbers that name the product rather than a release of it. A bare trailing
+    # number is an edition ("Windows 10" vs "Windows 11"). When a single word is
+    # all that is left, a one-digit major marks a product generation ("Python 2"
+    # vs "Python 3"); longer majors are release trains ("7-Zip 23.01" and
+    # "7-Zip 24.07", "Firefox 115.0") and stay out of the key.
+    match = _TRAILING_NUMBER.search(text)
+    if match:
+        return match.group(1)
+    if " " not in product:
+        match = _FIRST_VERSION.search(text)
+        if match and len(match.group(1)) == 1:
+            return match.group(1)
+    return ""
+
+
+@lru_cache(maxsize=65536)
+def canonical_name(name: str) -> str:
+    lowered = _SPACES.sub(" ", name.lower()).strip()
+    if not lowered:
+        return lowered
+
+    # Bracketed groups are almost always arch/locale/version annotations;
+    # keep whatever is left of them after stripping that noise.
+    text = _TRADEMARK.sub(" ", lowered)
+    text = _BRACKETED.sub(lambda m: " " + _BRACKET_NOISE.sub(" ", _strip_noise(m.group(1))) + " ", text)
+    text = _clean(_strip_tags(text))
+    product = _clean(_VERSION.sub(" ", text))
+    if product:
+        number = _product_number(text, product)
+        if number:
+            product = f"{product} {number}"
+
+    # Names that are nothing but version/noise ("2019", "Beta") keep their raw form
+    return product or lowered
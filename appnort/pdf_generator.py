@@ -1,44 +1,146 @@
+import os
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from datetime import datetime
-from typing import List, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from appnort.events import CancelToken, EventBus, StatusEvent
+from appnort.inventory import Inventory
+from appnort.metrics import metrics
+
+REPORT_MODES = ("full", "top-risk", "summary")
+
+# Shared by every table segment; only the risk colouring differs per segment
+TABLE_HEADER = ['Name', 'Version', 'Risk Level', 'Publisher']
+TABLE_COL_WIDTHS = [220, 90, 70, 120]
+BASE_TABLE_COMMANDS = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ROWBACKGROUNDS', (1, 0), (-1, -1), [colors.whitesmoke, colors.white]),
+]
+RISK_COMMANDS = {
+    "high": [('TEXTCOLOR', colors.red), ('FONTNAME', 'Helvetica-Bold')],
+    "medium": [('TEXTCOLOR', colors.orange)],
+}
+
+
+class _LazyFlowables(list):
+    # doc.build() consumes its flowable list from the front. This list refills
+    # itself from a generator as it drains, so only a few table segments exist
+    # at any time instead of the whole laid-out report.
+    def __init__(self, source: Iterator, low_water: int = 4):
+        super().__init__()
+        self._source = source
+        self._low_water = low_water
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._low_water:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
 
 class PDFGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, chunk_rows: int = 500):
+        # Rows per LongTable segment; splitting one huge table across pages
+        # gets slower with every page, fixed-size segments do not.
+        self.chunk_rows = chunk_rows
+        self.styles = getSampleStyleSheet()
+
+    @staticmethod
+    def _risk_key(security: str) -> str:
+        security = security.lower()
+        if "high" in security:
+            return "high"
+        if "medium" in security:
+            return "medium"
+        return ""
+
+    def _segment_style(self, risks: List[str]) -> TableStyle:
+        # One command per run of equal risk rows instead of one per row
+        commands = list(BASE_TABLE_COMMANDS)
+        start = 0
+        for i in range(1, len(risks) + 1):
+            if i == len(risks) or risks[i] != risks[start]:
+                for command, value in RISK_COMMANDS.get(risks[start], ()):
+                    commands.append((command, (2, start + 1), (2, i), value))
+                start = i
+        return TableStyle(commands)
+
+    def _segments(self, progs: List[Dict[str, Any]]) -> Iterator[LongTable]:
+        for offset in range(0, len(progs), self.chunk_rows):
+            data = [TABLE_HEADER]
+            risks = []
+            for prog in progs[offset:offset + self.chunk_rows]:
+                # Fields can be present but None (no DisplayVersion, no Publisher)
+                security = prog.get('security') or 'Unknown'
+                data.append([
+                    str(prog.get('name') or 'Unknown')[:45],
+                    str(prog.get('version') or 'Unknown')[:15],
+                    security,
+                    str(prog.get('publisher') or 'Unknown')[:30],
+                ])
+                risks.append(self._risk_key(security))
+            table = LongTable(data, colWidths=TABLE_COL_WIDTHS, repeatRows=1)
+            table.setStyle(self._segment_style(risks))
+            yield table
 
-    def generate_report(self, programs: List[Dict[str, str]], output_path: str):
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
+    def _elements(self, programs: List[Dict[str, Any]], mode: str,
+                  progress: Optional[Callable[[str, int, int], None]],
+                  cancel: Optional[CancelToken]) -> Iterator:
+        styles = self.styles
+        title_suffix = {"full": "", "top-risk": " (High & Medium Risk)", "summary": " (Summary)"}[mode]
 
         # Title
-        title = Paragraph(f"Appnort Software Audit Report - {datetime.now().strftime('%Y-%m-%d')}", styles['Title'])
-        elements.append(title)
-        elements.append(Spacer(1, 12))
+        yield Paragraph(f"Appnort Software Audit Report{title_suffix} - {datetime.now().strftime('%Y-%m-%d')}",
+                        styles['Title'])
+        yield Spacer(1, 12)
 
-        # Summary Statistics
-        total_programs = len(programs)
-        
         # Group by Category
-        grouped_programs = {}
-        for prog in programs:
-            cat = prog.get('category', 'Unknown')
-            if cat not in grouped_programs:
-                grouped_programs[cat] = []
-            grouped_programs[cat].append(prog)
-
-        summary_text = Paragraph(f"Total Installed Programs: {total_programs}", styles['Normal'])
-        elements.append(summary_text)
-        
+        grouped_programs: Dict[str, List[Dict[str, Any]]] = {}
+        if isinstance(programs, Inventory):
+            for cat, rows in programs.group_by('category').items():
+                grouped_programs[cat] = programs.rows(rows)
+        else:
+            for prog in programs:
+                grouped_programs.setdefault(prog.get('category', 'Unknown'), []).append(prog)
+
+        # Summary Statistics
+        yield Paragraph(f"Total Installed Programs: {len(programs)}", styles['Normal'])
+
         # Breakdown
-        breakdown_text = "<b>Category Breakdown:</b><br/>"
-        for cat, progs in grouped_programs.items():
-            breakdown_text += f"{cat}: {len(progs)}<br/>"
-        elements.append(Paragraph(breakdown_text, styles['Normal']))
-        elements.append(Spacer(1, 12))
+        breakdown = "".join(f"{cat}: {len(progs)}<br/>" for cat, progs in grouped_programs.items())
+        yield Paragraph("<b>Category Breakdown:</b><br/>" + breakdown, styles['Normal'])
+        yield Spacer(1, 12)
+
+        if mode != "full":
+            risk_counts: Dict[str, int] = {}
+            if isinstance(programs, Inventory):
+                risk_counts = programs.counts('security')
+            else:
+                for prog in programs:
+                    security = prog.get('security', 'Unknown')
+                    risk_counts[security] = risk_counts.get(security, 0) + 1
+            risk_text = "".join(f"{risk}: {risk_counts[risk]}<br/>"
+                                for risk in ("High", "Medium", "Low", "Unknown") if risk in risk_counts)
+            yield Paragraph("<b>Risk Breakdown:</b><br/>" + risk_text, styles['Normal'])
+            yield Spacer(1, 12)
 
         # Risk Legend
         legend_text = (
@@ -47,50 +149,62 @@ class PDFGenerator:
             "<font color='orange'><b>Medium</b></font>: Outdated software, or tools requiring caution.<br/>"
             "<font color='red'><b>High</b></font>: Known security risks, malware, or critical vulnerabilities."
         )
-        elements.append(Paragraph(legend_text, styles['Normal']))
-        elements.append(Spacer(1, 24))
+        yield Paragraph(legend_text, styles['Normal'])
+        yield Spacer(1, 24)
+
+        if mode == "summary":
+            return
 
-        # Create Table per Category
+        if mode == "top-risk":
+            grouped_programs = {cat: [p for p in progs if self._risk_key(p.get('security', 'Unknown'))]
+                                for cat, progs in grouped_programs.items()}
+            grouped_programs = {cat: progs for cat, progs in grouped_programs.items() if progs}
+
+        total_rows = sum(len(progs) for progs in grouped_programs.values())
+        done = 0
+        if progress:
+            progress("pdf", 0, total_rows)
+
+        # Table segments per Category, generated as layout reaches them
         for category, progs in grouped_programs.items():
-            # Category Header
-            cat_header = Paragraph(f"<b>{category}</b> ({len(progs)})", styles['Heading2'])
-            elements.append(cat_header)
-            elements.append(Spacer(1, 6))
-
-            data = [['Name', 'Version', 'Risk Level', 'Publisher']]
-            for prog in progs:
-                name = prog.get('name', 'Unknown')[:45]
-                version = prog.get('version', 'Unknown')[:15]
-                publisher = prog.get('publisher', 'Unknown')[:30]
-                security = prog.get('security', 'Unknown')
-                data.append([name, version, security, publisher])
-
-            # Table Styling
-            table = Table(data, colWidths=[220, 90, 70, 120])
-            style = TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ROWBACKGROUNDS', (1, 0), (-1, -1), [colors.whitesmoke, colors.white]),
-            ])
-            
-            # Conditional Formatting for Security
-            for i, row in enumerate(data[1:], start=1):
-                sec_val = row[2].lower()
-                if "high" in sec_val:
-                    style.add('TEXTCOLOR', (2, i), (2, i), colors.red)
-                    style.add('FONTNAME', (2, i), (2, i), 'Helvetica-Bold')
-                elif "medium" in sec_val:
-                    style.add('TEXTCOLOR', (2, i), (2, i), colors.orange)
-            
-            table.setStyle(style)
-            elements.append(table)
-            elements.append(Spacer(1, 18))
-
-        doc.build(elements)
-        print(f"Report generated at {output_path}")
+            yield Paragraph(f"<b>{category}</b> ({len(progs)})", styles['Heading2'])
+            yield Spacer(1, 6)
+            for i, table in enumerate(self._segments(progs)):
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                yield table
+                done += min(self.chunk_rows, len(progs) - i * self.chunk_rows)
+                if progress:
+                    progress("pdf", done, total_rows)
+            yield Spacer(1, 18)
+
+    def generate_report(self, programs: List[Dict[str, str]], output_path: str,
+                        progress: Optional[Callable[[str, int, int], None]] = None,
+                        cancel: Optional[CancelToken] = None, mode: str = "full",
+                        events: Optional[EventBus] = None):
+        # mode: "full" (every program), "top-risk" (High/Medium rows only) or
+        # "summary" (statistics only, no tables).
+        # The report is built next to output_path and moved into place once complete,
+        # so a cancelled or failed build never leaves a truncated PDF behind.
+        if mode not in REPORT_MODES:
+            raise ValueError(f"Unknown report mode: {mode}")
+        temp_path = output_path + ".tmp"
+        doc = SimpleDocTemplate(temp_path, pagesize=letter)
+
+        def on_page(canvas, doc):
+            # Layout runs page by page; stop between pages if the export was cancelled
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+        try:
+            with metrics.timer("pdf_build", mode=mode):
+                doc.build(_LazyFlowables(self._elements(programs, mode, progress, cancel)),
+                          onFirstPage=on_page, onLaterPages=on_page)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        metrics.incr("pdf_pages", doc.page)
+        if events is not None:
+            events.publish(StatusEvent(f"Report generated at {output_path}"))
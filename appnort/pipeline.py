@@ -0,0 +1,126 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from appnort.events import CancelToken
+from appnort.metrics import metrics
+from appnort.planner import ProgressCallback, ScanPlanner
+from appnort.scanner import Scanner
+from appnort.snapshot import ScanSnapshot
+
+ResolvedCallback = Callable[[Dict[str, Any]], None]
+
+
+class ScanPipeline:
+    # Streaming scan -> dedup -> cache/rule lookup -> AI batching.
+    #
+    # Programs are pulled from Scanner.iter_installed_programs() (parallel hive
+    # reads, bounded queue) in small chunks. Each chunk is resolved locally
+    # right away; unknowns are packed into AI batches that go out while the
+    # registry is still being read. on_resolved fires once per program when
+    # its final classification is known.
+    def __init__(self, scanner: Scanner, planner: ScanPlanner, chunk_size: int = 64, min_early_batch: int = 10):
+        self.scanner = scanner
+        self.planner = planner
+        self.chunk_size = chunk_size
+        # Smallest partial batch worth sending early while AI workers sit idle
+        self.min_early_batch = min_early_batch
+
+    def run(self, previous: Optional[List[Dict[str, Any]]] = None, snapshot: Optional[ScanSnapshot] = None,
+            progress: Optional[ProgressCallback] = None,
+            on_resolved: Optional[ResolvedCallback] = None,
+            cancel: Optional[CancelToken] = None) -> List[Dict[str, Any]]:
+        # Raises ScanCancelled when `cancel` fires. The snapshot is saved only after
+        # every program has been classified, so a cancelled or failed scan leaves the
+        # previous one on disk and the next incremental scan still sees the changes.
+        categorizer = self.planner.categorizer
+        dispatcher = self.planner.dispatcher
+        packer = categorizer.batch_packer(self.planner.token_budget)
+
+        # Classification from the previous scan, reused when a program is unchanged
+        carried = {p['name']: p for p in (previous or [])
+                   if p.get('category', 'Unknown') != 'Unknown' and p.get('security', 'Unknown') != 'Unknown'}
+        # canonical key -> [(program, local entry)] waiting on one AI answer
+        waiting: Dict[str, List[Tuple[Dict[str, Any], Dict[str, str]]]] = {}
+        programs: List[Dict[str, Any]] = []
+        counts = {"queued": 0, "done": 0}
+
+        def finish(prog):
+            if on_resolved:
+                on_resolved(prog)
+
+        def apply(prog, entry):
+            prog['category'] = entry.get('category', 'Unknown')
+            prog['security'] = entry.get('security', 'Unknown')
+
+        def drain(wait_all: bool):
+            for settled, results in dispatcher.collect(wait_all):
+                for name in settled:
+                    ai_entry = results.get(name)
+                    for prog, local in waiting.pop(categorizer.cache_key(name), []):
+                        # Unresolved names keep their provisional local classification
+                        apply(prog, self.planner.merge(local, ai_entry) if ai_entry else local)
+                        finish(prog)
+                counts["done"] += len(settled)
+                if progress:
+                    progress("ai", counts["done"], counts["queued"])
+
+        def resolve_chunk(chunk):
+            fresh = []
+            for prog in chunk:
+                old = carried.get(prog['name'])
+                if old and all(old.get(k) == v for k, v in prog.items()):
+                    apply(prog, old)
+                    finish(prog)
+                else:
+                    fresh.append(prog)
+            if not fresh:
+                return
+
+            publishers = {p['name']: p.get('publisher') for p in fresh}
+            resolved = categorizer.categorize_many(publishers.keys(), publishers)
+            for prog in fresh:
+                entry = resolved[prog['name']]
+                apply(prog, entry)
+                if not self.planner.needs_ai(entry):
+                    finish(prog)
+                    continue
+                key = categorizer.cache_key(prog['name'])
+                if key in waiting:
+                    # Another version of this product is already queued
+                    waiting[key].append((prog, entry))
+                    continue
+                waiting[key] = [(prog, entry)]
+                counts["queued"] += 1
+                dispatcher.submit(packer.add(prog['name']))
+
+            # Do not let a half-filled batch sit while workers are idle
+            if dispatcher.in_flight < dispatcher.max_workers and packer.pending_count >= self.min_early_batch:
+                dispatcher.submit(packer.flush())
+
+        self.planner.unresolved = []
+        dispatcher.start(cancel)
+        stream = self.scanner.iter_installed_programs(snapshot, save_snapshot=False)
+        with metrics.timer("scan"):
+            try:
+                chunk = []
+                for prog in stream:
+                    programs.append(prog)
+                    chunk.append(prog)
+                    if len(chunk) >= self.chunk_size:
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        resolve_chunk(chunk)
+                        chunk = []
+                        if progress:
+                            progress("scan", len(programs), 0)
+                        drain(wait_all=False)
+                resolve_chunk(chunk)
+                dispatcher.submit(packer.flush())
+                drain(wait_all=True)
+            finally:
+                stream.close()
+                dispatcher.close()
+        if snapshot is not None:
+            snapshot.save()
+        metrics.incr("programs_scanned", len(programs))
+        self.planner.unresolved = list(dispatcher.unresolved)
+        return programs
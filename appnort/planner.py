@@ -0,0 +1,105 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from appnort.categorizer import Categorizer
+from appnort.dispatcher import BatchDispatcher
+from appnort.events import CancelToken
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class ScanPlanner:
+    # Three-step plan for a scan:
+    #   1. resolve everything possible from the cache and rules (no network)
+    #   2. build one deduplicated work list of unresolved names
+    #   3. dispatch that list to the AI once, packed into token-budgeted batches
+    def __init__(self, categorizer: Categorizer, token_budget: Optional[int] = None, max_workers: int = 4):
+        self.categorizer = categorizer
+        # None picks the budget for whichever model is selected at dispatch time
+        self.token_budget = token_budget
+        self.dispatcher = BatchDispatcher(categorizer, max_workers, token_budget=token_budget)
+        self.unresolved: List[str] = []
+
+    def needs_ai(self, entry: Dict[str, str]) -> bool:
+        if not self.categorizer.groq_api_key:
+            return False
+        if entry.get("category", "Unknown") == "Unknown" or entry.get("security", "Unknown") == "Unknown":
+            return True
+        # Locally scored risk is only trusted above the confidence threshold
+        return not self.categorizer.is_confident(entry)
+
+    def merge(self, local: Dict[str, str], ai_entry: Dict[str, str]) -> Dict[str, str]:
+        # Keep a confident local risk verdict when the AI was only needed for the category
+        security = local.get('security') if self.categorizer.is_confident(local) else None
+        return dict(ai_entry, security=security or ai_entry.get('security', 'Unknown'))
+
+    def resolve_local(self, programs: List[Dict[str, str]]) -> Dict[Tuple[str, Optional[str]], Dict[str, str]]:
+        # Offline answers per (name, publisher): the publisher drives risk scoring, so
+        # one name reported with two publishers (a fleet, a repackaged installer) is
+        # assessed once for each. categorize_many takes one publisher per name, hence
+        # one pass per publisher a name has; almost always a single pass.
+        rounds: List[Dict[str, Optional[str]]] = []
+        depth: Dict[str, int] = {}
+        for name, publisher in dict.fromkeys((p['name'], p.get('publisher')) for p in programs):
+            position = depth.get(name, 0)
+            depth[name] = position + 1
+            if position == len(rounds):
+                rounds.append({})
+            rounds[position][name] = publisher
+        resolved = {}
+        for publishers in rounds:
+            for name, entry in self.categorizer.categorize_many(publishers.keys(), publishers).items():
+                resolved[(name, publishers[name])] = entry
+        return resolved
+
+    def plan(self, programs: List[Dict[str, str]]) -> Dict[str, object]:
+        resolved = self.resolve_local(programs)
+        # One representative name per canonical product ("7-Zip 23.01" and "7-Zip 24.07" share one slot)
+        pending = []
+        seen = set()
+        for prog in programs:
+            name = prog['name']
+            key = self.categorizer.cache_key(name)
+            if key not in seen and self.needs_ai(resolved[(name, prog.get('publisher'))]):
+                seen.add(key)
+                pending.append(name)
+        return {"resolved": resolved, "pending": pending}
+
+    def dispatch(self, pending: List[str], progress: Optional[ProgressCallback] = None,
+                 cancel: Optional[CancelToken] = None) -> Dict[str, Dict[str, str]]:
+        results = {}
+        total = len(pending)
+        done = 0
+        batches = self.categorizer.batch_packer(self.token_budget).pack(pending)
+        if progress:
+            progress("ai", 0, total)
+        # Batches run concurrently; results stream back in completion order
+        for settled, batch_results in self.dispatcher.dispatch(batches, cancel):
+            results.update(batch_results)
+            done += len(settled)
+            if progress:
+                progress("ai", done, total)
+        # Names the model never answered for, even after splitting
+        self.unresolved = list(self.dispatcher.unresolved)
+        return results
+
+    def run(self, programs: List[Dict[str, str]], progress: Optional[ProgressCallback] = None,
+            cancel: Optional[CancelToken] = None) -> List[Dict[str, str]]:
+        if progress:
+            progress("rules", len(programs), len(programs))
+        self.unresolved = []
+        plan = self.plan(programs)
+        resolved = plan["resolved"]
+        ai_results = {}
+        if plan["pending"]:
+            # Fan each product's answer back out to every version of it
+            for name, entry in self.dispatch(plan["pending"], progress, cancel).items():
+                ai_results[self.categorizer.cache_key(name)] = entry
+
+        for prog in programs:
+            entry = resolved.get((prog['name'], prog.get('publisher')), {})
+            ai_entry = ai_results.get(self.categorizer.cache_key(prog['name']))
+            if ai_entry:
+                entry = self.merge(entry, ai_entry)
+            prog['category'] = entry.get('category', 'Unknown')
+            prog['security'] = entry.get('security', 'Unknown')
+        return programs
@@ -0,0 +1,122 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from appnort.metrics import metrics
+
+# Install roots this shallow ("C:\", "C:\Windows", "/usr") would claim half the
+# machine's processes; they are left out of the index. So are home directories
+# ("C:\Users\bob", "/home/bob") and their shared folders: a program registered
+# there would otherwise own every portable tool run from Downloads or AppData.
+MIN_ROOT_DEPTH = 2
+_GENERIC_ROOTS = {"windows", "system32", "program files", "program files (x86)", "programdata", "users",
+                  "usr", "bin", "opt", "applications", "local", "appdata", "roaming", "locallow", "programs",
+                  "downloads", "desktop", "documents", "temp", "tmp"}
+_HOME_PARENTS = {"users", "home", "documents and settings"}
+
+
+class PathIndex:
+    # Prefix trie over path components. lookup() walks one node per component
+    # of the queried path, so matching a process costs O(path depth) no matter
+    # how many install roots are indexed; the deepest registered root wins.
+    def __init__(self, case_sensitive: Optional[bool] = None):
+        # Windows paths compare case-insensitively; default follows the host OS
+        self.case_sensitive = os.name != "nt" if case_sensitive is None else case_sensitive
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+
+    def components(self, path: str) -> List[str]:
+        path = path.strip().strip('"').replace("\\", "/")
+        if not self.case_sensitive:
+            path = path.lower()
+        return [part for part in path.split("/") if part and part != "."]
+
+    def add(self, path: str, value: Any) -> bool:
+        parts = self.components(path)
+        if len(parts) < MIN_ROOT_DEPTH or parts[-1].lower() in _GENERIC_ROOTS or parts[-2].lower() in _HOME_PARENTS:
+            return False
+        node = self._root
+        for part in parts:
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(value)  # None key holds the values stored at this node
+        self.size += 1
+        return True
+
+    def lookup(self, path: str) -> List[Any]:
+        node = self._root
+        found: List[Any] = []
+        for part in self.components(path):
+            node = node.get(part)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+
+def snapshot_processes() -> List[Dict[str, Any]]:
+    # One psutil pass; attrs are fetched together per process. Processes we may
+    # not inspect (other users, protected system processes) come back with exe=None.
+    import psutil
+    processes = []
+    with metrics.timer("process_snapshot"):
+        for proc in psutil.process_iter(attrs=["pid", "name", "exe", "username"], ad_value=None):
+            info = proc.info
+            processes.append({"pid": info["pid"], "name": info.get("name") or "",
+                              "exe": info.get("exe") or None, "username": info.get("username")})
+    return processes
+
+
+class ProcessCorrelator:
+    # Maps running processes to installed programs by their InstallLocation and,
+    # when executables were hashed, by exact executable path. Sets on each program:
+    #   program["running"]   "Yes" / "No"
+    #   program["processes"] number of matching processes
+    def __init__(self, programs: List[Dict[str, Any]], case_sensitive: Optional[bool] = None):
+        self.programs = programs
+        self.index = PathIndex(case_sensitive)
+        # Programs are indexed by position: rows of an Inventory are fresh views
+        # on every access, so object identity cannot key them
+        for position, prog in enumerate(programs):
+            location = prog.get('location')
+            if location and location != "Unknown":
+                self.index.add(location, position)
+            for executable in prog.get('executables') or ():
+                self.index.add(executable["path"], position)
+
+    def correlate(self, processes: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        # Returns {"running": [programs], "unmanaged": [processes], "uninspectable": [processes]}.
+        # "unmanaged" are executables that belong to no installed program: portable
+        # tools, things run from Downloads/Temp, or installs missing from the registry.
+        counts: Dict[int, int] = {}
+        unmanaged = []
+        uninspectable = []
+        with metrics.timer("process_correlate"):
+            for proc in processes:
+                exe = proc.get("exe")
+                if not exe:
+                    uninspectable.append(proc)
+                    continue
+                matches = self.index.lookup(exe)
+                if not matches:
+                    unmanaged.append(proc)
+                    continue
+                for position in matches:
+                    counts[position] = counts.get(position, 0) + 1
+
+        running = []
+        for position, prog in enumerate(self.programs):
+            count = counts.get(position, 0)
+            prog['running'] = "Yes" if count else "No"
+            prog['processes'] = count
+            if count:
+                running.append(prog)
+        metrics.incr("processes_matched", sum(counts.values()))
+        metrics.incr("processes_unmanaged", len(unmanaged))
+        return {"running": running, "unmanaged": unmanaged, "uninspectable": uninspectable}
+
+
+def correlate_running(programs: List[Dict[str, Any]],
+                      processes: Optional[List[Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], int]:
+    # Convenience wrapper: snapshot (unless given) and correlate. Also returns the process count.
+    if processes is None:
+        processes = snapshot_processes()
+    return ProcessCorrelator(programs).correlate(processes), len(processes)
@@ -0,0 +1,112 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Hive names used throughout the scanner; WinRegBackend maps them to winreg handles
+HIVES = ["HKLM", "HKCU"]
+UNINSTALL_PATHS = [
+    r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
+    r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+]
+
+# (subkey name, {value name: data} or None if skipped, last write time as a FILETIME integer)
+SubkeyRecord = Tuple[str, Optional[Dict[str, Any]], int]
+# should_read(subkey name, last write) -> False to skip reading that subkey's values
+ReadFilter = Callable[[str, int], bool]
+
+
+def _letters(i: int) -> str:
+    # 0 -> "a", 25 -> "z", 26 -> "ba" ...: a distinct word per index that survives name normalization
+    word = ""
+    while True:
+        word = chr(ord("a") + i % 26) + word
+        i //= 26
+        if not i:
+            return word
+
+
+class RegistryBackend(ABC):
+    # Minimal read-only view of the registry used by Scanner. A missing
+    # hive/path raises OSError, like winreg.OpenKey does.
+    @abstractmethod
+    def iter_subkeys(self, hive: str, path: str, should_read: Optional[ReadFilter] = None) -> Iterator[SubkeyRecord]:
+        ...
+
+
+class WinRegBackend(RegistryBackend):
+    def __init__(self):
+        import winreg
+        self._winreg = winreg
+        self._roots = {"HKLM": winreg.HKEY_LOCAL_MACHINE, "HKCU": winreg.HKEY_CURRENT_USER}
+
+    def iter_subkeys(self, hive, path, should_read=None):
+        winreg = self._winreg
+        with winreg.OpenKey(self._roots[hive], path) as key:
+            for i in range(winreg.QueryInfoKey(key)[0]):
+                try:
+                    subkey_name = winreg.EnumKey(key, i)
+                    with winreg.OpenKey(key, subkey_name) as subkey:
+                        _, value_count, last_write = winreg.QueryInfoKey(subkey)
+                        if should_read is not None and not should_read(subkey_name, last_write):
+                            yield subkey_name, None, last_write
+                            continue
+                        # One EnumValue sweep reads every value, instead of probing then re-reading each
+                        values = {}
+                        for j in range(value_count):
+                            name, data, _ = winreg.EnumValue(subkey, j)
+                            values[name] = data
+                except OSError:
+                    continue
+                yield subkey_name, values, last_write
+
+
+class FakeRegistryBackend(RegistryBackend):
+    # In-memory hive for tests and benchmarks on any OS:
+    # {hive: {path: {subkey: {"values": {...}, "last_write": int}}}}
+    def __init__(self, data: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        self.data = data or {}
+
+    def set_subkey(self, hive: str, path: str, subkey: str, values: Dict[str, Any], last_write: int = 0):
+        self.data.setdefault(hive, {}).setdefault(path, {})[subkey] = {"values": dict(values), "last_write": last_write}
+
+    def delete_subkey(self, hive: str, path: str, subkey: str):
+        self.data.get(hive, {}).get(path, {}).pop(subkey, None)
+
+    def iter_subkeys(self, hive, path, should_read=None):
+        try:
+            subkeys = self.data[hive][path]
+        except KeyError:
+            raise FileNotFoundError(f"{hive}\\{path}")
+        for name, entry in list(subkeys.items()):
+            last_write = entry.get("last_write", 0)
+            if should_read is not None and not should_read(name, last_write):
+                yield name, None, last_write
+            else:
+                yield name, entry.get("values", {}), last_write
+
+    @classmethod
+    def from_json(cls, path: str) -> "FakeRegistryBackend":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def to_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+
+    @classmethod
+    def synthetic(cls, count: int, hives: List[str] = None, paths: List[str] = None) -> "FakeRegistryBackend":
+        # Spread `count` uninstall entries over the hive/path combinations
+        backend = cls()
+        locations = [(h, p) for h in (hives or HIVES) for p in (paths or UNINSTALL_PATHS)]
+        for i in range(count):
+            hive, path = locations[i % len(locations)]
+            backend.set_subkey(hive, path, f"{{{i:08d}-SYNTH}}", {
+                "DisplayName": f"Synthetic {_letters(i).title()} {i % 10}.{i % 7}",
+                "DisplayVersion": f"{i % 10}.{i % 7}.{i % 13}",
+                "Publisher": f"Vendor {i % 500}",
+                "InstallLocation": f"C:\\Program Files\\Vendor {i % 500}\\App {i}",
+                "EstimatedSize": (i * 37) % 500000,
+                "InstallDate": "20240101",
+                "SystemComponent": 1 if i % 50 == 0 else 0
+            }, last_write=133000000000000000 + i)
+        return backend
@@ -0,0 +1,140 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional
+
+from appnort.normalize import canonical_name
+from appnort.rule_engine import RuleEngine
+
+# Offline risk scoring. Known publishers and products get a local Low/Medium/High
+# with a confidence value; only low-confidence programs need the AI.
+
+_CORPORATE_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "llc", "ltd", "limited",
+    "gmbh", "ag", "sa", "sas", "bv", "nv", "plc", "pty", "llp", "srl", "spa", "kk", "oy", "ab", "as", "se"
+}
+_PUNCTUATION = re.compile(r"[^a-z0-9]+")
+
+DEFAULT_TRUSTED_PUBLISHERS = [
+    "Microsoft Corporation", "Google LLC", "Mozilla", "Apple Inc.", "Adobe Inc.", "Adobe Systems Incorporated",
+    "NVIDIA Corporation", "Intel Corporation", "Advanced Micro Devices, Inc.", "Realtek Semiconductor Corp.",
+    "Oracle Corporation", "Valve Corporation", "Epic Games, Inc.", "JetBrains s.r.o.", "Python Software Foundation",
+    "Docker Inc.", "GitHub, Inc.", "The Git Development Community", "Node.js Foundation", "OpenJS Foundation",
+    "Zoom Video Communications, Inc.", "Discord Inc.", "Slack Technologies", "Spotify AB", "VideoLAN",
+    "Igor Pavlov", "win.rar GmbH", "Notepad++ Team", "Brave Software Inc", "Opera Norway AS", "Telegram FZ-LLC",
+    "WhatsApp", "Meta Platforms, Inc.", "OBS Project", "Audacity Team", "The GIMP Team", "The Document Foundation",
+    "Logitech", "Dell Inc.", "HP Inc.", "Lenovo", "ASUSTeK Computer Inc.", "Cisco Systems, Inc.", "VMware, Inc.",
+    "Autodesk, Inc.", "Electronic Arts", "Ubisoft", "Blizzard Entertainment", "Riot Games, Inc.", "Canonical Ltd.",
+    "Red Hat, Inc.", "Dropbox, Inc.", "Zoom Communications, Inc."
+]
+
+# Other spellings of trusted publishers seen in DisplayName/Publisher values. Only
+# exact (normalized) names are trusted, so "Microsoft Corporation" never vouches
+# for "Microsoft Corporation Fan Club"; extra spellings have to be listed here.
+DEFAULT_PUBLISHER_ALIASES = {
+    "Mozilla Foundation": "Mozilla",
+    "Intel(R) Corporation": "Intel Corporation",
+    "AMD Inc.": "Advanced Micro Devices, Inc.",
+    "Oracle America, Inc.": "Oracle Corporation",
+    "HP Development Company, L.P.": "HP Inc.",
+    "Hewlett-Packard": "HP Inc.",
+    "Lenovo Group Limited": "Lenovo",
+    "Dell Technologies": "Dell Inc.",
+}
+
+# Heuristics the AI prompt uses as well: P2P and remote access tools are Medium,
+# cracks and hack tools are High regardless of who claims to publish them.
+DEFAULT_HIGH_KEYWORDS = [
+    "crack", "cracked", "keygen", "kms", "kmspico", "activator", "cheat engine", "mimikatz",
+    "keylogger", "rat", "stealer", "njrat", "darkcomet", "hacktool"
+]
+DEFAULT_MEDIUM_KEYWORDS = [
+    "torrent", "utorrent", "bittorrent", "qbittorrent", "deluge", "transmission", "vuze", "frostwire", "emule",
+    "limewire", "soulseek", "teamviewer", "anydesk", "vnc", "tightvnc", "ultravnc", "realvnc", "radmin", "ammyy",
+    "logmein", "splashtop", "rustdesk", "remote utilities", "supremo", "chrome remote desktop", "tor browser"
+]
+
+
+def normalize_publisher(publisher: Optional[str]) -> str:
+    if not publisher:
+        return ""
+    words = _PUNCTUATION.sub(" ", publisher.lower()).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while words and words[-1] in _CORPORATE_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class RiskEngine:
+    def __init__(self, trusted_publishers: Optional[Iterable[str]] = None,
+                 allow: Optional[Dict[str, str]] = None, deny: Optional[Iterable[str]] = None,
+                 pack_path: Optional[str] = None, aliases: Optional[Dict[str, str]] = None):
+        self.trusted = {normalize_publisher(p) for p in (trusted_publishers or DEFAULT_TRUSTED_PUBLISHERS)}
+        self.trusted.discard("")
+        # Normalized alias -> normalized publisher it stands for
+        self.aliases: Dict[str, str] = {}
+        self.add_aliases(DEFAULT_PUBLISHER_ALIASES if aliases is None else aliases)
+        # Product allow list: canonical name -> risk level to use as-is
+        self.allow: Dict[str, str] = {canonical_name(k): v for k, v in (allow or {}).items()}
+        self.deny = {canonical_name(name) for name in (deny or [])}
+        self.high_keywords = list(DEFAULT_HIGH_KEYWORDS)
+        self.medium_keywords = list(DEFAULT_MEDIUM_KEYWORDS)
+        if pack_path and os.path.exists(pack_path):
+            self.load_pack(pack_path)
+        self._compile()
+
+    def load_pack(self, path: str):
+        # JSON with any of: trusted_publishers, publisher_aliases {alias: publisher},
+        # allow {name: level}, deny, high_keywords, medium_keywords
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                pack = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Skipping risk pack {path}: {e}")
+            return
+        self.trusted.update(normalize_publisher(p) for p in pack.get("trusted_publishers", []))
+        self.add_aliases(pack.get("publisher_aliases", {}))
+        self.allow.update({canonical_name(k): v for k, v in pack.get("allow", {}).items()})
+        self.deny.update(canonical_name(name) for name in pack.get("deny", []))
+        self.high_keywords.extend(pack.get("high_keywords", []))
+        self.medium_keywords.extend(pack.get("medium_keywords", []))
+        self._compile()
+
+    def _compile(self):
+        self._heuristics = RuleEngine({"High": self.high_keywords, "Medium": self.medium_keywords})
+
+    def add_aliases(self, aliases: Dict[str, str]):
+        for alias, publisher in aliases.items():
+            key = normalize_publisher(alias)
+            if key:
+                self.aliases[key] = normalize_publisher(publisher)
+
+    def is_trusted(self, publisher: Optional[str]) -> bool:
+        # Exact normalized match or a listed alias. Dropping trailing words would let
+        # "Google Chrome Helper Ltd" pass as "google"; prefixes are never tried.
+        key = normalize_publisher(publisher)
+        if not key:
+            return False
+        return key in self.trusted or self.aliases.get(key) in self.trusted
+
+    def assess(self, name: str, publisher: Optional[str] = None) -> Dict[str, object]:
+        key = canonical_name(name)
+        if key in self.deny:
+            return {"security": "High", "confidence": 0.95, "reason": "deny list"}
+        # An explicit allow entry is a deliberate decision and overrides the keyword heuristics
+        if key in self.allow:
+            return {"security": self.allow[key], "confidence": 0.95, "reason": "allow list"}
+
+        hits = self._heuristics.scores(name)
+        if "High" in hits:
+            return {"security": "High", "confidence": 0.85, "reason": "hack tool heuristic"}
+        if "Medium" in hits:
+            return {"security": "Medium", "confidence": 0.9, "reason": "P2P/remote access heuristic"}
+
+        if self.is_trusted(publisher):
+            return {"security": "Low", "confidence": 0.9, "reason": "trusted publisher"}
+        if publisher and publisher != "Unknown":
+            # Named but unknown publisher: lean Medium, as the AI prompt does, but let the AI decide
+            return {"security": "Medium", "confidence": 0.4, "reason": "unrecognized publisher"}
+        return {"security": "Unknown", "confidence": 0.0, "reason": "no publisher"}
@@ -0,0 +1,130 @@
+import glob
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Union
+
+# A rule pack maps category -> keywords. Keywords are either a plain list
+# (weight defaults to keyword length, so specific phrases beat short tokens)
+# or a dict of keyword -> weight.
+#
+# Keywords match whole words, not substrings as the old first-match loop did:
+# "edge" no longer fires on "Knowledge", nor "java" on "JavaScript" or "vpn" on
+# "NordVPN". Compound product names need their own keyword ("winrar", "github").
+RulePack = Dict[str, Union[List[str], Dict[str, float]]]
+
+
+class RuleEngine:
+    def __init__(self, rules: Optional[RulePack] = None, pack_dir: Optional[str] = None):
+        self.base_rules = rules or {}
+        self.pack_dir = pack_dir
+        self.categories: List[str] = []
+        self.weights: Dict[str, Dict[str, float]] = {}
+        self._pack_mtimes: Dict[str, float] = {}
+        self._pattern: Optional["re.Pattern"] = None
+        self.reload()
+
+    # --- Loading ---
+
+    @staticmethod
+    def load_pack(path: str) -> RulePack:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"Rule pack {path} must be a JSON object of category -> keywords")
+        return data
+
+    def _pack_files(self) -> List[str]:
+        if not self.pack_dir or not os.path.isdir(self.pack_dir):
+            return []
+        return sorted(glob.glob(os.path.join(self.pack_dir, "*.json")))
+
+    def reload(self):
+        # Merge the built-in rules with every pack on disk, then compile once
+        weights: Dict[str, Dict[str, float]] = {}
+        categories: List[str] = []
+        mtimes: Dict[str, float] = {}
+
+        packs = [self.base_rules]
+        for path in self._pack_files():
+            try:
+                # Recorded even for a broken pack, so it is not re-parsed until it is edited
+                mtimes[path] = os.path.getmtime(path)
+                packs.append(self.load_pack(path))
+            except (OSError, ValueError) as e:
+                print(f"Skipping rule pack {path}: {e}")
+
+        for pack in packs:
+            for category, keywords in pack.items():
+                if category not in weights:
+                    weights[category] = {}
+                    categories.append(category)
+                if isinstance(keywords, dict):
+                    items = keywords.items()
+                else:
+                    items = ((kw, None) for kw in keywords)
+                for keyword, weight in items:
+                    keyword = keyword.strip().lower()
+                    if keyword:
+                        weights[category][keyword] = float(weight) if weight is not None else float(len(keyword))
+
+        self.categories = categories
+        self.weights = weights
+        self._pack_mtimes = mtimes
+        self._compile()
+
+    def reload_if_changed(self) -> bool:
+        current = {}
+        for path in self._pack_files():
+            try:
+                current[path] = os.path.getmtime(path)
+            except OSError:
+                continue
+        if current != self._pack_mtimes:
+            self.reload()
+            return True
+        return False
+
+    def _compile(self):
+        # keyword -> [(category index, weight)]; a keyword may belong to several categories
+        self._keyword_hits: Dict[str, List[tuple]] = {}
+        self._category_index = {category: idx for idx, category in enumerate(self.categories)}
+        for idx, category in enumerate(self.categories):
+            for keyword, weight in self.weights[category].items():
+                self._keyword_hits.setdefault(keyword, []).append((idx, weight))
+
+        if not self._keyword_hits:
+            self._pattern = None
+            return
+
+        # Longest first so the alternation prefers "microsoft visual c++" over "visual".
+        # Alphanumeric look-arounds act as word boundaries that also work for "c++" and "7-zip";
+        # an optional plural "s" keeps "Games" and "Drivers" matching their singular keyword.
+        alternation = "|".join(re.escape(kw) for kw in sorted(self._keyword_hits, key=len, reverse=True))
+        self._pattern = re.compile(r"(?<![a-z0-9])(" + alternation + r")s?(?![a-z0-9])")
+
+    # --- Matching ---
+
+    def scores(self, name: str) -> Dict[str, float]:
+        result: Dict[str, float] = {}
+        if self._pattern is None:
+            return result
+        for match in self._pattern.finditer(name.lower()):
+            for idx, weight in self._keyword_hits[match.group(1)]:
+                category = self.categories[idx]
+                result[category] = result.get(category, 0.0) + weight
+        return result
+
+    def match(self, name: str) -> str:
+        scores = self.scores(name)
+        if not scores:
+            return "Unknown"
+        # Highest score wins; ties go to the category declared first
+        return max(scores, key=lambda cat: (scores[cat], -self._category_index[cat]))
+
+    def match_many(self, names: Iterable[str]) -> Dict[str, str]:
+        results = {}
+        for name in names:
+            if name not in results:
+                results[name] = self.match(name)
+        return results
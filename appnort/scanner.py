@@ -1,14 +1,25 @@
 import platform
-import winreg
-import psutil
-from typing import List, Dict
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from appnort.metrics import metrics
+from appnort.registry import HIVES, UNINSTALL_PATHS, RegistryBackend, WinRegBackend
+from appnort.snapshot import ScanSnapshot
 
 class Scanner:
-    def __init__(self):
+    def __init__(self, registry: Optional[RegistryBackend] = None, linux_root: str = "/"):
         self.os_type = platform.system()
+        # Registry backend; defaults to the real registry on Windows. Passing a
+        # FakeRegistryBackend lets the Windows scan run anywhere.
+        self.registry = registry
+        # Filesystem root the Linux package databases are read from (fixtures in benchmarks)
+        self.linux_root = linux_root
+        # Bound on programs buffered between the registry readers and the consumer
+        self.queue_size = 512
+        self.last_delta: Dict[str, List[Dict[str, Any]]] = {"added": [], "removed": [], "updated": []}
 
     def scan_installed_programs(self) -> List[Dict[str, str]]:
-        if self.os_type == 'Windows':
+        if self._uses_registry():
             return self._scan_windows()
         elif self.os_type == 'Darwin':
             return self._scan_macos()
@@ -18,59 +29,149 @@ class Scanner:
             print(f"Unsupported OS: {self.os_type}")
             return []
 
+    def _uses_registry(self) -> bool:
+        return self.os_type == 'Windows' or self.registry is not None
+
+    def iter_installed_programs(self, snapshot: Optional[ScanSnapshot] = None,
+                                save_snapshot: bool = True) -> Iterator[Dict[str, Any]]:
+        # Streams programs as they are read, deduplicated by name. The hive/path
+        # combinations are read in parallel but merged in the serial order (HKLM,
+        # HKLM WOW6432Node, HKCU, HKCU WOW6432Node), so the first of duplicate
+        # names in that order wins on every run.
+        # With a snapshot, unchanged subkeys are reused and, once the stream is
+        # exhausted, the snapshot is updated and self.last_delta is set. The snapshot
+        # is also saved unless save_snapshot is False, in which case the caller saves
+        # it once the scan's own work (classification) has completed.
+        if not self._uses_registry():
+            entries = {self._package_key(p): {"last_write": None, "program": p}
+                       for p in self.scan_installed_programs()}
+            stream = iter(entries.items())
+        else:
+            entries = {}
+            stream = self._stream_windows_entries(snapshot)
+
+        seen = set()
+        for key, entry in stream:
+            entries[key] = entry
+            program = entry["program"]
+            if program and program['name'] not in seen:
+                seen.add(program['name'])
+                yield program
+
+        if snapshot is not None:
+            self.last_delta = ScanSnapshot.diff(snapshot.entries, entries)
+            snapshot.entries = entries
+            if save_snapshot:
+                snapshot.save()
+
+    def scan_incremental(self, snapshot: Optional[ScanSnapshot] = None) -> Dict[str, List[Dict[str, Any]]]:
+        # Re-read only subkeys whose last-write time changed since the previous scan.
+        # Returns the full inventory plus the added/removed/updated delta.
+        snapshot = snapshot or ScanSnapshot().load()
+        programs = list(self.iter_installed_programs(snapshot))
+        return {"programs": programs, **self.last_delta}
+
     def _scan_windows(self) -> List[Dict[str, str]]:
-        programs = []
-        uninstall_paths = [
-            r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall",
-            r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
-        ]
-        
-        roots = [winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER]
-
-        for root in roots:
-            for path in uninstall_paths:
+        return list(self.iter_installed_programs())
+
+    def _stream_windows_entries(self, snapshot: Optional[ScanSnapshot] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        registry = self.registry or WinRegBackend()
+        locations = [(hive, path) for hive in HIVES for path in UNINSTALL_PATHS]
+        results: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        done_marker = object()
+
+        def put(item):
+            # Give up if the consumer abandoned the stream
+            while not stop.is_set():
                 try:
-                    with winreg.OpenKey(root, path) as key:
-                        for i in range(winreg.QueryInfoKey(key)[0]):
-                            try:
-                                subkey_name = winreg.EnumKey(key, i)
-                                with winreg.OpenKey(key, subkey_name) as subkey:
-                                    try:
-                                        name = winreg.QueryValueEx(subkey, "DisplayName")[0]
-                                        version = winreg.QueryValueEx(subkey, "DisplayVersion")[0] if self._key_exists(subkey, "DisplayVersion") else "Unknown"
-                                        install_location = winreg.QueryValueEx(subkey, "InstallLocation")[0] if self._key_exists(subkey, "InstallLocation") else "Unknown"
-                                        publisher = winreg.QueryValueEx(subkey, "Publisher")[0] if self._key_exists(subkey, "Publisher") else "Unknown"
-                                        
-                                        if name.strip():
-                                            programs.append({
-                                                "name": name,
-                                                "version": version,
-                                                "location": install_location,
-                                                "publisher": publisher,
-                                                "os": "Windows"
-                                            })
-                                    except OSError:
-                                        continue
-                            except OSError:
-                                continue
-                except OSError:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
                     continue
-        
-        # Remove duplicates based on name
-        unique_programs = {p['name']: p for p in programs}.values()
-        return list(unique_programs)
+            return False
+
+        def read_location(index, hive, path):
+            prefix = f"{hive}\\{path}\\"
+            should_read = None
+            if snapshot is not None:
+                should_read = lambda name, last_write: not snapshot.is_unchanged(prefix + name, last_write)
+            read = reused = 0
+            try:
+                with metrics.timer("registry_enumeration", hive=hive):
+                    for subkey_name, values, last_write in registry.iter_subkeys(hive, path, should_read):
+                        key = prefix + subkey_name
+                        if values is None:
+                            program = snapshot.program(key)
+                            reused += 1
+                        else:
+                            program = self._program_from_values(values)
+                            read += 1
+                        if not put((index, (key, {"last_write": last_write, "program": program}))):
+                            return
+            except OSError:
+                metrics.incr("errors", source="registry")
+            finally:
+                metrics.incr("registry_subkeys_read", read, hive=hive)
+                metrics.incr("registry_subkeys_reused", reused, hive=hive)
+                put((index, done_marker))
 
-    def _key_exists(self, key, subkey_name):
+        workers = [threading.Thread(target=read_location, args=(i, hive, path), daemon=True, name="appnort-scan")
+                   for i, (hive, path) in enumerate(locations)]
+        for worker in workers:
+            worker.start()
+        # The earliest unfinished location streams straight through; later ones are
+        # held back until every location before them is done.
+        held: List[List[Tuple[str, Dict[str, Any]]]] = [[] for _ in locations]
+        finished = [False] * len(locations)
+        current = 0
         try:
-            winreg.QueryValueEx(key, subkey_name)
-            return True
-        except FileNotFoundError:
-            return False
+            while current < len(locations):
+                index, item = results.get()
+                if item is done_marker:
+                    finished[index] = True
+                elif index == current:
+                    yield item
+                else:
+                    held[index].append(item)
+                while current < len(locations) and finished[current]:
+                    current += 1
+                    if current < len(locations):
+                        yield from held[current]
+                        held[current] = []
+        finally:
+            stop.set()
+
+    @staticmethod
+    def _package_key(program: Dict[str, Any]) -> str:
+        # "Linux:dpkg:libc6:i386", "Linux:snap:firefox": a dpkg and a snap package of
+        # the same name, or two architectures of one dpkg package, are separate entries
+        key = f"{program['os']}:{program.get('source', '')}:{program['name']}"
+        if program.get("architecture"):
+            key += f":{program['architecture']}"
+        return key
+
+    def _program_from_values(self, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        name = values.get("DisplayName")
+        if not isinstance(name, str) or not name.strip():
+            return None
+        return {
+            "name": name,
+            "version": values.get("DisplayVersion") or "Unknown",
+            "location": values.get("InstallLocation") or "Unknown",
+            "publisher": values.get("Publisher") or "Unknown",
+            "os": "Windows",
+            # Captured from the same value sweep at no extra registry cost
+            "size_kb": values.get("EstimatedSize") if isinstance(values.get("EstimatedSize"), int) else 0,
+            "install_date": str(values.get("InstallDate") or "Unknown"),
+            "system_component": values.get("SystemComponent") == 1
+        }
 
     def _scan_macos(self):
         # Stub for macOS
         return [{"name": "Mock App (Mac)", "version": "1.0", "location": "/Applications", "os": "Darwin"}]
 
     def _scan_linux(self):
-        # Stub for Linux
-        return [{"name": "Mock App (Linux)", "version": "1.0", "location": "/usr/bin", "os": "Linux"}]
+        # dpkg, RPM, Flatpak and Snap databases, read concurrently
+        from appnort.linux_packages import LinuxPackageScanner
+        return LinuxPackageScanner(self.linux_root).scan()
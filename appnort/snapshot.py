@@ -0,0 +1,63 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_VERSION = 1
+
+
+class ScanSnapshot:
+    # Persisted result of the previous scan, keyed by source ("HKLM\path\subkey"):
+    # {"last_write": int | None, "program": dict | None}
+    # A subkey whose last-write time is unchanged is reused without reading its values.
+    def __init__(self, path: str = "scan_snapshot.json"):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> "ScanSnapshot":
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == SNAPSHOT_VERSION:
+                    entries = data.get("entries")
+                    # Damaged records are dropped, so their subkeys are simply read again
+                    self.entries = {key: entry for key, entry in entries.items()
+                                    if isinstance(entry, dict) and isinstance(entry.get("program"), (dict, type(None)))}
+            except (OSError, json.JSONDecodeError, AttributeError):
+                self.entries = {}
+        return self
+
+    def save(self):
+        # Write to a temp file first so an interrupted save keeps the old snapshot
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": SNAPSHOT_VERSION, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save scan snapshot: {e}")
+
+    def is_unchanged(self, key: str, last_write: Optional[int]) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and last_write is not None and entry.get("last_write") == last_write
+
+    def program(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        return dict(entry["program"]) if entry and entry.get("program") else None
+
+    @staticmethod
+    def diff(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        added, removed, updated = [], [], []
+        for key, entry in new.items():
+            program = entry.get("program")
+            previous = old.get(key, {}).get("program")
+            if program and not previous:
+                added.append(program)
+            elif previous and not program:
+                removed.append(previous)
+            elif program and program != previous:
+                updated.append(program)
+        for key, entry in old.items():
+            if key not in new and entry.get("program"):
+                removed.append(entry["program"])
+        return {"added": added, "removed": removed, "updated": updated}
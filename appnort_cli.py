@@ -0,0 +1,9 @@
+import multiprocessing
+import sys
+
+from appnort.cli import main
+
+if __name__ == "__main__":
+    # Needed for the report process pool in frozen Windows builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
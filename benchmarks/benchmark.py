@@ -0,0 +1,679 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from appnort.registry import HIVES, UNINSTALL_PATHS, FakeRegistryBackend
+
+# Realistic products: (display name template, publisher). {v} is replaced by a version.
+KNOWN_PRODUCTS = [
+    ("Google Chrome", "Google LLC"),
+    ("Mozilla Firefox ({v} x64 en-US)", "Mozilla"),
+    ("Microsoft Edge", "Microsoft Corporation"),
+    ("7-Zip {v} (x64)", "Igor Pavlov"),
+    ("WinRAR {v} (64-bit)", "win.rar GmbH"),
+    ("Python {v} (64-bit)", "Python Software Foundation"),
+    ("Git", "The Git Development Community"),
+    ("Microsoft Visual Studio Code (User)", "Microsoft Corporation"),
+    ("Microsoft Visual C++ 2015-2022 Redistributable (x64) - {v}", "Microsoft Corporation"),
+    ("Microsoft Office Professional Plus 2019 - en-us", "Microsoft Corporation"),
+    ("Notion {v}", "Notion Labs, Inc"),
+    ("Steam", "Valve Corporation"),
+    ("Epic Games Launcher", "Epic Games, Inc."),
+    ("VLC media player", "VideoLAN"),
+    ("Spotify", "Spotify AB"),
+    ("OBS Studio", "OBS Project"),
+    ("NVIDIA Graphics Driver {v}", "NVIDIA Corporation"),
+    ("Realtek High Definition Audio Driver", "Realtek Semiconductor Corp."),
+    ("Intel(R) Management Engine Components", "Intel Corporation"),
+    ("Zoom", "Zoom Video Communications, Inc."),
+    ("Discord", "Discord Inc."),
+    ("Slack", "Slack Technologies Inc."),
+    ("Microsoft Teams", "Microsoft Corporation"),
+    ("qBittorrent {v}", "The qBittorrent project"),
+    ("TeamViewer", "TeamViewer"),
+    ("AnyDesk", "philandro Software GmbH"),
+    ("Docker Desktop", "Docker Inc."),
+    ("Node.js", "Node.js Foundation"),
+    ("Adobe Acrobat Reader DC", "Adobe Systems Incorporated"),
+    ("CCleaner", "Piriform"),
+]
+_SYLLABLES = ["zen", "tri", "vox", "lum", "kor", "pax", "nex", "qua", "dri", "sol", "mar", "tek", "ori", "vel"]
+_SUFFIXES = ["Toolkit", "Manager", "Studio", "Helper", "Agent", "Suite", "Connect", "Sync", "Monitor"]
+
+
+def _version(rng: random.Random) -> str:
+    return f"{rng.randint(1, 30)}.{rng.randint(0, 20)}.{rng.randint(0, 9999)}"
+
+
+def synthetic_inventory(count: int, seed: int = 0, unknown_ratio: float = 0.4,
+                        duplicate_ratio: float = 0.1) -> FakeRegistryBackend:
+    # `count` uninstall entries: known products with version-suffixed names,
+    # made-up unknown products, and a share of entries repeated under a
+    # second hive/path (as 32/64-bit and per-user installs are on real machines).
+    rng = random.Random(seed)
+    backend = FakeRegistryBackend()
+    locations = [(h, p) for h in HIVES for p in UNINSTALL_PATHS]
+    i = 0
+    while i < count:
+        if rng.random() < unknown_ratio:
+            name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+            name = f"{name} {rng.choice(_SUFFIXES)} {rng.randint(1, 12)}.{rng.randint(0, 9)}"
+            publisher = f"{rng.choice(_SYLLABLES).title()}soft {rng.randint(1, 400)}"
+        else:
+            template, publisher = rng.choice(KNOWN_PRODUCTS)
+            name = template.format(v=_version(rng))
+        values = {
+            "DisplayName": name,
+            "DisplayVersion": _version(rng),
+            "Publisher": publisher,
+            "InstallLocation": f"C:\\Program Files\\{publisher}\\{name}",
+            "EstimatedSize": rng.randint(100, 2000000),
+            "InstallDate": f"20{rng.randint(15, 25)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            "SystemComponent": 0,
+        }
+        copies = 2 if rng.random() < duplicate_ratio and i + 1 < count else 1
+        for copy in range(copies):
+            hive, path = locations[(i + copy * 3) % len(locations)]
+            backend.set_subkey(hive, path, f"{{{i:08d}-BENCH}}", values, last_write=133000000000000000 + i)
+            i += 1
+    return backend
+
+
+def _legacy_rule_match(rules: Dict[str, List[str]], name: str) -> str:
+    # The original per-name nested keyword loop, kept as the comparison point for the RuleEngine
+    lowered = name.lower()
+    for category, keywords in rules.items():
+        for keyword in keywords:
+            if keyword in lowered:
+                return category
+    return "Unknown"
+
+
+def _rpm_header(tags: Dict[int, Any]) -> bytes:
+    # Minimal rpmdb.sqlite header blob: str -> STRING, int -> INT32, list -> STRING_ARRAY
+    from appnort.linux_packages import RPM_INT32, RPM_STRING, RPM_STRING_ARRAY
+    index, store = [], b""
+    for tag, value in sorted(tags.items()):
+        if isinstance(value, int):
+            store += b"\0" * (-len(store) % 4)
+            index.append(struct.pack(">iIiI", tag, RPM_INT32, len(store), 1))
+            store += struct.pack(">I", value)
+        elif isinstance(value, list):
+            index.append(struct.pack(">iIiI", tag, RPM_STRING_ARRAY, len(store), len(value)))
+            store += b"".join(v.encode("utf-8") + b"\0" for v in value)
+        else:
+            index.append(struct.pack(">iIiI", tag, RPM_STRING, len(store), 1))
+            store += value.encode("utf-8") + b"\0"
+    return struct.pack(">II", len(index), len(store)) + b"".join(index) + store
+
+
+def synthetic_linux_root(root: str, packages: int, seed: int = 0) -> str:
+    # Fixture host under `root`: a dpkg status file with per-package file lists,
+    # an rpmdb.sqlite with a tenth as many packages, one Flatpak app and one snap
+    from appnort.linux_packages import (RPMTAG_DIRNAMES, RPMTAG_INSTALLTIME, RPMTAG_NAME, RPMTAG_RELEASE,
+                                        RPMTAG_SIZE, RPMTAG_VENDOR, RPMTAG_VERSION)
+    rng = random.Random(seed)
+    info = os.path.join(root, "var", "lib", "dpkg", "info")
+    os.makedirs(info, exist_ok=True)
+    with open(os.path.join(root, "var", "lib", "dpkg", "status"), 'w', encoding='utf-8') as status:
+        for i in range(packages):
+            name = f"pkg{i}"
+            state = "install ok installed" if rng.random() > 0.02 else "deinstall ok config-files"
+            status.write(f"Package: {name}\nStatus: {state}\nPriority: optional\nSection: utils\n"
+                         f"Installed-Size: {rng.randint(10, 50000)}\n"
+                         f"Maintainer: Team {i % 40} <team{i % 40}@example.org>\n"
+                         f"Architecture: amd64\nVersion: 1.{i % 7}.{rng.randint(0, 9)}-1\n"
+                         f"Description: synthetic package {i}\n Long description line.\n .\n More text.\n\n")
+            with open(os.path.join(info, f"{name}.list"), 'w', encoding='utf-8') as f:
+                f.write(f"/.\n/usr\n/usr/bin\n/usr/bin/{name}\n/usr/lib/{name}\n")
+                f.write("".join(f"/usr/lib/{name}/module{k}.so\n" for k in range(rng.randint(1, 20))))
+                f.write(f"/usr/share/doc/{name}\n/usr/share/doc/{name}/copyright\n")
+
+    rpm_dir = os.path.join(root, "var", "lib", "rpm")
+    os.makedirs(rpm_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(rpm_dir, "rpmdb.sqlite"))
+    conn.execute("CREATE TABLE IF NOT EXISTS Packages (hnum INTEGER PRIMARY KEY AUTOINCREMENT, blob BLOB NOT NULL)")
+    conn.executemany("INSERT INTO Packages (blob) VALUES (?)", [(_rpm_header({
+        RPMTAG_NAME: f"rpmpkg{i}", RPMTAG_VERSION: f"2.{i % 5}", RPMTAG_RELEASE: "1.el9",
+        RPMTAG_VENDOR: "Example Vendor", RPMTAG_SIZE: rng.randint(1, 10 ** 8), RPMTAG_INSTALLTIME: 1700000000 + i,
+        RPMTAG_DIRNAMES: ["/usr/bin/", f"/opt/example/rpmpkg{i}/", f"/opt/example/rpmpkg{i}/lib/"],
+    }),) for i in range(max(1, packages // 10))])
+    conn.commit()
+    conn.close()
+
+    app = os.path.join(root, "var", "lib", "flatpak", "app", "org.example.Editor")
+    deployed = os.path.join(app, "x86_64", "stable", "abc123")
+    os.makedirs(os.path.join(deployed, "files", "share", "metainfo"), exist_ok=True)
+    with open(os.path.join(deployed, "metadata"), 'w', encoding='utf-8') as f:
+        f.write("[Application]\nname=org.example.Editor\nruntime=org.freedesktop.Platform/x86_64/23.08\n")
+    with open(os.path.join(deployed, "files", "share", "metainfo", "org.example.Editor.metainfo.xml"), 'w',
+              encoding='utf-8') as f:
+        f.write('<component type="desktop-application"><id>org.example.Editor</id><name>Example Editor</name>'
+                '<developer_name>Example Org</developer_name>'
+                '<releases><release version="3.2.1" date="2024-01-01"/></releases></component>')
+    for link, target in ((os.path.join(app, "x86_64", "stable", "active"), "abc123"),
+                         (os.path.join(app, "current"), os.path.join("x86_64", "stable"))):
+        if not os.path.lexists(link):
+            os.symlink(target, link)
+
+    snap = os.path.join(root, "snap", "example-cli")
+    os.makedirs(os.path.join(snap, "42", "meta"), exist_ok=True)
+    with open(os.path.join(snap, "42", "meta", "snap.yaml"), 'w', encoding='utf-8') as f:
+        f.write("name: example-cli\nversion: '0.9'\nsummary: Example CLI\n"
+                "apps:\n  example-cli:\n    command: bin/cli\n")
+    if not os.path.lexists(os.path.join(snap, "current")):
+        os.symlink("42", os.path.join(snap, "current"))
+    snapd = os.path.join(root, "var", "lib", "snapd")
+    os.makedirs(snapd, exist_ok=True)
+    with open(os.path.join(snapd, "state.json"), 'w', encoding='utf-8') as f:
+        json.dump({"data": {"snaps": {"example-cli": {"current": "42", "sequence": [
+            {"name": "example-cli", "revision": "41", "publisher": "old-account"},
+            {"name": "example-cli", "revision": "42",
+             "publisher": {"username": "example", "display-name": "Example Publisher"}},
+        ]}}}}, f)
+    return root
+
+
+def synthetic_processes(programs: List[Dict[str, Any]], count: int, seed: int = 0,
+                        unmanaged_ratio: float = 0.1) -> List[Dict[str, Any]]:
+    # Process list in psutil snapshot shape: most executables live under an install
+    # location, the rest run from Downloads / Temp and belong to no program
+    rng = random.Random(seed)
+    locations = [p['location'] for p in programs if p.get('location') not in (None, "Unknown")]
+    processes = []
+    for pid in range(1, count + 1):
+        if rng.random() < unmanaged_ratio or not locations:
+            exe = f"C:\\Users\\user\\Downloads\\tool{rng.randrange(1000)}.exe"
+        else:
+            exe = f"{rng.choice(locations)}\\bin\\app{rng.randrange(10)}.exe"
+        processes.append({"pid": pid, "name": exe.rsplit("\\", 1)[-1], "exe": exe, "username": "user"})
+    return processes
+
+
+_CATEGORIES = ["Development", "Productivity", "Games", "Browsers", "Media", "System", "Communication", "Utilities",
+               "Unknown"]
+
+
+def synthetic_report_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    # Classified programs as the PDF report receives them; about one in ten is High or Medium risk
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        template, publisher = rng.choice(KNOWN_PRODUCTS)
+        rows.append({
+            "name": f"{template.format(v=_version(rng))} #{i}",
+            "version": _version(rng),
+            "publisher": publisher,
+            "category": rng.choice(_CATEGORIES),
+            "security": rng.choices(["Low", "Medium", "High", "Unknown"], [80, 6, 4, 10])[0],
+        })
+    return rows
+
+
+def _peak_rss() -> Optional[int]:
+    # High-water resident set size of this process in bytes; None where `resource` is missing (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def render_pdf(rows: int, path: str, mode: str = "full") -> Dict[str, Any]:
+    # One report render, meant to run in a fresh interpreter so the RSS high-water
+    # mark belongs to this report alone. Without `resource`, tracemalloc reports
+    # the peak of Python allocations instead (and slows the render down).
+    from appnort.pdf_generator import PDFGenerator
+    programs = synthetic_report_rows(rows, seed=4)
+    generator = PDFGenerator()
+    base = _peak_rss()
+    if base is None:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    generator.generate_report(programs, path, mode=mode)
+    elapsed = time.perf_counter() - start
+    if base is None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {"seconds": elapsed, "peak_traced_bytes": peak}
+    return {"seconds": elapsed, "peak_rss_bytes": _peak_rss(), "base_rss_bytes": base}
+
+
+def _legacy_correlate(programs: List[Dict[str, Any]], processes: List[Dict[str, Any]]) -> int:
+    # Pairwise prefix test of every process against every install root, the comparison point for PathIndex
+    roots = [p['location'].lower().rstrip("\\") + "\\"
+             for p in programs if p.get('location') not in (None, "Unknown")]
+    unmanaged = 0
+    for proc in processes:
+        exe = proc["exe"].lower()
+        if not any(exe.startswith(root) for root in roots):
+            unmanaged += 1
+    return unmanaged
+
+
+class BenchmarkRunner:
+    # Times each stage on its own and the whole Scanner -> Categorizer -> PDFGenerator path.
+    # Every case runs `repeat` times after its setup and reports the median.
+    def __init__(self, sizes: List[int], repeat: int = 3, latency: float = 0.02, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.05, include_pdf: bool = True, workdir: Optional[str] = None):
+        self.sizes = sizes
+        # Every scratch file (caches, snapshots, reports) goes here, never into the working directory
+        self.workdir = workdir or tempfile.mkdtemp(prefix="appnort-bench-")
+        self.repeat = repeat
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.include_pdf = include_pdf
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir, name)
+
+    def measure(self, name: str, fn: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+                repeat: Optional[int] = None, **info):
+        times = []
+        for _ in range(repeat or self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            fn(state)
+            times.append(time.perf_counter() - start)
+        self.results[name] = dict(info, median_s=round(statistics.median(times), 6),
+                                  min_s=round(min(times), 6), runs=len(times))
+        print(f"  {name:<32} {statistics.median(times) * 1000:10.1f} ms")
+
+    def _categorizer(self, url: Optional[str] = None):
+        from appnort.cache_store import MemoryCacheStore
+        from appnort.categorizer import Categorizer
+        categorizer = Categorizer("benchmark-key" if url else None)
+        categorizer.cache = MemoryCacheStore()
+        if url:
+            categorizer.api_url = url
+            categorizer.client.backoff_base = 0.01
+        return categorizer
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        from appnort.categorizer import FAST_MODEL
+        from benchmarks.mock_groq import MockGroqServer
+        # The small model answers in a fraction of the large one's time, as on the real API
+        with MockGroqServer(latency=self.latency, error_rate=self.error_rate, rate_limit_rate=self.rate_limit_rate,
+                            model_latency={FAST_MODEL: self.latency / 4}) as server:
+            for size in self.sizes:
+                print(f"{size} programs")
+                self.run_size(size, server.url)
+        print("fixed-size cases")
+        self.run_fixed()
+        return self.results
+
+    def run_size(self, size: int, url: str):
+        from appnort.exporters import get_exporter
+        from appnort.pipeline import ScanPipeline
+        from appnort.planner import ScanPlanner
+        from appnort.scanner import Scanner
+        from appnort.snapshot import ScanSnapshot
+
+        registry = synthetic_inventory(size)
+        scanner = Scanner(registry)
+        programs = scanner.scan_installed_programs()
+        publishers = {p['name']: p.get('publisher') for p in programs}
+
+        self.measure(f"scan@{size}", lambda _: scanner.scan_installed_programs(), size=size)
+
+        snapshot_path = self.path(f"bench_snapshot_{size}.json")
+        list(scanner.iter_installed_programs(ScanSnapshot(snapshot_path)))
+        self.measure(f"scan_unchanged@{size}",
+                     lambda _: list(scanner.iter_installed_programs(ScanSnapshot(snapshot_path).load())), size=size)
+
+        self.measure(f"categorize_local@{size}",
+                     lambda c: c.categorize_many(publishers.keys(), publishers),
+                     setup=self._categorizer, size=size)
+
+        def ai(planner):
+            planner.run([dict(p) for p in programs])
+        self.measure(f"categorize_ai@{size}", ai,
+                     setup=lambda: ScanPlanner(self._categorizer(url)), size=size)
+
+        def cascade_planner():
+            categorizer = self._categorizer(url)
+            categorizer.cascade = True
+            return ScanPlanner(categorizer)
+        self.measure(f"categorize_cascade@{size}", ai, setup=cascade_planner, size=size)
+
+        def pipeline(p):
+            return p.run()
+        self.measure(f"pipeline@{size}", pipeline,
+                     setup=lambda: ScanPipeline(Scanner(registry), ScanPlanner(self._categorizer(url))), size=size)
+
+        classified = ScanPipeline(Scanner(registry), ScanPlanner(self._categorizer(url))).run()
+        self.measure(f"export_csv@{size}", lambda _: get_exporter("csv").export(classified, self.path("bench.csv")),
+                     size=size)
+        if self.include_pdf:
+            self.measure(f"pdf@{size}", lambda _: get_exporter("pdf").export(classified, self.path("bench.pdf")),
+                         size=size)
+
+            def end_to_end(p):
+                get_exporter("pdf").export(p.run(), self.path("bench.pdf"))
+            self.measure(f"end_to_end@{size}", end_to_end,
+                         setup=lambda: ScanPipeline(Scanner(registry), ScanPlanner(self._categorizer(url))),
+                         size=size)
+
+    def run_fixed(self):
+        from appnort.cache_store import SQLiteCacheStore
+        from appnort.list_model import ProgramListModel
+        from appnort.normalize import canonical_name
+        from appnort.scanner import Scanner
+
+        programs = Scanner(synthetic_inventory(50000, seed=1)).scan_installed_programs()
+        names = [p['name'] for p in programs]
+
+        categorizer = self._categorizer()
+        engine = categorizer.rule_engine
+        self.measure("rules_compiled@50000", lambda _: [engine.match(n) for n in names], size=50000)
+        self.measure("rules_legacy@50000", lambda _: [_legacy_rule_match(categorizer.rules, n) for n in names],
+                     size=50000)
+
+        keys = [f"{canonical_name(n)}#{i}" for i, n in enumerate(names)] * 2
+        entries = {k: {"category": "Utilities", "security": "Low"} for k in keys[:100000]}
+
+        def cache_setup():
+            path = self.path("bench_cache.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            return SQLiteCacheStore(path)
+
+        def cache_write(store):
+            store.update(entries)
+            store.commit()
+            store.close()
+        self.measure("cache_write@100000", cache_write, setup=cache_setup, size=100000)
+
+        def cache_read(store):
+            store.get_many(entries.keys())
+            store.close()
+        self.measure("cache_read@100000", cache_read,
+                     setup=lambda: SQLiteCacheStore(self.path("bench_cache.db")),
+                     size=100000)
+
+        def list_model(model):
+            model.set_programs(programs)
+            model.sort_by("risk")
+            model.set_filter("zen", None, None)
+            model.window(0, 50)
+            model.set_filter("zenv", "Utilities", "Low")
+            model.window(0, 50)
+        self.measure("list_model@50000", list_model, setup=ProgramListModel, size=50000)
+
+        if self.include_pdf:
+            self.run_pdf_sizes()
+        self.run_hashing()
+        self.run_processes(programs)
+        self.run_inventory(programs)
+        self.run_history(programs[:2000])
+        self.run_linux_packages()
+        self.run_bundles()
+
+
+    def run_pdf_sizes(self, sizes: Tuple[int, ...] = (1000, 10000, 100000),
+                      modes: Tuple[str, ...] = ("full", "top-risk")):
+        # Render time and peak RSS per report size. Each render runs in its own
+        # interpreter: the RSS high-water mark never goes down within a process.
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        for mode in modes:
+            for rows in sizes:
+                name = f"pdf_{mode}@{rows}"
+                times = []
+                for _ in range(self.repeat if rows < 100000 else 1):
+                    code = ("import json; from benchmarks.benchmark import render_pdf; "
+                            f"print(json.dumps(render_pdf({rows}, {self.path('bench_rows.pdf')!r}, {mode!r})))")
+                    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env,
+                                         cwd=self.workdir, check=True)
+                    result = json.loads(out.stdout.strip().splitlines()[-1])
+                    times.append(result.pop("seconds"))
+                self.results[name] = dict(result, size=rows, median_s=round(statistics.median(times), 6),
+                                          min_s=round(min(times), 6), runs=len(times))
+                peak = result.get("peak_rss_bytes", result.get("peak_traced_bytes", 0))
+                print(f"  {name:<32} {statistics.median(times) * 1000:10.1f} ms  peak {peak / 2 ** 20:.1f} MB")
+
+    def run_hashing(self, locations: int = 50, files_per_location: int = 20, file_size: int = 256 * 1024):
+        # Cold hashing of a local tree, then a rescan where every digest comes from the cache
+        from appnort.hashing import ExecutableHasher, HashCache
+        rng = random.Random(2)
+        programs = []
+        for i in range(locations):
+            directory = os.path.join(self.path("bench_tree"), f"App{i}", "bin")
+            os.makedirs(directory, exist_ok=True)
+            for k in range(files_per_location):
+                with open(os.path.join(directory, f"module{k}.dll"), 'wb') as f:
+                    f.write(rng.randbytes(file_size))
+            programs.append({"name": f"App {i}", "location": os.path.join(self.path("bench_tree"), f"App{i}")})
+        count = locations * files_per_location
+
+        def hash_setup():
+            if os.path.exists(self.path("bench_hash.db")):
+                os.remove(self.path("bench_hash.db"))
+            return HashCache(self.path("bench_hash.db"))
+
+        def enrich(cache):
+            ExecutableHasher(cache).enrich(programs)
+            cache.close()
+        self.measure(f"hash_cold@{count}", enrich, setup=hash_setup, size=count)
+        self.measure(f"hash_cached@{count}", enrich, setup=lambda: HashCache(self.path("bench_hash.db")),
+                     size=count)
+
+
+    def run_bundles(self, count: int = 1000000, lookups: int = 10000):
+        # A fleet-sized classification bundle: open cost and lookups straight from the memory map
+        from appnort.bundle import ClassificationBundle, write_bundle
+        from appnort.categorizer import RISK_LEVELS
+        categories = ["Development", "Productivity", "Games", "Browsers", "Media", "System", "Communication",
+                      "Utilities"]
+        rng = random.Random(4)
+        bundle_path = self.path("bench.apnb")
+
+        def entries():
+            for i in range(count):
+                yield f"product {i:07d}", {"category": rng.choice(categories), "security": rng.choice(RISK_LEVELS)}
+        self.measure(f"bundle_write@{count}", lambda _: write_bundle(entries(), bundle_path), repeat=1, size=count)
+
+        def open_close(_):
+            ClassificationBundle(bundle_path).close()
+        self.measure(f"bundle_open@{count}", open_close, size=count)
+
+        keys = [f"product {rng.randrange(count * 2):07d}" for _ in range(lookups)]
+
+        def lookup(bundle):
+            bundle.get_many(keys)
+            bundle.close()
+        self.measure(f"bundle_lookup@{lookups}", lookup, setup=lambda: ClassificationBundle(bundle_path),
+                     size=lookups)
+
+    def run_inventory(self, programs: List[Dict[str, Any]], fleet: int = 20, machine_size: int = 2000,
+                      machine_pool: int = 5000):
+        # Columnar Inventory against the list of dicts it replaces: retained memory
+        # after loading an inventory file, pickled size, and the report aggregations
+        import pickle
+        import tracemalloc
+        from collections import Counter
+        from appnort.categorizer import RISK_LEVELS
+        from appnort.inventory import Inventory
+        rng = random.Random(5)
+        categories = ["Development", "Productivity", "Games", "Browsers", "Media", "System", "Communication",
+                      "Utilities"]
+        size = len(programs)
+        blob = json.dumps([dict(p, category=rng.choice(categories), security=rng.choice(RISK_LEVELS))
+                           for p in programs])
+
+        def retained(build):
+            tracemalloc.start()
+            value = build()
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return value, current
+        # A fleet: the same products, names and versions repeat across machines
+        machines = [json.dumps(rng.sample(json.loads(blob)[:machine_pool], machine_size)) for _ in range(fleet)]
+        dicts, dicts_bytes = retained(lambda: json.loads(blob))
+        inventory, inventory_bytes = retained(lambda: Inventory(json.loads(blob)))
+        fleet_dicts, fleet_dicts_bytes = retained(lambda: [json.loads(m) for m in machines])
+        fleet_inventory, fleet_inventory_bytes = retained(lambda: [Inventory(json.loads(m)) for m in machines])
+        installs = fleet * machine_size
+        for name, value, memory in (
+                (f"dicts@{size}", dicts, dicts_bytes), (f"inventory@{size}", inventory, inventory_bytes),
+                (f"fleet_dicts@{installs}", fleet_dicts, fleet_dicts_bytes),
+                (f"fleet_inventory@{installs}", fleet_inventory, fleet_inventory_bytes)):
+            pickled = len(pickle.dumps(value))
+            self.results[f"memory_{name}"] = {"bytes": memory, "pickled_bytes": pickled}
+            print(f"  {'memory_' + name:<32} {memory / 2 ** 20:10.1f} MB  pickled {pickled / 2 ** 20:.1f} MB")
+
+        def dict_aggregate(_):
+            Counter(p.get('security', 'Unknown') for p in dicts)
+            groups: Dict[str, List[int]] = {}
+            for i, p in enumerate(dicts):
+                groups.setdefault(p.get('category', 'Unknown'), []).append(i)
+            [i for i, p in enumerate(dicts) if p.get('security') == 'High' and p.get('category') == 'Games']
+
+        def inventory_aggregate(_):
+            inventory.counts('security')
+            inventory.group_by('category')
+            inventory.filter(security='High', category='Games')
+        self.measure(f"aggregate_dicts@{size}", dict_aggregate, size=size)
+        self.measure(f"aggregate_inventory@{size}", inventory_aggregate, size=size)
+        self.measure(f"inventory_rows@{size}", lambda _: [p.get('name') for p in inventory], size=size)
+
+    def run_history(self, programs: List[Dict[str, Any]], scans: int = 300, churn: int = 5):
+        # A machine scanned daily: a few upgrades per scan, an occasional install or removal
+        from appnort.categorizer import RISK_LEVELS
+        from appnort.history import ScanHistory
+        rng = random.Random(6)
+        path = self.path("bench_history.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        current = [dict(p, category="Utilities", security=rng.choice(RISK_LEVELS)) for p in programs]
+        history = ScanHistory(path)
+        start = time.time() - scans * 86400
+        ids = []
+        for day in range(scans):
+            current = list(current)
+            for _ in range(churn):
+                i = rng.randrange(len(current))
+                current[i] = dict(current[i], version=f"{day}.{rng.randint(0, 99)}", security=rng.choice(RISK_LEVELS))
+            if day % 10 == 0:
+                current.pop(rng.randrange(len(current)))
+                current.append({"name": f"Bench Tool {day}", "publisher": "Bench", "security": "High"})
+            ids.append(history.record(current, machine="bench", taken=start + day * 86400))
+        size = len(programs)
+        self.results[f"history_disk@{scans}x{size}"] = {"bytes": os.path.getsize(path)}
+        print(f"  {'history_disk@' + str(scans) + 'x' + str(size):<32} {os.path.getsize(path) / 2 ** 20:10.1f} MB")
+
+        self.measure(f"history_record@{size}", lambda _: history.record(current, machine="bench"), size=size)
+        self.measure(f"history_diff_adjacent@{scans}", lambda _: history.diff(ids[-2], ids[-1]), size=scans)
+        self.measure(f"history_diff_span@{scans}", lambda _: history.diff(ids[0], ids[-1]), size=scans)
+        self.measure(f"history_risk_changes@{scans}", lambda _: history.risk_changes(machine="bench"), size=scans)
+        self.measure(f"history_first_seen@{scans}", lambda _: history.product_history("Bench Tool"), size=scans)
+        history.close()
+
+    def run_linux_packages(self, packages: int = 5000):
+        # Fixture dpkg / RPM / Flatpak / Snap databases through Scanner._scan_linux
+        from appnort.scanner import Scanner
+        root = synthetic_linux_root(self.path("bench_linux"), packages)
+        scanner = Scanner(linux_root=root)
+        self.measure(f"linux_scan@{packages}", lambda _: scanner._scan_linux(), size=packages)
+
+    def run_processes(self, programs: List[Dict[str, Any]], count: int = 20000, legacy_size: int = 2000):
+        # Trie lookup against all install roots, and the pairwise scan on a smaller slice
+        from appnort.processes import ProcessCorrelator
+        processes = synthetic_processes(programs, count, seed=3)
+        self.measure(f"process_correlate@{count}",
+                     lambda _: ProcessCorrelator(programs, case_sensitive=False).correlate(processes), size=count)
+        few_programs = programs[:legacy_size]
+        few_processes = synthetic_processes(few_programs, legacy_size, seed=3)
+        self.measure(f"process_trie@{legacy_size}",
+                     lambda _: ProcessCorrelator(few_programs, case_sensitive=False).correlate(few_processes),
+                     size=legacy_size)
+        self.measure(f"process_pairwise@{legacy_size}", lambda _: _legacy_correlate(few_programs, few_processes),
+                     size=legacy_size)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float = 0.2, min_delta: float = 0.005) -> List[Tuple[str, float, float]]:
+    # Cases slower than baseline by more than `threshold` (and at least `min_delta`
+    # seconds, so sub-millisecond noise is ignored)
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        before, after = old["median_s"], result["median_s"]
+        if after > before * (1 + threshold) and after - before >= min_delta:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.benchmark",
+                                     description="Appnort performance benchmarks against a local mock Groq server")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated inventory sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock API latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05, help="Share answered with 429")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip the PDF and end-to-end cases")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+
+    # Scratch files go to a temporary directory; the working directory is switched too,
+    # so the categorizer's default cache and bundle paths never touch the real ones
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="appnort-bench-") as workdir:
+        runner = BenchmarkRunner([int(s) for s in args.sizes.split(",") if s], args.repeat, args.latency,
+                                 args.error_rate, args.rate_limit_rate, include_pdf=not args.no_pdf, workdir=workdir)
+        os.chdir(workdir)
+        try:
+            results = runner.run()
+        finally:
+            os.chdir(cwd)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": vars(args),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    failed = False
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION: {name} {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({after / before - 1:+.0%})")
+        if not regressions:
+            print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import ast
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Names are read back out of the prompt built by Categorizer._build_payload
+_PROGRAMS = re.compile(r"programs: (\[.*?\])\.\n", re.S)
+_FOLDERS = re.compile(r"category from this list: (\[.*?\])\.", re.S)
+# Response header the handler strips again: send only half of the body, then close
+_TRUNCATE = "x-mock-truncate"
+
+
+class MockGroqServer:
+    # Local stand-in for the Groq chat-completions endpoint, for benchmarks and
+    # offline runs. Latency, 5xx error rate and 429 rate are configurable; every
+    # answered name gets a deterministic category and "Low" risk. When the prompt
+    # asks for a confidence, `uncertain_rate` of the names get a low one.
+    #
+    #   with MockGroqServer(latency=0.05, rate_limit_rate=0.1) as server:
+    #       categorizer.api_url = server.url
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = 0.1, seed: Optional[int] = 0,
+                 model_latency: Optional[Dict[str, float]] = None, uncertain_rate: float = 0.2,
+                 rate_limit_first: int = 0, answers: Optional[Dict[str, Dict[str, Any]]] = None,
+                 garbage_first: int = 0, truncate_first: int = 0):
+        self.latency = latency
+        # Per-model overrides of `latency`, e.g. a faster small model
+        self.model_latency = model_latency or {}
+        self.uncertain_rate = uncertain_rate
+        self.model_requests: Dict[str, int] = {}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        # The first `rate_limit_first` requests are always answered with a 429
+        self.rate_limit_first = rate_limit_first
+        # The first `garbage_first` answered requests get a 200 with an HTML body (a proxy
+        # error page); the next `truncate_first` get a body cut short before the connection closes
+        self.garbage_first = garbage_first
+        self.truncate_first = truncate_first
+        self.garbage = 0
+        self.truncated = 0
+        # Fixed answers per program name, replacing the generated ones (e.g. out-of-vocabulary values)
+        self.answers = answers or {}
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        # Every program name the endpoint answered for, in order
+        self.names: List[str] = []
+        # (names, arrival time, answer time, status) per request, concurrent requests
+        # at peak, and the client ports seen (one per TCP connection)
+        self.log: List[Tuple[Tuple[str, ...], float, float, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections: Set[int] = set()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/openai/v1/chat/completions"
+
+    def start(self) -> "MockGroqServer":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with mock._lock:
+                    mock.connections.add(self.client_address[1])
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                try:
+                    status, headers, payload = mock.respond(body)
+                finally:
+                    with mock._lock:
+                        mock.in_flight -= 1
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                truncate = headers.pop(_TRUNCATE, None)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "text/html" if isinstance(payload, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if truncate:
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                    data = data[:len(data) // 2]
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-groq").start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def respond(self, body: bytes):
+        arrived = time.monotonic()
+        request = json.loads(body)
+        model = request.get("model", "")
+        prompt = request["messages"][-1]["content"]
+        match = _PROGRAMS.search(prompt)
+        names = ast.literal_eval(match.group(1)) if match else []
+        latency = self.model_latency.get(model, self.latency)
+        if latency:
+            time.sleep(latency)
+        with self._lock:
+            self.requests += 1
+            self.model_requests[model] = self.model_requests.get(model, 0) + 1
+            roll = self.random.random()
+            status = 200
+            if self.requests <= self.rate_limit_first or roll < self.rate_limit_rate:
+                status = 429
+            elif roll < self.rate_limit_rate + self.error_rate:
+                status = 503
+            self.log.append((tuple(names), arrived, time.monotonic(), status))
+            if status == 429:
+                self.rate_limited += 1
+                return 429, {"retry-after": str(self.retry_after)}, {"error": {"message": "Rate limit reached"}}
+            if status == 503:
+                self.errors += 1
+                return 503, {}, {"error": {"message": "Service unavailable"}}
+            if self.garbage < self.garbage_first:
+                self.garbage += 1
+                return 200, {}, b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+            truncate = self.truncated < self.truncate_first
+            if truncate:
+                self.truncated += 1
+            else:
+                self.names.extend(names)
+
+        folders_match = _FOLDERS.search(prompt)
+        folders = ast.literal_eval(folders_match.group(1)) if folders_match else ["Utilities"]
+        results = {name: {"category": folders[sum(map(ord, name)) % len(folders)], "security": "Low"}
+                   for name in names}
+        if "'confidence'" in prompt:
+            for name, result in results.items():
+                # Deterministic per name, so the same names escalate on every run
+                uncertain = (sum(map(ord, name)) * 7919 % 1000) / 1000 < self.uncertain_rate
+                result["confidence"] = 0.4 if uncertain else 0.95
+        for name in names:
+            if name in self.answers:
+                results[name] = dict(self.answers[name])
+        content = json.dumps(results)
+        return 200, {_TRUNCATE: "1"} if truncate else {}, {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4},
+        }
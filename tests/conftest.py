@@ -0,0 +1,28 @@
+import pytest
+
+from appnort.cache_store import MemoryCacheStore
+from appnort.categorizer import Categorizer
+from benchmarks.mock_groq import MockGroqServer
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The categorizer reads and writes its cache, rules and bundles relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def mock_groq():
+    with MockGroqServer(latency=0.0) as server:
+        yield server
+
+
+@pytest.fixture
+def categorizer(workdir, mock_groq):
+    categorizer = Categorizer("test-key")
+    categorizer.cache = MemoryCacheStore()
+    categorizer.api_url = mock_groq.url
+    categorizer.client.backoff_base = 0.01
+    yield categorizer
+    categorizer.client.close()
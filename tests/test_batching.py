@@ -0,0 +1,61 @@
+import pytest
+
+from appnort.batching import (DEFAULT_TOKEN_BUDGET, MODEL_TOKEN_BUDGETS, PROMPT_OVERHEAD_TOKENS, BatchPacker,
+                              estimate_name_cost)
+
+# Same length, so every name costs the same
+NAMES = [f"Product {i:03d}" for i in range(40)]
+COST = estimate_name_cost(NAMES[0])
+
+
+def budget_for(count):
+    return PROMPT_OVERHEAD_TOKENS + count * COST
+
+
+def test_budget_comes_from_the_model():
+    assert BatchPacker("llama-3.3-70b-versatile").token_budget == MODEL_TOKEN_BUDGETS["llama-3.3-70b-versatile"]
+    assert BatchPacker("some-new-model").token_budget == DEFAULT_TOKEN_BUDGET
+    assert BatchPacker("some-new-model", token_budget=900).token_budget == 900
+
+
+@pytest.mark.parametrize("budget, sizes", [(budget_for(4), [4] * 10), (budget_for(4) - 1, [3] * 13 + [1]),
+                                           (budget_for(4) + COST - 1, [4] * 10), (budget_for(1), [1] * 40)])
+def test_batches_fill_the_budget_exactly(budget, sizes):
+    batches = BatchPacker("m", token_budget=budget).pack(NAMES)
+    assert [len(b) for b in batches] == sizes
+    assert [name for batch in batches for name in batch] == NAMES
+
+
+def test_oversized_names_get_a_batch_of_their_own():
+    huge = "X" * 4000
+    packer = BatchPacker("m", token_budget=budget_for(3))
+    assert estimate_name_cost(huge) > packer.token_budget
+    batches = packer.pack(NAMES[:2] + [huge] + NAMES[2:4] + [huge, huge])
+    assert batches == [NAMES[:2], [huge], NAMES[2:4], [huge], [huge]]
+
+
+def test_budget_below_the_prompt_overhead_still_makes_progress():
+    batches = BatchPacker("m", token_budget=10).pack(NAMES[:3])
+    assert batches == [[name] for name in NAMES[:3]]
+
+
+def test_max_items_caps_each_batch():
+    batches = BatchPacker("m", token_budget=100000, max_items=16).pack(NAMES)
+    assert [len(b) for b in batches] == [16, 16, 8]
+
+
+def test_confidence_field_costs_room():
+    plain = BatchPacker("m", token_budget=budget_for(4)).pack(NAMES[:8])
+    cascade = BatchPacker("m", token_budget=budget_for(4), with_confidence=True).pack(NAMES[:8])
+    assert [len(b) for b in plain] == [4, 4]
+    assert [len(b) for b in cascade] == [3, 3, 2]
+
+
+def test_incremental_add_and_flush():
+    packer = BatchPacker("m", token_budget=budget_for(2))
+    assert packer.add(NAMES[0]) is None
+    assert packer.add(NAMES[1]) is None
+    assert packer.pending_count == 2
+    assert packer.add(NAMES[2]) == NAMES[:2]
+    assert packer.flush() == NAMES[2:3]
+    assert packer.flush() is None and packer.pending_count == 0
@@ -0,0 +1,165 @@
+import os
+import struct
+
+import pytest
+
+from appnort import cli
+from appnort.bundle import (DEFAULT_BUNDLE_DIR, BundleError, ClassificationBundle, LayeredCacheStore,
+                            merge_bundles, write_bundle)
+from appnort.cache_store import MemoryCacheStore
+from appnort.categorizer import Categorizer
+
+ENTRIES = {
+    "git": {"category": "Development", "security": "Low"},
+    "qbittorrent": {"category": "Utilities", "security": "Medium"},
+    "zoom": {"category": "Communication", "security": "Low"},
+    "mystery": {"category": "Unknown", "security": "Unknown"},
+    "café": {"category": "Media", "security": "Low"},
+}
+
+
+def bundle_at(tmp_path, name, entries):
+    path = str(tmp_path / name)
+    write_bundle(entries.items(), path)
+    return path
+
+
+def test_write_and_read_back(tmp_path):
+    path = str(tmp_path / "shared.apnb")
+    assert write_bundle(ENTRIES.items(), path) == 4  # Unknown answers are not shared
+    assert not os.path.exists(path + ".tmp")
+
+    bundle = ClassificationBundle(path)
+    try:
+        assert len(bundle) == 4
+        assert bundle.get("git") == ENTRIES["git"]
+        assert bundle.get("café") == ENTRIES["café"]
+        assert bundle.get("mystery") is None and "mystery" not in bundle
+        assert bundle.get_many(["zoom", "absent", "git"]) == {"zoom": ENTRIES["zoom"], "git": ENTRIES["git"]}
+        keys = [key for key, _ in bundle.items()]
+        assert keys == sorted(keys, key=lambda k: k.encode("utf-8"))
+    finally:
+        bundle.close()
+
+
+def test_merge_later_bundles_win(tmp_path):
+    first = bundle_at(tmp_path, "first.apnb", {"git": {"category": "Utilities", "security": "Low"},
+                                               "vlc": {"category": "Media", "security": "Low"}})
+    second = bundle_at(tmp_path, "second.apnb", {"git": {"category": "Development", "security": "Low"},
+                                                 "putty": {"category": "Utilities", "security": "Medium"}})
+    output = str(tmp_path / "merged.apnb")
+
+    assert merge_bundles([first, second], output) == 3
+    merged = ClassificationBundle(output)
+    try:
+        assert dict(merged.items()) == {
+            "git": {"category": "Development", "security": "Low"},
+            "putty": {"category": "Utilities", "security": "Medium"},
+            "vlc": {"category": "Media", "security": "Low"},
+        }
+    finally:
+        merged.close()
+
+
+def test_local_cache_shadows_bundles(tmp_path):
+    bundle = ClassificationBundle(bundle_at(tmp_path, "shared.apnb", ENTRIES))
+    local = MemoryCacheStore()
+    local["git"] = {"category": "Utilities", "security": "Low"}
+    local["zoom"] = {"category": "Unknown", "security": "Unknown"}
+    store = LayeredCacheStore(local, [bundle])
+    try:
+        assert store.get("git")["category"] == "Utilities"
+        # A local Unknown does not hide the bundle's answer
+        assert store.get("zoom") == ENTRIES["zoom"]
+        assert store.get_many(["git", "zoom", "qbittorrent"])["qbittorrent"] == ENTRIES["qbittorrent"]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("keep", [0, 20, 60, -3])
+def test_truncated_file_is_rejected(tmp_path, keep):
+    path = bundle_at(tmp_path, "shared.apnb", ENTRIES)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:keep])
+
+    with pytest.raises(BundleError):
+        ClassificationBundle(path)
+
+
+def test_damaged_vocabulary_is_rejected(tmp_path):
+    path = bundle_at(tmp_path, "shared.apnb", ENTRIES)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    vocab_offset = struct.unpack_from("<Q", data, 24)[0]
+
+    overlong = bytearray(data)
+    overlong[vocab_offset] = 0xFF  # first string now runs into the key section
+    with open(path, 'wb') as f:
+        f.write(overlong)
+    with pytest.raises(BundleError, match="vocabulary"):
+        ClassificationBundle(path)
+
+    invalid = bytearray(data)
+    invalid[vocab_offset + 1] = 0xFF  # not UTF-8
+    with open(path, 'wb') as f:
+        f.write(invalid)
+    with pytest.raises(BundleError, match="vocabulary"):
+        ClassificationBundle(path)
+
+
+def test_import_never_overwrites_a_mounted_bundle(workdir):
+    os.makedirs("a")
+    os.makedirs("b")
+    first = bundle_at(workdir / "a", "shared.apnb", {"git": {"category": "Development", "security": "Low"}})
+    other = bundle_at(workdir / "b", "shared.apnb", {"vlc": {"category": "Media", "security": "Low"}})
+
+    assert cli.main(["bundle", "import", first]) == 0
+    assert cli.main(["bundle", "import", first]) == 0  # identical copy: nothing to do
+    assert cli.main(["bundle", "import", other]) == 0
+
+    assert sorted(os.listdir(DEFAULT_BUNDLE_DIR)) == ["shared-1.apnb", "shared.apnb"]
+    for name, key in (("shared.apnb", "git"), ("shared-1.apnb", "vlc")):
+        bundle = ClassificationBundle(os.path.join(DEFAULT_BUNDLE_DIR, name))
+        try:
+            assert key in bundle
+        finally:
+            bundle.close()
+
+
+def test_items_match_get(tmp_path):
+    bundle = ClassificationBundle(bundle_at(tmp_path, "shared.apnb", ENTRIES))
+    local = MemoryCacheStore()
+    local["git"] = {"category": "Utilities", "security": "Low"}
+    local["zoom"] = {"category": "Unknown", "security": "Unknown"}
+    local["nobody-knows"] = {"category": "Unknown", "security": "Unknown"}
+    store = LayeredCacheStore(local, [bundle])
+    try:
+        items = dict(store.items())
+        assert items == {key: store.get(key) for key in items}
+        assert items["zoom"] == ENTRIES["zoom"]
+        assert items["nobody-knows"]["category"] == "Unknown"
+        assert len(items) == 5
+    finally:
+        store.close()
+
+
+def test_export_round_trips_bundle_answers_over_local_unknowns(workdir):
+    os.makedirs("incoming")
+    shared = bundle_at(workdir / "incoming", "shared.apnb", ENTRIES)
+    assert cli.main(["bundle", "import", shared]) == 0
+
+    categorizer = Categorizer(None)
+    categorizer.cache.set("zoom", {"category": "Unknown", "security": "Unknown"})
+    categorizer.cache.set("putty", {"category": "Utilities", "security": "Medium"})
+    categorizer.cache.close()
+
+    assert cli.main(["bundle", "export", "-o", "out.apnb"]) == 0
+    exported = ClassificationBundle("out.apnb")
+    try:
+        assert exported.get("zoom") == ENTRIES["zoom"]
+        assert exported.get("putty") == {"category": "Utilities", "security": "Medium"}
+        assert len(exported) == 5
+    finally:
+        exported.close()
@@ -0,0 +1,132 @@
+import json
+import os
+
+import pytest
+
+from appnort import cache_store
+from appnort.cache_store import SQLiteCacheStore
+from appnort.normalize import canonical_name
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_store.time, "time", lambda: now[0])
+    return now
+
+
+def entry(category, security="Low"):
+    return {"category": category, "security": security}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"), ttl_seconds=100)
+    store.set("git", entry("Development"))
+    store.commit()
+    clock[0] += 60
+    store.set("vlc", entry("Media"))
+    store.commit()
+
+    clock[0] += 50  # git is 110 s old, vlc 50 s
+    assert store.get("git") is None
+    assert store.get_many(["git", "vlc"]) == {"vlc": entry("Media")}
+    assert dict(store.items()) == {"vlc": entry("Media")}
+    assert len(store) == 1
+
+    # Expired rows are deleted at the next commit
+    store.set("zoom", entry("Communication"))
+    store.commit()
+    rows = store._conn.execute("SELECT key FROM entries ORDER BY key").fetchall()
+    assert rows == [("vlc",), ("zoom",)]
+    store.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    store = SQLiteCacheStore(path, max_entries=3)
+    for key in ("git", "vlc", "zoom"):
+        clock[0] += 1
+        store.set(key, entry("Utilities"))
+        store.commit()
+
+    clock[0] += 1
+    assert store.get("git") is not None  # now more recent than vlc and zoom
+    clock[0] += 1
+    store.set("putty", entry("Utilities"))
+    store.commit()
+
+    assert sorted(key for key, _ in store.items()) == ["git", "putty", "zoom"]
+    store.close()
+    # Recency survives a restart
+    reopened = SQLiteCacheStore(path, max_entries=2)
+    clock[0] += 1
+    reopened.set("slack", entry("Communication"))
+    reopened.commit()
+    assert sorted(key for key, _ in reopened.items()) == ["putty", "slack"]
+    reopened.close()
+
+
+def test_pending_writes_are_visible_before_commit(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    store.set("git", {"category": "Development"})
+    assert store.get("git") == entry("Development", "Unknown")
+    assert store._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+    store.close()
+    reopened = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    assert reopened.get("git") == entry("Development", "Unknown")
+    reopened.close()
+
+
+def test_migrate_json(tmp_path):
+    legacy = tmp_path / "category_cache.json"
+    legacy.write_text(json.dumps({
+        "Git": {"category": "Development", "security": "Low"},
+        "VLC media player": "Media",  # the oldest format: category only
+        "broken": 42,
+    }))
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+
+    assert store.migrate_json(str(legacy), canonical_name) == 3
+    assert store.get("git") == entry("Development")
+    assert store.get("vlc media player") == entry("Media", "Unknown")
+    assert store.get("broken") is None
+    assert not os.path.exists(legacy) and os.path.exists(str(legacy) + ".bak")
+
+    # Never imported twice, even if the file comes back
+    legacy.write_text(json.dumps({"Git": "Games"}))
+    assert store.migrate_json(str(legacy), canonical_name) == 0
+    assert store.get("git") == entry("Development")
+    store.close()
+
+
+def test_migrate_json_keeps_the_known_entry_on_collision(tmp_path):
+    legacy = tmp_path / "category_cache.json"
+    legacy.write_text(json.dumps({
+        "7-Zip 23.01 (x64)": {"category": "Utilities", "security": "Low"},
+        "7-Zip 24.07": {"category": "Unknown", "security": "Unknown"},
+        "Zoom": {"category": "Unknown", "security": "Unknown"},
+        "Zoom (x86)": {"category": "Communication", "security": "Low"},
+        "Zoom (64-bit)": "Communication",
+        "Git 2.40.1": {"category": "Utilities", "security": "Low"},
+        "Git version 2.45.0": {"category": "Development", "security": "Low"},
+    }))
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    store.migrate_json(str(legacy), canonical_name)
+
+    assert store.get("7-zip") == entry("Utilities")
+    # A category-only legacy entry does not replace one with a risk rating either
+    assert store.get("zoom") == entry("Communication")
+    # Equally known: the later entry wins, as before
+    assert store.get("git 2") == entry("Development")
+    store.close()
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2, 3]"])
+def test_migrate_json_tolerates_corrupt_files(tmp_path, content):
+    legacy = tmp_path / "category_cache.json"
+    legacy.write_text(content)
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    assert store.migrate_json(str(legacy)) == 0
+    assert len(store) == 0
+    assert store.get_meta("migrated_json") == str(legacy)
+    store.close()
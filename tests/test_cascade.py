@@ -0,0 +1,72 @@
+from collections import Counter
+
+import pytest
+
+from appnort.dispatcher import BatchDispatcher
+from benchmarks.mock_groq import MockGroqServer
+
+NAMES = [f"Cascade Product {i}" for i in range(40)]
+
+
+def uncertain(name, rate=0.2):
+    # MockGroqServer's deterministic low-confidence pick
+    return (sum(map(ord, name)) * 7919 % 1000) / 1000 < rate
+
+
+def dispatch(categorizer, names, size=10):
+    settled = {}
+    dispatcher = BatchDispatcher(categorizer, max_workers=2)
+    for _, results in dispatcher.dispatch([names[i:i + size] for i in range(0, len(names), size)]):
+        settled.update(results)
+    return settled, dispatcher
+
+
+@pytest.fixture
+def cascade(categorizer):
+    categorizer.cascade = True
+    return categorizer
+
+
+def test_uncertain_names_escalate_to_the_large_model(cascade, mock_groq):
+    settled, dispatcher = dispatch(cascade, NAMES)
+
+    escalated = {name for name in NAMES if uncertain(name)}
+    assert escalated and len(escalated) < len(NAMES)
+    assert set(settled) == set(NAMES)
+    assert not dispatcher.unresolved
+    # Every name goes to the fast model once; only the unsure ones are asked again
+    counts = Counter(mock_groq.names)
+    assert {name for name, count in counts.items() if count == 2} == escalated
+    assert all(count in (1, 2) for count in counts.values())
+    assert set(mock_groq.model_requests) == {cascade.fast_model, cascade.model}
+    # Confidence is a cascade detail; it is neither returned nor cached
+    for name, entry in settled.items():
+        assert "confidence" not in entry
+        assert cascade.cache[cascade.cache_key(name)] == entry
+
+
+def test_cascade_off_sends_everything_to_one_model(categorizer, mock_groq):
+    settled, _ = dispatch(categorizer, NAMES)
+
+    assert set(settled) == set(NAMES)
+    assert set(mock_groq.model_requests) == {categorizer.model}
+    assert Counter(mock_groq.names) == Counter(NAMES)
+
+
+def test_out_of_vocabulary_answers_escalate_despite_confidence(workdir, categorizer):
+    answers = {
+        "Odd Tool": {"category": "Toys", "security": "Critical", "confidence": 0.99},
+        "Loud Tool": {"category": "  utilities ", "security": "HIGH", "confidence": 0.99},
+    }
+    with MockGroqServer(latency=0.0, uncertain_rate=0.0, answers=answers) as server:
+        categorizer.api_url = server.url
+        categorizer.cascade = True
+        settled, dispatcher = dispatch(categorizer, ["Odd Tool", "Loud Tool", "Plain Tool"])
+
+    # Vocabulary matching ignores case and whitespace, so "Loud Tool" settles on the fast tier
+    assert settled["Loud Tool"] == {"category": "Utilities", "security": "High"}
+    assert Counter(server.names) == {"Odd Tool": 2, "Loud Tool": 1, "Plain Tool": 1}
+    # The large model repeats the bad answer: it is kept as Unknown so the next scan asks again
+    assert settled["Odd Tool"] == {"category": "Unknown", "security": "Unknown"}
+    assert not dispatcher.unresolved
+
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from appnort import cli
+from appnort.bundle import write_bundle
+from appnort.registry import FakeRegistryBackend
+from appnort.scanner import Scanner
+
+
+@pytest.fixture
+def offline(workdir, monkeypatch):
+    # No API key anywhere: classification stays on cache, rules and local risk scoring
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr("appnort.scanner.Scanner", lambda: Scanner(FakeRegistryBackend.synthetic(30)))
+    return workdir
+
+
+def write_inventory(path, machine="pc1"):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"machine": machine, "programs": [
+            {"name": "Git", "version": "2.40", "publisher": "The Git Development Community"},
+            {"name": "VLC media player", "version": "3.0", "publisher": "VideoLAN"},
+        ]}, f)
+    return path
+
+
+def test_scan_writes_inventory(offline):
+    assert cli.main(["scan", "-o", "inv.json", "--machine", "pc1", "--classify", "--history", "h.db"]) == 0
+    with open("inv.json", encoding='utf-8') as f:
+        data = json.load(f)
+    assert data["machine"] == "pc1"
+    assert len(data["programs"]) == 30
+    assert all("category" in p for p in data["programs"])
+    assert os.path.exists("h.db")
+
+
+def test_audit_writes_reports(offline):
+    os.makedirs("inventories")
+    write_inventory(os.path.join("inventories", "pc1.json"))
+    write_inventory(os.path.join("inventories", "pc2.json"), machine="pc2")
+    with open(os.path.join("inventories", "broken.json"), 'w', encoding='utf-8') as f:
+        f.write("{not json")
+
+    assert cli.main(["audit", "inventories", "-o", "reports", "--format", "csv", "--workers", "1"]) == 0
+    assert sorted(os.listdir("reports")) == ["fleet_report.csv", "fleet_summary.json", "pc1.csv", "pc2.csv"]
+
+
+def test_audit_without_inventories_fails(offline, capsys):
+    assert cli.main(["audit", "missing.json"]) == 1
+    assert "No inventories" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("output, extra", [("out.csv", []), ("out.jsonl", []), ("out.txt", ["--format", "html"])])
+def test_export_succeeds(offline, output, extra):
+    write_inventory("inv.json")
+    assert cli.main(["export", "inv.json", "-o", output] + extra) == 0
+    assert os.path.getsize(output) > 0
+
+
+@pytest.mark.parametrize("inventory, output", [("missing.json", "out.csv"), ("corrupt.json", "out.csv"),
+                                               ("inv.json", os.path.join("no", "such", "dir", "out.csv"))])
+def test_export_errors_return_nonzero(offline, capsys, inventory, output):
+    write_inventory("inv.json")
+    with open("corrupt.json", 'w', encoding='utf-8') as f:
+        f.write('{"programs": 3}')
+    assert cli.main(["export", inventory, "-o", output]) == 1
+    assert "Export failed" in capsys.readouterr().err
+
+
+def test_bundle_info_reports_bad_files(offline, capsys):
+    write_bundle([("git", {"category": "Development", "security": "Low"})], "good.apnb")
+    with open("bad.apnb", 'wb') as f:
+        f.write(b"APNB" + b"\0" * 4)
+
+    assert cli.main(["bundle", "info", "good.apnb"]) == 0
+    assert cli.main(["bundle", "info", "good.apnb", "bad.apnb", "missing.apnb"]) == 1
+    captured = capsys.readouterr()
+    assert "1 classifications" in captured.out
+    assert "bad.apnb" in captured.err and "missing.apnb" in captured.err
+
+
+def test_bundle_export_to_unwritable_path_fails(offline, capsys):
+    assert cli.main(["bundle", "export", "-o", os.path.join("no", "such", "dir", "x.apnb")]) == 1
+    assert "Bundle export failed" in capsys.readouterr().err
@@ -0,0 +1,20 @@
+import json
+
+from appnort.config import ConfigManager
+
+
+def test_defaults_keep_optional_collection_off(workdir):
+    config = ConfigManager()
+    for key in ("correlate_processes", "history_enabled", "hash_executables", "metrics_enabled", "profile_scan"):
+        assert config.get(key) is False
+
+
+def test_saved_settings_override_defaults(workdir):
+    with open("config.json", 'w') as f:
+        json.dump({"history_enabled": True, "ai_max_workers": 8}, f)
+    config = ConfigManager()
+    assert config.get("history_enabled") is True and config.get("ai_max_workers") == 8
+    assert config.get("correlate_processes") is False
+
+    config.set("correlate_processes", True)
+    assert ConfigManager().get("correlate_processes") is True
@@ -0,0 +1,150 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from appnort.dispatcher import BatchDispatcher
+from benchmarks.mock_groq import MockGroqServer
+
+RETRY_AFTER = 0.3
+
+
+@pytest.fixture
+def slow_groq():
+    # Every request takes 50 ms; the first two are turned away with 429 + Retry-After
+    with MockGroqServer(latency=0.05, rate_limit_first=2, retry_after=RETRY_AFTER) as server:
+        yield server
+
+
+def make_batches(count, size=5):
+    return [[f"Product {b}-{i}" for i in range(size)] for b in range(count)]
+
+
+def test_dispatcher_honors_retry_after_and_worker_limit(categorizer, slow_groq):
+    categorizer.api_url = slow_groq.url
+    batches = make_batches(12)
+    dispatcher = BatchDispatcher(categorizer, max_workers=3)
+
+    settled = {}
+    for names, results in dispatcher.dispatch(batches):
+        settled.update(results)
+
+    assert set(settled) == {name for batch in batches for name in batch}
+    assert not dispatcher.unresolved
+    assert slow_groq.rate_limited == 2
+    assert slow_groq.requests == len(batches) + 2
+    # Each rate-limited batch is re-sent only after the advertised delay, not the 10 ms backoff
+    for names, _, answered, status in slow_groq.log:
+        if status == 429:
+            retry = next(arrived for n, arrived, _, s in slow_groq.log if n == names and s == 200)
+            assert retry - answered >= RETRY_AFTER * 0.9
+    # Batches run concurrently, but never more than max_workers at once
+    assert 2 <= slow_groq.max_in_flight <= 3
+
+
+def test_dispatcher_reuses_one_connection_pool(categorizer, slow_groq):
+    categorizer.api_url = slow_groq.url
+    session = categorizer.client.session
+    for _ in range(2):
+        list(BatchDispatcher(categorizer, max_workers=3).dispatch(make_batches(6)))
+
+    assert categorizer.client.session is session
+    # Keep-alive: 14 requests over no more connections than there are workers
+    assert slow_groq.requests == 14
+    assert len(slow_groq.connections) <= 3
+
+
+def test_start_resizes_an_existing_pool(categorizer):
+    session = categorizer.client.session
+    dispatcher = BatchDispatcher(categorizer, max_workers=16)
+    dispatcher.start()
+    dispatcher.close()
+
+    assert categorizer.client.session is session
+    assert session.get_adapter("https://api.groq.com")._pool_maxsize == 16
+    assert session.get_adapter(categorizer.api_url)._pool_maxsize == 16
+
+
+class ScriptedCategorizer:
+    # Stands in for Categorizer.request_batch: `reply(batch)` decides each answer
+    tiers = ["model"]
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.client = SimpleNamespace(pool_size=1)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request_batch(self, batch, cancel=None, model=None):
+        with self._lock:
+            self.requests.append(list(batch))
+        return self.reply(batch)
+
+
+def answer(names):
+    return {name: {"category": "Utilities", "security": "Low"} for name in names}
+
+
+def run(categorizer, batches, **kwargs):
+    dispatcher = BatchDispatcher(categorizer, max_workers=1, **kwargs)
+    reported, settled = [], {}
+    for names, results in dispatcher.dispatch(batches):
+        reported.extend(names)
+        settled.update(results)
+    return dispatcher, reported, settled
+
+
+def malformed_if_poisoned(batch):
+    # The model chokes on "Poison" and answers nothing parseable for any batch that holds it
+    return {} if "Poison" in batch else answer(batch)
+
+
+def raises_if_poisoned(batch):
+    if "Poison" in batch:
+        raise ValueError("unparseable reply")
+    return answer(batch)
+
+
+@pytest.mark.parametrize("reply", [malformed_if_poisoned, raises_if_poisoned])
+def test_bad_batches_are_halved_until_the_culprit_is_alone(reply):
+    batch = [f"App {i}" for i in range(5)] + ["Poison"] + [f"App {i}" for i in range(5, 7)]
+    categorizer = ScriptedCategorizer(reply)
+    dispatcher, reported, settled = run(categorizer, [batch])
+
+    assert sorted(len(b) for b in categorizer.requests) == [1, 1, 2, 2, 4, 4, 8]
+    assert dispatcher.unresolved == ["Poison"]
+    assert set(settled) == set(batch) - {"Poison"}
+    # Every name is reported exactly once, when it is final
+    assert sorted(reported) == sorted(batch)
+
+
+def test_only_missing_names_are_retried():
+    seen = set()
+
+    def partial(batch):
+        # First attempt leaves out two names; the retry answers them
+        result = answer(n for n in batch if n not in ("App 2", "App 5") or n in seen)
+        seen.update(batch)
+        return result
+
+    batch = [f"App {i}" for i in range(8)]
+    categorizer = ScriptedCategorizer(partial)
+    dispatcher, reported, settled = run(categorizer, [batch])
+
+    assert categorizer.requests[1:] == [["App 2"], ["App 5"]]
+    assert set(settled) == set(batch) and not dispatcher.unresolved
+    assert sorted(reported) == sorted(batch)
+
+
+def test_transport_failures_are_not_split():
+    categorizer = ScriptedCategorizer(lambda batch: None)
+    dispatcher, reported, settled = run(categorizer, make_batches(2, size=4))
+    assert len(categorizer.requests) == 2
+    assert len(dispatcher.unresolved) == 8 and settled == {}
+
+
+def test_splitting_can_be_disabled():
+    categorizer = ScriptedCategorizer(raises_if_poisoned)
+    dispatcher, _, settled = run(categorizer, [["App 1", "Poison", "App 2"]], split_on_failure=False)
+    assert len(categorizer.requests) == 1
+    assert dispatcher.unresolved == ["App 1", "Poison", "App 2"] and settled == {}
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from appnort.events import (CancelToken, ErrorEvent, EventBus, ProgramResolvedEvent, ProgressEvent, ScanCancelled,
+                            StatusEvent, cancellable_sleep)
+from appnort.groq_client import GroqClient, RateLimiter
+from benchmarks.mock_groq import MockGroqServer
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "Classify the following software programs: "
+                                                                 "['Git'].\n\nTASK"}]}
+
+
+def cancel_after(seconds):
+    cancel = CancelToken()
+    timer = threading.Timer(seconds, cancel.cancel)
+    timer.start()
+    return cancel, timer
+
+
+def test_subscribers_see_each_drained_event_until_they_unsubscribe():
+    bus = EventBus()
+    first, second = [], []
+    bus.subscribe(first.append)
+    bus.subscribe(second.append)
+
+    bus.publish(StatusEvent("one"))
+    bus.publish(ErrorEvent("boom"))
+    assert bus.drain() == [StatusEvent("one"), ErrorEvent("boom")]
+    assert first == second == [StatusEvent("one"), ErrorEvent("boom")]
+
+    bus.unsubscribe(second.append)
+    bus.unsubscribe(second.append)  # Unknown callbacks are ignored
+    bus.publish(StatusEvent("two"))
+    bus.drain()
+    assert first[-1] == StatusEvent("two")
+    assert len(second) == 2
+
+
+def test_drain_coalesces_progress_and_status():
+    bus = EventBus()
+    for i in range(100):
+        bus.publish(ProgressEvent("scan", i, None))
+        bus.publish(ProgressEvent("ai", i, 100))
+        bus.publish(ProgramResolvedEvent({"name": f"p{i}"}))
+    bus.publish(StatusEvent("old"))
+    bus.publish(StatusEvent("new"))
+
+    events = bus.drain()
+    progress = [e for e in events if isinstance(e, ProgressEvent)]
+    assert progress == [ProgressEvent("scan", 99, None), ProgressEvent("ai", 99, 100)]
+    assert [e.program["name"] for e in events if isinstance(e, ProgramResolvedEvent)] == [f"p{i}" for i in range(100)]
+    assert [e for e in events if isinstance(e, StatusEvent)] == [StatusEvent("new")]
+    assert bus.drain() == []
+
+
+def test_drain_stops_at_max_events():
+    bus = EventBus()
+    for i in range(5):
+        bus.publish(ErrorEvent(str(i)))
+    assert [e.message for e in bus.drain(max_events=3)] == ["0", "1", "2"]
+    assert [e.message for e in bus.drain()] == ["3", "4"]
+
+
+def test_events_published_from_workers_reach_the_draining_thread():
+    bus = EventBus()
+    received, threads_seen = [], set()
+    bus.subscribe(lambda event: threads_seen.add(threading.get_ident()))
+
+    def worker(n):
+        for i in range(500):
+            bus.publish(ProgramResolvedEvent((n, i)))
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in workers:
+        t.start()
+    while any(t.is_alive() for t in workers) or len(received) < 8 * 500:
+        received.extend(e.program for e in bus.drain())
+        time.sleep(0.001)
+    for t in workers:
+        t.join()
+
+    assert sorted(received) == [(n, i) for n in range(8) for i in range(500)]
+    # Each worker's events keep their order
+    for n in range(8):
+        assert [i for m, i in received if m == n] == list(range(500))
+    assert threads_seen == {threading.get_ident()}
+
+
+def test_cancel_token():
+    cancel = CancelToken()
+    cancel.raise_if_cancelled()
+    assert not cancel.cancelled
+    assert cancel.sleep(0.01) is False
+
+    cancel.cancel()
+    assert cancel.cancelled
+    with pytest.raises(ScanCancelled):
+        cancel.raise_if_cancelled()
+    assert cancel.sleep(30) is True
+
+
+def test_cancellable_sleep():
+    start = time.monotonic()
+    cancellable_sleep(0.05)
+    cancellable_sleep(-1, CancelToken())
+    assert time.monotonic() - start >= 0.05
+
+    cancel, timer = cancel_after(0.1)
+    start = time.monotonic()
+    with pytest.raises(ScanCancelled):
+        cancellable_sleep(30, cancel)
+    timer.join()
+    assert time.monotonic() - start < 5
+
+
+def test_cancel_interrupts_rate_limiter_wait():
+    limiter = RateLimiter()
+    limiter.pause(30)
+    cancel, timer = cancel_after(0.1)
+    start = time.monotonic()
+    with pytest.raises(ScanCancelled):
+        limiter.wait(cancel)
+    timer.join()
+    assert time.monotonic() - start < 5
+
+
+def test_cancel_interrupts_post_chat_waiting_on_rate_limit():
+    client = GroqClient(max_retries=2)
+    client.rate_limiter.pause(30)
+    cancel, timer = cancel_after(0.1)
+    with MockGroqServer(latency=0.0) as server:
+        with pytest.raises(ScanCancelled):
+            client.post_chat(server.url, "key", PAYLOAD, cancel=cancel)
+    timer.join()
+    client.close()
+    assert server.requests == 0
+
+
+def test_cancel_interrupts_post_chat_backoff(monkeypatch):
+    client = GroqClient(max_retries=2)
+    monkeypatch.setattr(client, "_backoff", lambda attempt: 30.0)
+    cancel, timer = cancel_after(0.2)
+    start = time.monotonic()
+    with MockGroqServer(latency=0.0, garbage_first=10) as server:
+        with pytest.raises(ScanCancelled):
+            client.post_chat(server.url, "key", PAYLOAD, cancel=cancel)
+    timer.join()
+    client.close()
+    assert server.requests == 1
+    assert time.monotonic() - start < 5
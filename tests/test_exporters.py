@@ -0,0 +1,148 @@
+import csv
+import gc
+import json
+from html.parser import HTMLParser
+
+import pytest
+
+from appnort.events import CancelToken, ScanCancelled
+from appnort.exporters import EXPORT_FIELDS, EXPORTERS, PROGRESS_EVERY, get_exporter
+
+PROGRAMS = [
+    {"name": "Git", "version": "2.40", "publisher": "The Git Development Community", "category": "Development",
+     "security": "Low", "install_date": "20240101", "size_kb": 51234, "location": "C:\\Program Files\\Git",
+     "os": "Windows"},
+    {"name": 'Tricky, "quoted"\nname', "version": "1.0", "publisher": "Quote's & Co", "category": "Utilities",
+     "security": 'High" onmouseover="alert(1)', "install_date": None, "size_kb": None, "location": "",
+     "os": "Windows"},
+    {"name": "Café <b>Bold</b>", "version": None, "publisher": "Ünïcode GmbH", "category": "Media",
+     "security": "Medium", "install_date": "20231231", "size_kb": 0, "location": "/opt/cafe", "os": "Linux"},
+]
+
+
+def text(value):
+    return "" if value is None else str(value)
+
+
+class TableReader(HTMLParser):
+    # Cell texts and class attributes of every body row
+    def __init__(self):
+        super().__init__()
+        self.rows, self.classes = [], []
+        self._in_body = self._in_cell = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tbody":
+            self._in_body = True
+        elif self._in_body and tag == "tr":
+            self.rows.append([])
+            self.classes.append([])
+        elif self._in_body and tag == "td":
+            self._in_cell = True
+            self.rows[-1].append("")
+            self.classes[-1].append(dict(attrs).get("class"))
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            self._in_cell = False
+        elif tag == "tbody":
+            self._in_body = False
+
+    def handle_data(self, data):
+        if self._in_cell:
+            self.rows[-1][-1] += data
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        header, *rows = list(csv.reader(f))
+    assert header == EXPORT_FIELDS
+    assert rows == [[text(p[field]) for field in EXPORT_FIELDS] for p in PROGRAMS]
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == PROGRAMS
+
+
+def read_html(path):
+    reader = TableReader()
+    with open(path, encoding='utf-8') as f:
+        reader.feed(f.read())
+    assert reader.rows == [[text(p[field]) for field in EXPORT_FIELDS] for p in PROGRAMS]
+    security = EXPORT_FIELDS.index("security")
+    # Only the known risk levels become class names; anything else gets none
+    assert [classes[security] for classes in reader.classes] == ["Low", None, "Medium"]
+    assert all(c is None for classes in reader.classes for i, c in enumerate(classes) if i != security)
+
+
+def read_xlsx(path):
+    openpyxl = pytest.importorskip("openpyxl")
+    sheet = openpyxl.load_workbook(path, read_only=True)["Programs"]
+    header, *rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert header == EXPORT_FIELDS
+    # Empty strings come back as empty cells
+    assert rows == [[p[field] if p[field] != "" else None for field in EXPORT_FIELDS] for p in PROGRAMS]
+
+
+def read_pdf(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.startswith(b"%PDF") and data.rstrip().endswith(b"%%EOF")
+    assert b"(Git)" in data and b"(The Git Development Community)" in data
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "html": read_html, "xlsx": read_xlsx, "pdf": read_pdf}
+
+
+def test_every_registered_format_has_a_round_trip_test():
+    assert set(READERS) == set(EXPORTERS)
+
+
+@pytest.mark.parametrize("fmt", sorted(READERS))
+def test_round_trip(tmp_path, monkeypatch, fmt):
+    exporter = get_exporter(fmt)
+    if not exporter.available():
+        pytest.skip(f"{fmt} exporter is not available")
+    if fmt == "pdf":
+        from reportlab import rl_config
+        monkeypatch.setattr(rl_config, "pageCompression", 0)
+    path = str(tmp_path / f"out{exporter.extension}")
+
+    assert exporter.export(iter(PROGRAMS), path) == len(PROGRAMS)
+    READERS[fmt](path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"out{exporter.extension}"]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "html", "xlsx"])
+def test_cancelled_export_keeps_the_previous_file(tmp_path, fmt):
+    exporter = get_exporter(fmt)
+    if not exporter.available():
+        pytest.skip(f"{fmt} exporter is not available")
+    path = tmp_path / f"out{exporter.extension}"
+    path.write_bytes(b"previous export")
+    cancel = CancelToken()
+    cancel.cancel()
+
+    with pytest.raises(ScanCancelled):
+        exporter.export(PROGRAMS * PROGRESS_EVERY, str(path), cancel=cancel)
+    assert path.read_bytes() == b"previous export"
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+# openpyxl's write-only sheet complains when its abandoned row writer is collected
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "html", "xlsx"])
+def test_failed_export_leaves_nothing_behind(tmp_path, fmt):
+    exporter = get_exporter(fmt)
+    if not exporter.available():
+        pytest.skip(f"{fmt} exporter is not available")
+
+    def rows():
+        yield from PROGRAMS
+        raise RuntimeError("inventory went away")
+
+    with pytest.raises(RuntimeError):
+        exporter.export(rows(), str(tmp_path / f"out{exporter.extension}"))
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
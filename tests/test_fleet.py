@@ -0,0 +1,69 @@
+import json
+import os
+
+from appnort.categorizer import Categorizer
+from appnort.cache_store import MemoryCacheStore
+from appnort.fleet import FleetAuditor, MachineInventory, find_inventories
+from appnort.planner import ScanPlanner
+
+
+def offline_auditor():
+    categorizer = Categorizer(None)
+    categorizer.cache = MemoryCacheStore()
+    return FleetAuditor(ScanPlanner(categorizer), report_workers=1)
+
+
+def fleet():
+    return [
+        MachineInventory("pc1", [
+            {"name": "Remote Desktop Helper", "publisher": "Microsoft Corporation"},
+            {"name": "Git", "publisher": "The Git Development Community"},
+        ]),
+        MachineInventory("pc2", [
+            {"name": "Remote Desktop Helper", "publisher": "Shady Ltd"},
+            {"name": "Git", "publisher": "The Git Development Community"},
+        ]),
+        MachineInventory("pc3", [
+            {"name": "Remote Desktop Helper", "publisher": "Microsoft Corporation"},
+        ]),
+    ]
+
+
+def test_classify_dedups_by_name_and_publisher(workdir):
+    auditor = offline_auditor()
+    inventories = auditor.classify(fleet())
+
+    assert auditor.unique_count == 3
+    helper = {inv.machine: inv.programs[0] for inv in inventories}
+    # Same name, different publishers: each is scored with its own publisher
+    assert helper["pc1"]["security"] == "Low"
+    assert helper["pc2"]["security"] == "Medium"
+    assert helper["pc3"]["security"] == helper["pc1"]["security"]
+    assert inventories[0].programs[1]["category"] == inventories[1].programs[1]["category"] == "Development"
+
+
+def test_summarize_keeps_publishers_apart(workdir):
+    auditor = offline_auditor()
+    summary = auditor.summarize(auditor.classify(fleet()))
+
+    products = [(p["name"], p["publisher"], p["security"], p["machines"]) for p in summary["products"]]
+    assert products == [
+        ("Git", "The Git Development Community", "Low", 2),
+        ("Remote Desktop Helper", "Microsoft Corporation", "Low", 2),
+        ("Remote Desktop Helper", "Shady Ltd", "Medium", 1),
+    ]
+    assert summary["totals"] == {"machines": 3, "installs": 5, "unique_products": 3,
+                                 "risk": {"Low": 4, "Medium": 1}}
+    assert [m["programs"] for m in summary["machines"]] == [2, 2, 1]
+
+
+def test_load_accepts_both_shapes(tmp_path):
+    (tmp_path / "bare.json").write_text(json.dumps([{"name": "Git"}, {"version": "no name"}, "junk"]))
+    (tmp_path / "wrapped.json").write_text(json.dumps({"machine": "pc9", "programs": [{"name": "Vim"}]}))
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    paths = find_inventories([str(tmp_path)])
+    assert [os.path.basename(p) for p in paths] == ["bare.json", "wrapped.json"]
+    bare, wrapped = (MachineInventory.load(p) for p in paths)
+    assert (bare.machine, len(bare.programs)) == ("bare", 1)
+    assert (wrapped.machine, wrapped.programs[0]["name"]) == ("pc9", "Vim")
@@ -0,0 +1,51 @@
+import pytest
+
+from appnort.groq_client import GroqClient, parse_duration
+from benchmarks.mock_groq import MockGroqServer
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "Classify the following software programs: "
+                                                                 "['Git'].\n\nTASK"}]}
+
+
+@pytest.fixture
+def client():
+    client = GroqClient(max_retries=2, backoff_base=0.01)
+    yield client
+    client.close()
+
+
+def test_non_json_body_is_retried(client):
+    with MockGroqServer(latency=0.0, garbage_first=1) as server:
+        data = client.post_chat(server.url, "key", PAYLOAD)
+    assert server.garbage == 1 and server.requests == 2
+    assert "Git" in data["choices"][0]["message"]["content"]
+
+
+def test_non_json_body_gives_up_after_retries(client, capsys):
+    with MockGroqServer(latency=0.0, garbage_first=10) as server:
+        assert client.post_chat(server.url, "key", PAYLOAD) is None
+    assert server.requests == 3
+    assert "not JSON" in capsys.readouterr().out
+
+
+def test_truncated_body_is_retried(client):
+    # Content-Length promises more than arrives: ChunkedEncodingError, not a connection error
+    with MockGroqServer(latency=0.0, truncate_first=2) as server:
+        data = client.post_chat(server.url, "key", PAYLOAD)
+    assert server.truncated == 2 and server.requests == 3
+    assert data["choices"]
+
+
+def test_truncated_body_gives_up_after_retries(client):
+    with MockGroqServer(latency=0.0, truncate_first=10) as server:
+        assert client.post_chat(server.url, "key", PAYLOAD) is None
+    assert server.requests == 3
+
+
+@pytest.mark.parametrize("value, seconds", [("7.66s", 7.66), ("2m59.56s", 179.56), ("120ms", 0.12), ("3", 3.0),
+                                            ("", None), ("soon", None)])
+def test_parse_duration(value, seconds):
+    if seconds is None:
+        assert parse_duration(value) is None
+    else:
+        assert parse_duration(value) == pytest.approx(seconds)
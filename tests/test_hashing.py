@@ -0,0 +1,117 @@
+import hashlib
+import os
+
+import pytest
+
+from appnort.events import CancelToken, ScanCancelled
+from appnort.hashing import ExecutableHasher, HashCache
+
+
+@pytest.fixture
+def install(tmp_path):
+    root = tmp_path / "Program Files" / "Example"
+    (root / "bin").mkdir(parents=True)
+    (root / "app.exe").write_bytes(b"MZ" + b"a" * 5000)
+    (root / "bin" / "core.dll").write_bytes(b"MZ" + b"b" * 70000)
+    (root / "readme.txt").write_text("not hashed")
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HashCache(str(tmp_path / "hash_cache.db"))
+    yield cache
+    cache.close()
+
+
+def enrich(cache, root, **options):
+    # Registry values often come quoted and with a trailing separator
+    program = {"name": "Example", "location": f'"{root}{os.sep}"'}
+    stats = ExecutableHasher(cache, max_workers=2, **options).enrich([program])
+    return stats, {os.path.basename(e["path"]): e["sha256"] for e in program["executables"]}
+
+
+def test_rescan_reuses_unchanged_digests(cache, install):
+    stats, digests = enrich(cache, install)
+    assert (stats["hashed"], stats["cached"]) == (2, 0)
+    assert digests == {"app.exe": hashlib.sha256((install / "app.exe").read_bytes()).hexdigest(),
+                       "core.dll": hashlib.sha256((install / "bin" / "core.dll").read_bytes()).hexdigest()}
+
+    stats, again = enrich(cache, install)
+    assert (stats["hashed"], stats["cached"]) == (0, 2)
+    assert again == digests
+
+
+def test_size_change_invalidates(cache, install):
+    enrich(cache, install)
+    (install / "app.exe").write_bytes(b"MZ" + b"c" * 6000)
+    stats, digests = enrich(cache, install)
+    assert (stats["hashed"], stats["cached"]) == (1, 1)
+    assert digests["app.exe"] == hashlib.sha256(b"MZ" + b"c" * 6000).hexdigest()
+
+
+def test_mtime_change_invalidates(cache, install):
+    enrich(cache, install)
+    path = install / "app.exe"
+    # Same size, new content, newer mtime
+    path.write_bytes(b"MZ" + b"d" * 5000)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    stats, digests = enrich(cache, install)
+    assert (stats["hashed"], stats["cached"]) == (1, 1)
+    assert digests["app.exe"] == hashlib.sha256(b"MZ" + b"d" * 5000).hexdigest()
+
+
+def test_get_many_checks_size_and_mtime(cache):
+    cache.set("/x/app.exe", 10, 100, "digest")
+    cache.commit()
+    assert cache.get_many([("/x/app.exe", 10, 100)]) == {"/x/app.exe": "digest"}
+    assert cache.get_many([("/x/app.exe", 11, 100)]) == {}
+    assert cache.get_many([("/x/app.exe", 10, 101)]) == {}
+
+
+def test_limits_leave_files_undigested(cache, install):
+    stats, digests = enrich(cache, install, max_file_size=10000)
+    assert stats["too_large"] == 1 and digests["core.dll"] is None
+    stats, digests = enrich(None, install, io_budget=6000)
+    assert stats["over_budget"] == 1 and digests["core.dll"] is None
+    stats, digests = enrich(None, install, mmap_threshold=1)
+    assert digests["core.dll"] == hashlib.sha256((install / "bin" / "core.dll").read_bytes()).hexdigest()
+
+
+def cached_paths(cache):
+    return sorted(os.path.basename(row[0]) for row in cache._conn.execute("SELECT path FROM digests"))
+
+
+def test_digests_of_vanished_files_are_pruned(cache, install, tmp_path):
+    other = tmp_path / "Program Files" / "Other"
+    other.mkdir()
+    (other / "other.exe").write_bytes(b"MZ" + b"o" * 100)
+    programs = [{"name": "Example", "location": str(install)}, {"name": "Other", "location": str(other)}]
+    ExecutableHasher(cache, max_workers=2).enrich(programs)
+    assert cached_paths(cache) == ["app.exe", "core.dll", "other.exe"]
+
+    # Other is uninstalled and core.dll removed by an update
+    os.remove(install / "bin" / "core.dll")
+    stats = ExecutableHasher(cache, max_workers=2).enrich(programs[:1])
+    assert (stats["cached"], stats["pruned"]) == (1, 2)
+    assert cached_paths(cache) == ["app.exe"]
+
+
+def test_pruning_can_be_disabled(cache, install):
+    enrich(cache, install)
+    stats = ExecutableHasher(cache, prune_cache=False).enrich([])
+    assert stats["pruned"] == 0
+    assert cached_paths(cache) == ["app.exe", "core.dll"]
+
+
+def test_cancelled_run_keeps_the_cache(cache, install, tmp_path):
+    enrich(cache, install)
+    cancel = CancelToken()
+    cancel.cancel()
+    fresh = tmp_path / "Fresh"
+    fresh.mkdir()
+    (fresh / "new.exe").write_bytes(b"MZ")
+    with pytest.raises(ScanCancelled):
+        ExecutableHasher(cache).enrich([{"name": "Fresh", "location": str(fresh)}], cancel=cancel)
+    assert "app.exe" in cached_paths(cache)
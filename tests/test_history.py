@@ -0,0 +1,170 @@
+import itertools
+
+import pytest
+
+from appnort import history as history_module
+from appnort.history import ScanHistory
+
+
+def program(name, version, security="Low", publisher="Vendor", category="Utilities"):
+    return {"name": name, "version": version, "security": security, "publisher": publisher,
+            "category": category, "os": "Windows"}
+
+
+BASE = [program("Git", "2.40"), program("Python 3.11", "3.11.4"), program("Python 3.12", "3.12.1")]
+
+# One inventory per scan. Between scans: an upgrade with a risk change, an
+# uninstall and reinstall, a brand new program, a removal, and a side-by-side
+# install of another version with a different risk.
+SCANS = [
+    BASE + [program("Tool", "1.0"), program("Viewer", "5.0")],
+    BASE + [program("Tool", "1.0"), program("Viewer", "5.0")],
+    BASE + [program("Tool", "2.0", "High")],
+    BASE + [program("Tool", "2.0", "High"), program("Viewer", "5.0"), program("Torrent", "4.6", "Medium")],
+    BASE + [program("Tool", "2.0", "High"), program("Viewer", "5.0"), program("Torrent", "4.6", "Medium"),
+            program("Python 3.13", "3.13.0", "Medium")],
+    [p for p in BASE if p["name"] != "Git"] + [program("Tool", "2.1", "Low"), program("Viewer", "5.0"),
+                                                  program("Python 3.13", "3.13.0", "Medium")],
+]
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ScanHistory(str(tmp_path / "history.db"))
+    history.scan_ids = [history.record(programs, machine="pc1", taken=1000.0 + i * 86400)
+                        for i, programs in enumerate(SCANS)]
+    yield history
+    history.close()
+
+
+def comparable(diff):
+    return {key: diff[key] for key in ("added", "removed", "changed")}
+
+
+def names(programs):
+    return [p["name"] for p in programs]
+
+
+def test_programs_at_returns_each_recorded_inventory(history):
+    for scan_id, programs in zip(history.scan_ids, SCANS):
+        recorded = sorted(history.programs_at(scan_id), key=lambda p: p["name"])
+        assert recorded == sorted(programs, key=lambda p: p["name"])
+
+
+def test_diff_reports_upgrades_as_changes(history):
+    first, second, third = history.scan_ids[:3]
+    assert comparable(history.diff(first, second)) == {"added": [], "removed": [], "changed": []}
+
+    diff = history.diff(second, third)
+    assert names(diff["removed"]) == ["Viewer"]
+    assert diff["added"] == []
+    (change,) = diff["changed"]
+    assert change["before"]["version"] == "1.0" and change["after"]["version"] == "2.0"
+    assert change["fields"] == ["version", "security"]
+
+    # Viewer was uninstalled and reinstalled in between: no net difference
+    assert names(history.diff(second, history.scan_ids[3])["added"]) == ["Torrent"]
+    # Reversed order swaps added and removed
+    backwards = history.diff(third, second)
+    assert names(backwards["added"]) == ["Viewer"]
+    assert backwards["changed"][0]["after"]["version"] == "1.0"
+
+
+def test_diff_is_unchanged_by_compaction(history):
+    kept = history.scan_ids[-3:]
+    before = {(a, b): comparable(history.diff(a, b)) for a, b in itertools.permutations(kept, 2)}
+    before_programs = {scan_id: history.programs_at(scan_id) for scan_id in kept}
+
+    # Tool 1.0 was last seen in the second scan
+    assert history.compact(keep_scans=3) == {"scans": 3, "rows": 1}
+
+    assert [scan["id"] for scan in history.scans("pc1")] == kept
+    for (a, b), diff in before.items():
+        assert comparable(history.diff(a, b)) == diff
+    for scan_id, programs in before_programs.items():
+        assert history.programs_at(scan_id) == programs
+    with pytest.raises(KeyError):
+        history.diff(history.scan_ids[0], kept[-1])
+
+
+def test_compaction_drops_versions_no_kept_scan_has(history):
+    result = history.compact(keep_scans=1)
+    assert result["scans"] == 5
+    # Git 2.40, Tool 1.0, Tool 2.0 and Torrent 4.6 are gone from every kept scan
+    assert result["rows"] == 4
+    assert sorted(names(history.programs_at(history.scan_ids[-1]))) == sorted(names(SCANS[-1]))
+    # First sightings survive compaction
+    (git,) = history.product_history("Git", machine="pc1")
+    assert git["first_scan"] == history.scan_ids[0]
+    assert not git["present"]
+
+
+def test_compaction_by_age_keeps_the_newest_scan(history):
+    now = 1000.0 + 10 * 86400
+    assert history.compact(max_age_days=1, now=now)["scans"] == 5
+    assert [scan["id"] for scan in history.scans("pc1")] == history.scan_ids[-1:]
+
+
+def test_risk_changes(history):
+    changes = history.risk_changes(machine="pc1")
+    assert [(c["name"], c["version"], c["before"], c["after"], c["scan"]) for c in changes] == [
+        ("Tool", "2.0", "Low", "High", history.scan_ids[2]),
+        ("Tool", "2.1", "High", "Low", history.scan_ids[5]),
+    ]
+    assert [c["version"] for c in history.risk_changes("Tool")] == ["2.0", "2.1"]
+    # A new Python next to the old ones is not a replacement, whatever its risk
+    assert history.risk_changes("Python 3.13") == []
+    assert history.risk_changes(machine="other") == []
+
+
+def test_risk_changes_after_compaction(history):
+    history.compact(keep_scans=3)
+    # The Low -> High upgrade happened before the oldest kept scan and is forgotten;
+    # the later one is still between two kept scans
+    changes = history.risk_changes(machine="pc1")
+    assert [(c["version"], c["before"], c["after"]) for c in changes] == [("2.1", "High", "Low")]
+
+
+def test_diff_between_machines_compares_full_inventories(history):
+    other = history.record(SCANS[0][:2], machine="pc2", taken=5000.0)
+    diff = history.diff(history.scan_ids[0], other)
+    assert sorted(names(diff["removed"])) == ["Python 3.12", "Tool", "Viewer"]
+    assert diff["added"] == [] and diff["changed"] == []
+
+
+def bulky_history(path, scans=4, programs=600):
+    # Every scan upgrades every program, so compaction frees most of the file
+    history = ScanHistory(path)
+    ids = [history.record([program(f"App {n}", f"{s}.0", publisher="Vendor " + "x" * 40) for n in range(programs)],
+                          machine="pc1", taken=1000.0 + s) for s in range(scans)]
+    return history, ids
+
+
+def pages(history, pragma):
+    return history._conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+
+
+def test_compaction_vacuums_once_enough_is_free(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_module, "VACUUM_MIN_FREE_PAGES", 16)
+    history, ids = bulky_history(str(tmp_path / "history.db"))
+    before = pages(history, "page_count")
+    assert history.compact(keep_scans=1)["rows"] == 1800
+    assert pages(history, "freelist_count") == 0
+    assert pages(history, "page_count") < before / 2
+    assert len(history.programs_at(ids[-1])) == 600
+    history.close()
+
+
+def test_compaction_skips_vacuum_below_the_threshold(tmp_path, monkeypatch):
+    history, ids = bulky_history(str(tmp_path / "history.db"))
+    monkeypatch.setattr(history_module, "VACUUM_MIN_FREE_PAGES", 10 ** 6)
+    before = pages(history, "page_count")
+    history.compact(keep_scans=3)
+
+    # The freed pages stay in the file for the next scans to reuse
+    free = pages(history, "freelist_count")
+    assert free > 0
+    assert pages(history, "page_count") == before
+    history.record([program(f"App {n}", "9.0") for n in range(100)], machine="pc1", taken=9999.0)
+    assert pages(history, "freelist_count") < free
+    history.close()
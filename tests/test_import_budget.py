@@ -0,0 +1,54 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Network, PDF and browser libraries load on first use only
+ENTRY_POINT_FORBIDDEN = ["requests", "reportlab", "webbrowser", "openpyxl", "psutil"]
+ENTRY_POINT_MAX_MODULES = 250
+ENTRY_POINT_SECONDS = 1.0
+# The scanner/categorizer core is also GUI-free, so the CLI and workers never load Tk
+CORE_FORBIDDEN = ENTRY_POINT_FORBIDDEN + ["customtkinter", "tkinter"]
+CORE_MAX_MODULES = 200
+CORE_SECONDS = 0.5
+
+
+def measure_imports(modules, forbidden, repeat=3):
+    # Fresh interpreter per run; returns the median import time, modules loaded and forbidden ones present
+    code = (
+        "import json, sys, time\n"
+        "before = set(sys.modules)\n"
+        "start = time.perf_counter()\n"
+        f"for name in {modules!r}: __import__(name)\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"present = sorted(m for m in {forbidden!r} if m in sys.modules)\n"
+        "print(json.dumps([elapsed, len(set(sys.modules) - before), present]))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT,
+                             check=True)
+        runs.append(json.loads(out.stdout))
+    return statistics.median(r[0] for r in runs), max(r[1] for r in runs), sorted({m for r in runs for m in r[2]})
+
+
+def test_entry_points_defer_heavy_imports():
+    pytest.importorskip("customtkinter")
+    elapsed, loaded, present = measure_imports(["appnort.main", "appnort.cli"], ENTRY_POINT_FORBIDDEN)
+    assert present == []
+    assert loaded <= ENTRY_POINT_MAX_MODULES
+    assert elapsed <= ENTRY_POINT_SECONDS
+
+
+def test_core_is_gui_free():
+    elapsed, loaded, present = measure_imports(["appnort.scanner", "appnort.categorizer", "appnort.cli"],
+                                               CORE_FORBIDDEN)
+    assert present == []
+    assert loaded <= CORE_MAX_MODULES
+    assert elapsed <= CORE_SECONDS
@@ -0,0 +1,44 @@
+import pytest
+
+from appnort.bundle import LayeredCacheStore
+from appnort.cache_store import CacheStore, MemoryCacheStore, SQLiteCacheStore
+from appnort.exporters import EXPORTERS, Exporter, RowExporter
+from appnort.registry import FakeRegistryBackend, RegistryBackend
+
+
+def test_incomplete_cache_store_fails_on_creation():
+    class GetOnly(CacheStore):
+        def get(self, key, default=None):
+            return default
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_incomplete_registry_backend_fails_on_creation():
+    class Empty(RegistryBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Empty()
+
+
+def test_incomplete_exporters_fail_on_creation():
+    class NoExport(Exporter):
+        format = "none"
+
+    class NoRows(RowExporter):
+        format = "rows"
+
+    with pytest.raises(TypeError):
+        NoExport()
+    with pytest.raises(TypeError):
+        NoRows()
+
+
+def test_shipped_implementations_are_complete(tmp_path):
+    MemoryCacheStore()
+    SQLiteCacheStore(str(tmp_path / "cache.db")).close()
+    LayeredCacheStore(MemoryCacheStore(), [])
+    FakeRegistryBackend({})
+    assert set(EXPORTERS) >= {"pdf", "csv", "jsonl", "html", "xlsx"}
@@ -0,0 +1,118 @@
+import random
+from collections import Counter
+
+import pytest
+
+from appnort.inventory import Inventory
+
+CATEGORIES = ["Development", "Games", "Utilities", "Unknown", None]
+RISKS = ["Low", "Medium", "High", "Unknown"]
+
+
+def synthetic_programs(count, seed=0):
+    rng = random.Random(seed)
+    programs = []
+    for i in range(count):
+        program = {"name": f"Program {i}", "version": f"{i % 5}.0", "os": "Windows",
+                   "publisher": rng.choice(["Microsoft", "Mozilla", "Unknown", "Vendor Ltd"])}
+        category = rng.choice(CATEGORIES)
+        if category is not None:
+            program["category"] = category
+        if rng.random() < 0.8:
+            program["security"] = rng.choice(RISKS)
+        if rng.random() < 0.5:
+            program["size_kb"] = rng.randint(0, 10 ** 6)
+        if rng.random() < 0.1:
+            program["executables"] = [{"path": f"C:\\Program {i}\\app.exe"}]
+        programs.append(program)
+    # Values that do not fit their column end up in the side table
+    programs[1]["category"] = 42
+    programs[2]["security"] = None
+    programs[3]["size_kb"] = "large"
+    programs[4]["system_component"] = "yes"
+    return programs
+
+
+def reference_group_by(programs, field, missing="Unknown"):
+    groups = {}
+    for i, program in enumerate(programs):
+        groups.setdefault(program.get(field, missing), []).append(i)
+    return groups
+
+
+def reference_filter(programs, **criteria):
+    return [i for i, program in enumerate(programs)
+            if all(program.get(field) == wanted for field, wanted in criteria.items())]
+
+
+@pytest.fixture
+def programs():
+    return synthetic_programs(500)
+
+
+def test_rows_read_back_as_the_original_dicts(programs):
+    inventory = Inventory(programs)
+
+    assert len(inventory) == len(programs)
+    assert inventory.to_dicts() == programs
+    assert [dict(row) for row in inventory[10:20]] == programs[10:20]
+    assert inventory[-1]["name"] == programs[-1]["name"]
+
+
+@pytest.mark.parametrize("field", ["category", "security", "publisher", "size_kb", "system_component", "source"])
+def test_counts_match_list_of_dicts(programs, field):
+    inventory = Inventory(programs)
+    assert inventory.counts(field) == dict(Counter(p.get(field, "Unknown") for p in programs))
+
+
+@pytest.mark.parametrize("field", ["category", "security", "publisher", "size_kb"])
+def test_group_by_matches_list_of_dicts(programs, field):
+    inventory = Inventory(programs)
+    assert inventory.group_by(field) == reference_group_by(programs, field)
+
+
+@pytest.mark.parametrize("criteria", [
+    {"security": "High"},
+    {"category": "Games", "security": "Low"},
+    {"category": 42},
+    {"security": None},
+    {"category": "Nonexistent"},
+    {"publisher": "Unknown", "size_kb": None},
+])
+def test_filter_matches_list_of_dicts(programs, criteria):
+    inventory = Inventory(programs)
+    assert inventory.filter(**criteria) == reference_filter(programs, **criteria)
+
+
+def test_writes_through_rows_keep_parity(programs):
+    inventory = Inventory(programs)
+    rng = random.Random(1)
+    for i in rng.sample(range(len(programs)), 100):
+        value = rng.choice(["Games", "Browsers", None, 7])
+        inventory[i]["category"] = value
+        programs[i]["category"] = value
+    for i in rng.sample([i for i, p in enumerate(programs) if "security" in p], 20):
+        del inventory[i]["security"]
+        del programs[i]["security"]
+
+    assert inventory.to_dicts() == programs
+    assert inventory.counts("category") == dict(Counter(p.get("category", "Unknown") for p in programs))
+    assert inventory.group_by("category") == reference_group_by(programs, "category")
+    assert inventory.filter(category="Browsers") == reference_filter(programs, category="Browsers")
+
+
+def test_overriding_a_side_table_value_moves_it_back_into_the_column():
+    inventory = Inventory([{"name": "A", "category": 42}, {"name": "B", "category": "Games"}])
+    assert inventory.counts("category") == {42: 1, "Games": 1}
+
+    inventory[0]["category"] = "Games"
+    assert inventory.counts("category") == {"Games": 2}
+    assert inventory.group_by("category") == {"Games": [0, 1]}
+    assert inventory.filter(category=42) == []
+
+
+def test_group_by_merges_missing_and_unknown_in_row_order():
+    programs = [{"category": "Unknown"}, {}, {"category": "Games"}, {"category": "Unknown"}, {}]
+    inventory = Inventory(programs)
+    assert inventory.group_by("category") == {"Unknown": [0, 1, 3, 4], "Games": [2]}
+    assert list(inventory.group_by("category")) == list(reference_group_by(programs, "category"))
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import struct
+
+from appnort.linux_packages import RPM_INT32, RPMTAG_NAME, RPMTAG_SIZE, LinuxPackageScanner, location_from_paths
+from appnort.scanner import Scanner
+from appnort.snapshot import ScanSnapshot
+from benchmarks.benchmark import _rpm_header, synthetic_linux_root
+
+
+def scan_by_source(root):
+    programs = LinuxPackageScanner(root).scan()
+    by_source = {}
+    for program in programs:
+        by_source.setdefault(program["source"], []).append(program)
+    return by_source
+
+
+def test_synthetic_tree_parses_every_source(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 200)
+    by_source = scan_by_source(root)
+
+    assert set(by_source) == {"dpkg", "rpm", "flatpak", "snap"}
+    # Packages left in "deinstall ok config-files" are skipped
+    with open(os.path.join(root, "var", "lib", "dpkg", "status"), encoding="utf-8") as f:
+        installed = f.read().count("Status: install ok installed")
+    assert len(by_source["dpkg"]) == installed
+    assert len(by_source["rpm"]) == 20
+    for program in by_source["dpkg"] + by_source["rpm"]:
+        assert program["os"] == "Linux"
+        assert program["version"] != "Unknown"
+        assert program["install_date"] != "Unknown"
+
+
+def test_dpkg_fields(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 50)
+    dpkg = {p["name"]: p for p in scan_by_source(root)["dpkg"]}
+    program = dpkg.get("pkg0") or next(iter(dpkg.values()))
+    name = program["name"]
+    index = int(name[3:])
+
+    assert program["publisher"] == f"Team {index % 40}"  # e-mail stripped
+    assert program["location"] == f"/usr/lib/{name}"
+    assert program["architecture"] == "amd64"
+    assert program["size_kb"] > 0
+    assert program["version"].startswith(f"1.{index % 7}.")
+
+
+def test_rpm_fields(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 50)
+    rpm = {p["name"]: p for p in scan_by_source(root)["rpm"]}
+
+    program = rpm["rpmpkg3"]
+    assert program["version"] == "2.3-1.el9"
+    assert program["publisher"] == "Example Vendor"
+    assert program["location"] == "/opt/example/rpmpkg3"
+
+
+def test_flatpak_reads_metainfo(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 10)
+    (program,) = scan_by_source(root)["flatpak"]
+
+    assert program["name"] == "Example Editor"
+    assert program["version"] == "3.2.1"
+    assert program["publisher"] == "Example Org"
+    assert program["location"].endswith(os.path.join("abc123", "files"))
+
+
+def test_snap_publisher_comes_from_state_file(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 10)
+    (program,) = scan_by_source(root)["snap"]
+
+    assert program["name"] == "example-cli"
+    assert program["version"] == "0.9"
+    # The current revision's publisher, not the older one
+    assert program["publisher"] == "Example Publisher"
+    assert program["location"].endswith(os.path.join("example-cli", "42"))
+
+
+def test_snap_yaml_publisher_wins_and_missing_state_is_unknown(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 10)
+    os.remove(os.path.join(root, "var", "lib", "snapd", "state.json"))
+    assert scan_by_source(root)["snap"][0]["publisher"] == "Unknown"
+
+    with open(os.path.join(root, "snap", "example-cli", "42", "meta", "snap.yaml"), 'a', encoding='utf-8') as f:
+        f.write("publisher: Yaml Publisher\n")
+    assert scan_by_source(root)["snap"][0]["publisher"] == "Yaml Publisher"
+
+
+def test_missing_databases_contribute_nothing(tmp_path):
+    assert LinuxPackageScanner(str(tmp_path)).scan() == []
+
+
+def test_location_skips_shared_directories():
+    assert location_from_paths(["/usr/bin/git", "/usr/share/doc/git/copyright", "/etc/gitconfig"]) is None
+    assert location_from_paths(["/usr/lib/git-core/git-add", "/usr/lib/git-core/git-am",
+                                "/opt/other/file"]) == "/usr/lib/git-core"
+
+
+def test_snapshot_keys_separate_sources_and_architectures(tmp_path):
+    root = synthetic_linux_root(str(tmp_path), 10)
+    status = os.path.join(root, "var", "lib", "dpkg", "status")
+    with open(status, 'a', encoding='utf-8') as f:
+        for arch in ("amd64", "i386"):
+            f.write(f"Package: libfoo\nStatus: install ok installed\nArchitecture: {arch}\nVersion: 1.0\n\n")
+        f.write("Package: example-cli\nStatus: install ok installed\nArchitecture: all\nVersion: 0.1\n\n")
+
+    snapshot = ScanSnapshot(str(tmp_path / "snapshot.json"))
+    scanner = Scanner(linux_root=root)
+    scanner.os_type = "Linux"
+    list(scanner.iter_installed_programs(snapshot))
+
+    assert "Linux:dpkg:libfoo:amd64" in snapshot.entries
+    assert "Linux:dpkg:libfoo:i386" in snapshot.entries
+    assert snapshot.entries["Linux:dpkg:example-cli:all"]["program"]["version"] == "0.1"
+    assert snapshot.entries["Linux:snap:example-cli"]["program"]["version"] == "0.9"
+
+
+
+def test_damaged_rpm_headers_skip_only_their_package(tmp_path, capsys):
+    good = _rpm_header({RPMTAG_NAME: "intact", RPMTAG_SIZE: 4096})
+    # Data length still matches, but the name's NUL terminator is gone
+    name_only = _rpm_header({RPMTAG_NAME: "unterminated"})
+    unterminated = struct.pack(">II", 1, len(name_only) - 25) + name_only[8:-1]
+    # An INT32 entry with count 0 carries no value; the rest of the header is fine
+    zero_count = bytearray(_rpm_header({RPMTAG_NAME: "zero-count", RPMTAG_SIZE: 4096}))
+    struct.pack_into(">iIiI", zero_count, 8 + 16, RPMTAG_SIZE, RPM_INT32, 0, 0)
+    damaged = [b"", b"\0\0", good[:12], good[:-3], unterminated, b"\xff" * 64]
+
+    root = synthetic_linux_root(str(tmp_path), 50)
+    conn = sqlite3.connect(os.path.join(root, "var", "lib", "rpm", "rpmdb.sqlite"))
+    conn.executemany("INSERT INTO Packages (blob) VALUES (?)",
+                     [(blob,) for blob in damaged + [good, bytes(zero_count)]])
+    conn.commit()
+    conn.close()
+
+    rpm = {p["name"]: p for p in scan_by_source(root)["rpm"]}
+
+    assert sorted(rpm) == ["intact", "rpmpkg0", "rpmpkg1", "rpmpkg2", "rpmpkg3", "rpmpkg4", "zero-count"]
+    assert rpm["intact"]["size_kb"] == 4
+    assert rpm["zero-count"]["size_kb"] == 0
+    assert capsys.readouterr().out.count("Skipping RPM header") == len(damaged)
@@ -0,0 +1,78 @@
+import pytest
+
+from appnort.inventory import Inventory
+from appnort.list_model import ProgramListModel
+
+PROGRAMS = [
+    {"name": "Zoom", "publisher": "Zoom Video", "category": "Communication", "security": "Low"},
+    {"name": "AnyDesk", "publisher": "philandro", "category": "Utilities", "security": "Medium"},
+    {"name": "7-Zip", "publisher": "Igor Pavlov", "category": "Utilities", "security": "Low"},
+    {"name": "KMSpico", "publisher": "Unknown", "category": "Utilities", "security": "High"},
+    {"name": "Mystery Tool", "publisher": "Zed Soft"},
+    {"name": "Discord", "publisher": "Discord Inc.", "category": "Communication", "security": "Low"},
+]
+
+
+@pytest.fixture(params=["list", "inventory"])
+def model(request):
+    model = ProgramListModel()
+    rows = [dict(p) for p in PROGRAMS]
+    model.set_programs(Inventory(rows) if request.param == "inventory" else rows)
+    return model
+
+
+def names(model, count=100):
+    return [p["name"] for p in model.window(0, count)]
+
+
+def test_sort_columns_and_direction(model):
+    assert names(model) == ["7-Zip", "AnyDesk", "Discord", "KMSpico", "Mystery Tool", "Zoom"]
+    model.sort_by("name")
+    assert names(model)[0] == "Zoom"
+    model.sort_by("risk", descending=False)
+    # High, Medium, Low, then unrated; ties by name
+    assert names(model) == ["KMSpico", "AnyDesk", "7-Zip", "Discord", "Zoom", "Mystery Tool"]
+    with pytest.raises(ValueError):
+        model.sort_by("size")
+
+
+def test_filters_combine(model):
+    model.set_filter(category="Utilities")
+    assert names(model) == ["7-Zip", "AnyDesk", "KMSpico"]
+    model.set_filter(category="Utilities", risk="Low")
+    assert names(model) == ["7-Zip"]
+    model.set_filter(query="z")
+    assert names(model) == ["7-Zip", "Mystery Tool", "Zoom"]  # name or publisher ("Zed Soft")
+    model.set_filter(query="zo")
+    assert names(model) == ["Zoom"]
+    model.set_filter(query="ZED")
+    assert names(model) == ["Mystery Tool"]
+    model.set_filter(query="o", risk="Low")
+    assert names(model) == ["7-Zip", "Discord", "Zoom"]
+    model.set_filter(category="Games")
+    assert len(model) == 0
+
+
+def test_groups_and_counts(model):
+    assert model.categories() == ["Communication", "Unknown", "Utilities"]
+    assert model.counts("category") == {"Communication": 2, "Utilities": 3, "Unknown": 1}
+    assert model.counts("security") == {"Low": 3, "Medium": 1, "High": 1, "Unknown": 1}
+
+
+def test_append_and_refresh_rebuild_indexes(model):
+    model.sort_by("risk", descending=False)
+    model.set_filter(risk="High")
+    assert names(model) == ["KMSpico"]
+    model.append({"name": "Cheat Engine", "publisher": "Unknown", "category": "Games", "security": "High"})
+    assert names(model) == ["Cheat Engine", "KMSpico"]
+    assert "Games" in model.categories()
+
+    model.programs[0]["security"] = "High"
+    model.refresh()
+    assert names(model) == ["Cheat Engine", "KMSpico", "Zoom"]
+
+
+def test_window_slices_visible_rows(model):
+    assert [p["name"] for p in model.window(2, 2)] == ["Discord", "KMSpico"]
+    assert [p["name"] for p in model.window(-1, 1)] == ["7-Zip"]
+    assert model.window(10, 5) == []
@@ -0,0 +1,139 @@
+import json
+import threading
+
+import pytest
+
+from appnort.metrics import Metrics
+
+
+@pytest.fixture
+def m():
+    return Metrics(enabled=True)
+
+
+def test_disabled_metrics_record_nothing(tmp_path):
+    m = Metrics()
+    m.incr("cache_hits")
+    m.observe("ai_request", 1.0)
+    with m.timer("ai_request") as first, m.timer("ai_batch") as second:
+        pass
+    assert first is second  # one shared no-op timer, nothing allocated per call
+    assert m.counters == {} and m.timers == {}
+    assert m.write(str(tmp_path)) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_counters_and_labels(m):
+    m.incr("cache_hits")
+    m.incr("cache_hits", 4)
+    m.incr("ai_status", status=200)
+    m.incr("ai_status", status="200")
+    m.incr("ai_status", status=429)
+    m.incr("ai_tokens", 10, kind="prompt", tier="small")
+    m.incr("ai_tokens", 5, tier="small", kind="prompt")  # label order does not matter
+
+    assert m.summary()["counters"] == {
+        "ai_status": {"status=200": 2, "status=429": 1},
+        "ai_tokens": {"kind=prompt,tier=small": 15},
+        "cache_hits": 5,
+    }
+
+
+def test_timers(m):
+    m.observe("ai_request", 0.5, status=200)
+    m.observe("ai_request", 0.25, status=200)
+    m.observe("ai_request", 1.0, status=200)
+    with pytest.raises(RuntimeError):
+        with m.timer("export", format="csv"):
+            raise RuntimeError("failed exports are timed too")
+
+    timers = m.summary()["timers"]
+    assert timers["ai_request"] == {"status=200": {"count": 3, "total_s": 1.75, "mean_s": pytest.approx(0.583333),
+                                                   "min_s": 0.25, "max_s": 1.0}}
+    assert timers["export"]["format=csv"]["count"] == 1
+    assert 0 <= timers["export"]["format=csv"]["total_s"] < 1
+
+
+def test_reset(m):
+    m.incr("cache_hits")
+    m.observe("ai_request", 1.0)
+    m.reset()
+    summary = m.summary()
+    assert summary["counters"] == {} and summary["timers"] == {}
+
+
+def test_concurrent_updates_are_not_lost(m):
+    def work():
+        for _ in range(1000):
+            m.incr("cache_hits")
+            m.observe("ai_request", 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert m.summary()["counters"]["cache_hits"] == 8000
+    assert m.summary()["timers"]["ai_request"]["count"] == 8000
+
+
+def test_prometheus_text(m):
+    m.incr("cache_hits", 3)
+    m.incr("ai_status", status=200)
+    m.incr("ai_status", 2, status=429)
+    m.incr("ai_bytes_sent", 12345678)
+    m.incr("ai_cost", 0.25)
+    m.observe("ai_request", 0.5, status=200)
+    m.observe("ai_request", 1.5, status=200)
+    m.observe("pdf_build", 2.0)
+
+    assert m.prometheus_text().splitlines() == [
+        "# TYPE appnort_ai_bytes_sent_total counter",
+        "appnort_ai_bytes_sent_total 12345678",
+        "# TYPE appnort_ai_cost_total counter",
+        "appnort_ai_cost_total 0.25",
+        "# TYPE appnort_ai_status_total counter",
+        'appnort_ai_status_total{status="200"} 1',
+        'appnort_ai_status_total{status="429"} 2',
+        "# TYPE appnort_cache_hits_total counter",
+        "appnort_cache_hits_total 3",
+        "# TYPE appnort_ai_request_seconds summary",
+        'appnort_ai_request_seconds_count{status="200"} 2',
+        'appnort_ai_request_seconds_sum{status="200"} 2.000000',
+        "# TYPE appnort_pdf_build_seconds summary",
+        "appnort_pdf_build_seconds_count 1",
+        "appnort_pdf_build_seconds_sum 2.000000",
+        "# TYPE appnort_ai_request_seconds_max gauge",
+        'appnort_ai_request_seconds_max{status="200"} 1.500000',
+        "# TYPE appnort_pdf_build_seconds_max gauge",
+        "appnort_pdf_build_seconds_max 2.000000",
+    ]
+    assert m.prometheus_text(prefix="scan").startswith("# TYPE scan_ai_bytes_sent_total counter\n")
+
+
+def test_prometheus_label_values_are_escaped(m):
+    m.incr("errors", source='C:\\temp\\"odd"\nname')
+    assert m.prometheus_text().splitlines()[1] == 'appnort_errors_total{source="C:\\\\temp\\\\\\"odd\\"\\nname"} 1'
+
+
+def test_write(m, tmp_path):
+    m.incr("cache_hits", 2)
+    m.observe("ai_request", 0.5)
+    paths = m.write(str(tmp_path / "metrics"), name="scan-1")
+
+    assert paths == {"json": str(tmp_path / "metrics" / "scan-1.json"),
+                     "prometheus": str(tmp_path / "metrics" / "scan-1.prom")}
+    with open(paths["json"], encoding='utf-8') as f:
+        summary = json.load(f)
+    assert summary["counters"] == {"cache_hits": 2}
+    assert summary["timers"]["ai_request"]["count"] == 1
+    with open(paths["prometheus"], encoding='utf-8') as f:
+        assert f.read() == m.prometheus_text()
+
+
+def test_write_failure_is_reported_not_raised(m, tmp_path, capsys):
+    blocker = tmp_path / "metrics"
+    blocker.write_text("not a directory")
+    m.incr("cache_hits")
+    assert m.write(str(blocker)) is None
+    assert "Failed to write metrics" in capsys.readouterr().out
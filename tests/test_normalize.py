@@ -0,0 +1,51 @@
+import pytest
+
+from appnort.normalize import canonical_name
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Audacity 3.7.6", "audacity 3"),
+    ("7-Zip 23.01 (x64)", "7-zip"),
+    ("Mozilla Firefox (115.0 x64 en-US)", "mozilla firefox"),
+    ("Microsoft Visual Studio Code (User)", "microsoft visual studio code"),
+    ("Zoom Workplace (Machine-Wide Installer)", "zoom workplace"),
+    ("Java(TM) SE Development Kit 17.0.2 (64-bit)", "java se development kit"),
+    ("Java 8 Update 381", "java 8"),
+    ("Microsoft Edge Update", "microsoft edge update"),
+    ("Microsoft Update Health Tools", "microsoft update health tools"),
+    ("User Profile Manager", "user profile manager"),
+    ("Update for Windows 10 (KB5001716)", "update for windows 10"),
+    ("Microsoft 365", "microsoft 365"),
+    ("Windows 10", "windows 10"),
+    ("Microsoft Office Professional Plus 2019 - en-us", "microsoft office professional plus 2019"),
+    ("Python 2.7", "python 2"),
+    ("Python 3.11.4 (64-bit)", "python 3"),
+    ("2019", "2019"),
+    ("Update", "update"),
+])
+def test_canonical_name(name, key):
+    assert canonical_name(name) == key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Audacity 3.7.6", "Audacity 3.7.7"),
+    ("7-Zip 23.01 (x64)", "7-Zip 24.07 (x64)"),
+    ("Mozilla Firefox (115.0 x64 en-US)", "Mozilla Firefox 128.0.3 (x64 de-DE)"),
+    ("Microsoft Visual Studio Code (User)", "Microsoft Visual Studio Code"),
+    ("Python 3.11.4", "Python 3.12.1 (64-bit)"),
+    ("NVIDIA Graphics Driver 531.79", "NVIDIA Graphics Driver 546.33"),
+])
+def test_releases_share_a_key(a, b):
+    assert canonical_name(a) == canonical_name(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Microsoft Edge Update", "Microsoft Edge"),
+    ("Python 2.7", "Python 3.11.4"),
+    ("Windows 10", "Windows 11"),
+    ("Microsoft 365", "Microsoft Teams"),
+    ("Update for Windows 10 (KB5001716)", "Windows 10"),
+    ("User Profile Manager", "Profile Manager"),
+])
+def test_distinct_products_keep_distinct_keys(a, b):
+    assert canonical_name(a) != canonical_name(b)
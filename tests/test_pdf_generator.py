@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab import rl_config  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate  # noqa: E402
+
+from appnort.events import CancelToken, EventBus, ScanCancelled, StatusEvent  # noqa: E402
+from appnort.pdf_generator import PDFGenerator, _LazyFlowables  # noqa: E402
+
+ROWS = 500
+CHUNK_ROWS = 10
+
+
+def report_rows(count):
+    return [{"name": f"Row {i:05d}", "version": "1.0", "publisher": "Example",
+             "category": ("Utilities", "Media")[i % 2], "security": ("Low", "High")[i % 3 == 0]}
+            for i in range(count)]
+
+
+def test_lazy_flowables_fill_as_they_drain():
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    flowables = _LazyFlowables(source(), low_water=4)
+    assert pulled == []
+    drained = []
+    while len(flowables):
+        drained.append(flowables.pop(0))
+        assert len(pulled) - len(drained) <= 4
+    assert drained == list(range(100))
+
+
+def test_report_is_laid_out_incrementally_and_complete(tmp_path, monkeypatch):
+    # Guards the doc.build() contract _LazyFlowables relies on: a reportlab that
+    # copied the flowable list up front would pull every segment before page one,
+    # and one that iterated a snapshot would silently drop rows.
+    monkeypatch.setattr(rl_config, "pageCompression", 0)
+    pages = [0]
+    monkeypatch.setattr(SimpleDocTemplate, "afterPage", lambda doc: pages.__setitem__(0, pages[0] + 1),
+                        raising=False)
+    generator = PDFGenerator(chunk_rows=CHUNK_ROWS)
+    segments = generator._segments
+    pulled_on_page = []
+
+    def tracked(progs):
+        for table in segments(progs):
+            pulled_on_page.append(pages[0])
+            yield table
+    monkeypatch.setattr(generator, "_segments", tracked)
+
+    path = tmp_path / "report.pdf"
+    generator.generate_report(report_rows(ROWS), str(path))
+
+    assert len(pulled_on_page) == ROWS // CHUNK_ROWS
+    assert pulled_on_page.count(0) <= 8
+    assert pulled_on_page[-1] >= pages[0] - 4
+    data = path.read_bytes()
+    assert all(f"(Row {i:05d})".encode() in data for i in range(ROWS))
+
+
+def test_report_is_moved_into_place_and_announced(tmp_path):
+    path = tmp_path / "report.pdf"
+    events = EventBus()
+    PDFGenerator().generate_report(report_rows(50), str(path), events=events)
+
+    assert path.read_bytes().startswith(b"%PDF")
+    assert [p.name for p in tmp_path.iterdir()] == ["report.pdf"]
+    assert events.drain() == [StatusEvent(f"Report generated at {path}")]
+
+
+@pytest.mark.parametrize("failure", ["cancel", "error"])
+def test_failed_report_leaves_previous_file_alone(tmp_path, failure):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"previous report")
+    events = EventBus()
+    cancel = CancelToken()
+    rows = report_rows(50)
+    if failure == "cancel":
+        cancel.cancel()
+        expected = ScanCancelled
+    else:
+        rows[30] = None
+        expected = AttributeError
+
+    with pytest.raises(expected):
+        PDFGenerator(chunk_rows=CHUNK_ROWS).generate_report(rows, str(path), cancel=cancel, events=events)
+
+    assert path.read_bytes() == b"previous report"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.pdf"]
+    assert events.drain() == []
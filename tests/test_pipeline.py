@@ -0,0 +1,78 @@
+import os
+import threading
+
+import pytest
+
+from appnort.events import CancelToken, ScanCancelled
+from appnort.pipeline import ScanPipeline
+from appnort.planner import ScanPlanner
+from appnort.registry import HIVES, UNINSTALL_PATHS, FakeRegistryBackend
+from appnort.scanner import Scanner
+from appnort.snapshot import ScanSnapshot
+from benchmarks.mock_groq import MockGroqServer
+
+
+def pipeline_for(categorizer, registry):
+    return ScanPipeline(Scanner(registry), ScanPlanner(categorizer, token_budget=750), chunk_size=16)
+
+
+def snapshot(workdir):
+    return ScanSnapshot(str(workdir / "scan_snapshot.json")).load()
+
+
+def test_streams_every_program_in_scan_order(categorizer, mock_groq):
+    registry = FakeRegistryBackend.synthetic(200)
+    resolved = []
+    programs = pipeline_for(categorizer, registry).run(on_resolved=resolved.append)
+
+    assert [p["name"] for p in programs] == [p["name"] for p in Scanner(registry).scan_installed_programs()]
+    # Each program is reported exactly once, when its final classification is known
+    assert sorted(id(p) for p in resolved) == sorted(id(p) for p in programs)
+    assert mock_groq.requests > 0
+    assert all(p["category"] != "Unknown" for p in programs)
+
+
+def test_snapshot_is_saved_after_a_complete_run(categorizer, mock_groq, workdir):
+    registry = FakeRegistryBackend.synthetic(100)
+    pipeline = pipeline_for(categorizer, registry)
+
+    pipeline.run(snapshot=snapshot(workdir))
+    assert len(snapshot(workdir).entries) == 100
+
+    registry.set_subkey(HIVES[0], UNINSTALL_PATHS[0], "new-app", {"DisplayName": "Brand New App"}, last_write=1)
+    pipeline.run(snapshot=snapshot(workdir))
+    assert [p["name"] for p in pipeline.scanner.last_delta["added"]] == ["Brand New App"]
+    assert pipeline.scanner.last_delta["removed"] == pipeline.scanner.last_delta["updated"] == []
+
+
+def test_cancel_while_streaming(categorizer, mock_groq, workdir):
+    cancel = CancelToken()
+    cancel.cancel()
+    with pytest.raises(ScanCancelled):
+        pipeline_for(categorizer, FakeRegistryBackend.synthetic(100)).run(snapshot=snapshot(workdir), cancel=cancel)
+    assert not os.path.exists(workdir / "scan_snapshot.json")
+
+
+def test_cancel_during_classification_keeps_the_previous_snapshot(categorizer, mock_groq, workdir):
+    registry = FakeRegistryBackend.synthetic(100)
+    pipeline = pipeline_for(categorizer, registry)
+    pipeline.run(snapshot=snapshot(workdir))
+    saved = (workdir / "scan_snapshot.json").read_bytes()
+
+    # Only the new program needs the AI; it is cancelled while its request is in flight
+    registry.set_subkey(HIVES[0], UNINSTALL_PATHS[0], "new-app", {"DisplayName": "Zyxw Frobnicator"}, last_write=1)
+    cancel = CancelToken()
+    with MockGroqServer(latency=1.0) as slow:
+        categorizer.api_url = slow.url
+        timer = threading.Timer(0.2, cancel.cancel)
+        timer.start()
+        with pytest.raises(ScanCancelled):
+            pipeline.run(snapshot=snapshot(workdir), cancel=cancel)
+        timer.join()
+    assert slow.max_in_flight == 1
+
+    assert (workdir / "scan_snapshot.json").read_bytes() == saved
+    # So the next scan still reports the program the cancelled one never finished
+    categorizer.api_url = mock_groq.url
+    pipeline.run(snapshot=snapshot(workdir))
+    assert [p["name"] for p in pipeline.scanner.last_delta["added"]] == ["Zyxw Frobnicator"]
@@ -0,0 +1,47 @@
+from appnort.planner import ScanPlanner
+from appnort.scanner import Scanner
+from benchmarks.benchmark import synthetic_inventory
+
+# Small enough that the ~116 unresolved products of a 300-entry machine pack into about 15 batches
+TOKEN_BUDGET = 750
+
+
+def scan_300():
+    return Scanner(synthetic_inventory(300, seed=1)).scan_installed_programs()
+
+
+def test_planner_dispatches_each_batch_once(categorizer, mock_groq):
+    programs = scan_300()
+    planner = ScanPlanner(categorizer, token_budget=TOKEN_BUDGET)
+    pending = planner.plan(programs)["pending"]
+    expected = len(categorizer.batch_packer(TOKEN_BUDGET).pack(pending))
+
+    planner.run(programs)
+
+    assert 10 <= expected <= 20
+    assert mock_groq.requests == expected
+    # One name per product, each asked about exactly once
+    assert sorted(mock_groq.names) == sorted(pending)
+    assert not planner.unresolved
+    assert all(p["category"] != "Unknown" for p in programs)
+
+
+def test_resolved_names_never_reach_the_endpoint(categorizer, mock_groq):
+    programs = scan_300()
+    unknown = [p["name"] for p in programs if categorizer.rule_engine.match(p["name"]) == "Unknown"]
+    cached = unknown[:10]
+    for name in cached:
+        categorizer.cache[categorizer.cache_key(name)] = {"category": "Utilities", "security": "Low"}
+
+    planner = ScanPlanner(categorizer, token_budget=TOKEN_BUDGET)
+    plan = planner.plan(programs)
+    offline = {name for (name, _), entry in plan["resolved"].items() if not planner.needs_ai(entry)}
+    planner.run(programs)
+
+    sent = set(mock_groq.names)
+    assert set(cached) <= offline
+    assert any(categorizer.rule_engine.match(name) != "Unknown" for name in offline)
+    assert not sent & offline
+    for prog in programs:
+        if prog["name"] in cached:
+            assert prog["category"] == "Utilities"
@@ -0,0 +1,59 @@
+import pytest
+
+from appnort.inventory import Inventory
+from appnort.processes import PathIndex, ProcessCorrelator
+
+
+@pytest.fixture
+def index():
+    index = PathIndex(case_sensitive=False)
+    index.add(r"C:\Program Files\Vendor", "vendor")
+    index.add(r"C:\Program Files\Vendor\Tool", "tool")
+    index.add(r'"C:\Users\bob\AppData\Local\Programs\Editor\"', "editor")
+    return index
+
+
+@pytest.mark.parametrize("path, expected", [
+    (r"C:\Program Files\Vendor\app.exe", ["vendor"]),
+    (r"c:\program files\vendor\tool\bin\tool.exe", ["tool"]),  # deepest root wins
+    (r"C:\Program Files\Vendor Extra\app.exe", []),  # whole components only
+    (r"C:\Users\bob\AppData\Local\Programs\Editor\editor.exe", ["editor"]),
+    (r"C:\Users\bob\Downloads\portable.exe", []),
+    (r"C:\Windows\System32\svchost.exe", []),
+])
+def test_longest_prefix_lookup(index, path, expected):
+    assert index.lookup(path) == expected
+
+
+@pytest.mark.parametrize("root", [
+    "C:\\", r"C:\Windows", r"C:\Program Files", r"C:\Users", r"C:\Users\bob", r"C:\Users\bob\AppData\Local",
+    r"C:\Users\bob\Downloads", "/usr", "/home/bob", "/opt",
+])
+def test_generic_roots_are_not_indexed(root):
+    index = PathIndex(case_sensitive=False)
+    assert not index.add(root, "x")
+    assert index.size == 0
+
+
+def test_home_directory_root_does_not_claim_user_processes():
+    programs = [{"name": "Profile Sync", "location": r"C:\Users\bob"},
+                {"name": "Editor", "location": r"C:\Users\bob\AppData\Local\Programs\Editor"}]
+    processes = [{"pid": 1, "exe": r"C:\Users\bob\Downloads\tool.exe"},
+                 {"pid": 2, "exe": r"C:\Users\bob\AppData\Local\Programs\Editor\editor.exe"},
+                 {"pid": 3, "exe": None}]
+    result = ProcessCorrelator(programs, case_sensitive=False).correlate(processes)
+    assert [p["name"] for p in result["running"]] == ["Editor"]
+    assert [p["pid"] for p in result["unmanaged"]] == [1]
+    assert [p["pid"] for p in result["uninspectable"]] == [3]
+    assert [(p["running"], p["processes"]) for p in programs] == [("No", 0), ("Yes", 1)]
+
+
+def test_correlation_writes_through_inventory_rows():
+    inventory = Inventory([{"name": "Vendor App", "location": "/srv/vendor"},
+                           {"name": "Other", "location": "/srv/other",
+                            "executables": [{"path": "/usr/local/lib/other/run", "size": 1, "sha256": None}]}])
+    processes = [{"pid": 1, "exe": "/srv/vendor/bin/app"}, {"pid": 2, "exe": "/srv/vendor/bin/helper"},
+                 {"pid": 3, "exe": "/usr/local/lib/other/run"}]
+    ProcessCorrelator(inventory, case_sensitive=True).correlate(processes)
+    assert inventory.column("processes") == [2, 1]
+    assert inventory.counts("running") == {"Yes": 2}
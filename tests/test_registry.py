@@ -0,0 +1,81 @@
+from appnort.registry import HIVES, UNINSTALL_PATHS, FakeRegistryBackend
+from appnort.scanner import Scanner
+from appnort.snapshot import ScanSnapshot
+
+LOCATION = (HIVES[0], UNINSTALL_PATHS[0])
+
+
+def probe_read(values):
+    # The original reader: one QueryValueEx probe per value, "Unknown" when absent
+    name = values.get("DisplayName")
+    if not name or not name.strip():
+        return None
+    return {"name": name, "version": values.get("DisplayVersion", "Unknown"),
+            "location": values.get("InstallLocation", "Unknown"), "publisher": values.get("Publisher", "Unknown"),
+            "os": "Windows"}
+
+
+def test_sweep_matches_probe_reader_on_synthetic_hive():
+    registry = FakeRegistryBackend.synthetic(5000)
+    expected = {}
+    for hive in HIVES:
+        for path in UNINSTALL_PATHS:
+            for _, values, _ in registry.iter_subkeys(hive, path):
+                program = probe_read(values)
+                expected.setdefault(program["name"], (program, values))
+
+    programs = Scanner(registry).scan_installed_programs()
+
+    assert len(programs) == len(expected) == 5000
+    for prog in programs:
+        legacy, values = expected[prog["name"]]
+        assert {k: prog[k] for k in legacy} == legacy
+        # Extra fields come from the same sweep
+        assert prog["size_kb"] == values["EstimatedSize"]
+        assert prog["install_date"] == values["InstallDate"]
+        assert prog["system_component"] == (values["SystemComponent"] == 1)
+
+
+def test_missing_and_malformed_values():
+    registry = FakeRegistryBackend()
+    registry.set_subkey(*LOCATION, "blank", {"DisplayName": "   "})
+    registry.set_subkey(*LOCATION, "unnamed", {"Publisher": "Nobody"})
+    registry.set_subkey(*LOCATION, "bare", {"DisplayName": "Bare App", "EstimatedSize": "12 MB"})
+
+    programs = Scanner(registry).scan_installed_programs()
+
+    assert programs == [{"name": "Bare App", "version": "Unknown", "location": "Unknown", "publisher": "Unknown",
+                         "os": "Windows", "size_kb": 0, "install_date": "Unknown", "system_component": False}]
+
+
+def test_json_hive_round_trip(tmp_path):
+    registry = FakeRegistryBackend.synthetic(200)
+    path = tmp_path / "hive.json"
+    registry.to_json(str(path))
+    assert Scanner(FakeRegistryBackend.from_json(str(path))).scan_installed_programs() == \
+        Scanner(registry).scan_installed_programs()
+
+
+def test_unchanged_subkeys_are_not_reread(tmp_path):
+    registry = FakeRegistryBackend.synthetic(100)
+    snapshot_path = str(tmp_path / "snapshot.json")
+    first = Scanner(registry).scan_incremental(ScanSnapshot(snapshot_path))
+    assert len(first["added"]) == 100
+
+    swept = []
+
+    class CountingBackend(FakeRegistryBackend):
+        def iter_subkeys(self, hive, path, should_read=None):
+            for name, values, last_write in super().iter_subkeys(hive, path, should_read):
+                if values is not None:
+                    swept.append(name)
+                yield name, values, last_write
+
+    counting = CountingBackend(registry.data)
+    subkey = next(iter(registry.data[LOCATION[0]][LOCATION[1]]))
+    counting.set_subkey(*LOCATION, subkey, {"DisplayName": "Renamed App"}, last_write=1)
+    second = Scanner(counting).scan_incremental(ScanSnapshot(snapshot_path).load())
+
+    assert swept == [subkey]
+    assert len(second["programs"]) == 100
+    assert [p["name"] for p in second["updated"]] == ["Renamed App"]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from appnort.risk import RiskEngine
+
+
+@pytest.mark.parametrize("publisher, trusted", [
+    ("Microsoft Corporation", True),
+    ("Microsoft", True),
+    ("The Git Development Community", True),
+    ("Realtek Semiconductor Corp.", True),
+    ("Google Inc.", True),
+    ("Mozilla Foundation", True),  # listed alias
+    ("Google Chrome Helper Ltd", False),
+    ("Microsoft Corporation Fan Club", False),
+    ("Realtek Semiconductor Unofficial", False),
+    ("Unknown Vendor", False),
+    ("", False),
+    (None, False),
+])
+def test_trust_needs_exact_name_or_alias(publisher, trusted):
+    assert RiskEngine().is_trusted(publisher) is trusted
+
+
+def test_allow_list_overrides_heuristics():
+    engine = RiskEngine(allow={"TeamViewer": "Low"}, deny=["AnyDesk"])
+    assert engine.assess("TeamViewer 15.4", "TeamViewer")["security"] == "Low"
+    assert engine.assess("TeamViewer 15.4", "TeamViewer")["reason"] == "allow list"
+    # Deny still wins, and unlisted remote-access tools keep the heuristic verdict
+    assert engine.assess("AnyDesk", "philandro Software GmbH")["reason"] == "deny list"
+    assert engine.assess("RustDesk 1.2", None)["security"] == "Medium"
+
+
+def test_pack_adds_publishers_and_aliases(tmp_path):
+    pack = tmp_path / "risk_rules.json"
+    pack.write_text(json.dumps({"trusted_publishers": ["Contoso Ltd"],
+                                "publisher_aliases": {"Contoso Europe GmbH": "Contoso Ltd"},
+                                "allow": {"Cheat Engine": "Medium"}}), encoding="utf-8")
+    engine = RiskEngine(pack_path=str(pack))
+    assert engine.assess("Contoso Tools", "Contoso Europe GmbH")["security"] == "Low"
+    assert not engine.is_trusted("Contoso Europe Resellers")
+    assert engine.assess("Cheat Engine 7.5", None)["security"] == "Medium"
+
+
+@pytest.mark.parametrize("name, publisher, cached, expected", [
+    # A trusted publisher does not talk a cached AI "High" down
+    ("Remote Desktop Helper", "Microsoft Corporation", "High", "High"),
+    ("Remote Desktop Helper", "Microsoft Corporation", "Medium", "Medium"),
+    # A confident local verdict raises a lower cached one
+    ("qBittorrent 4.6", None, "Low", "Medium"),
+    ("KMS Activator Crack", None, "Medium", "High"),
+    # ...but an unsure one does not
+    ("Remote Desktop Helper", "Shady Ltd", "Low", "Low"),
+    # Without a cached verdict the local one is recorded, whatever its confidence
+    ("Remote Desktop Helper", "Microsoft Corporation", "Unknown", "Low"),
+    ("Remote Desktop Helper", "Shady Ltd", "Unknown", "Medium"),
+])
+def test_local_risk_only_raises_cached_verdicts(categorizer, name, publisher, cached, expected):
+    categorizer.cache[categorizer.cache_key(name)] = {"category": "Utilities", "security": cached}
+    entry = categorizer.categorize_many([name], {name: publisher})[name]
+    assert entry["security"] == expected
+    assert ("risk_confidence" in entry) == (expected != cached)
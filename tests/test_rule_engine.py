@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from appnort.categorizer import Categorizer
+from appnort.rule_engine import RuleEngine
+
+# Names the old substring matcher and the compiled engine agree on
+SAMPLE = [
+    "Python 3.11.4 (64-bit)", "Google Chrome", "Mozilla Firefox (x64 en-US)", "VLC media player", "Steam",
+    "Discord", "Zoom Workplace", "NVIDIA Graphics Driver 551.23",
+    "Microsoft Visual C++ 2015-2022 Redistributable (x64)", "Git", "Docker Desktop", "Node.js",
+    "Microsoft Office Professional Plus 2021", "Obsidian", "Minecraft Launcher", "Epic Games Launcher",
+    "Opera Stable", "GIMP 2.10.36", "OBS Studio", "Realtek High Definition Audio Driver", "Telegram Desktop",
+    "7-Zip 23.01 (x64)", "WinRAR 6.24 (64-bit)", "CCleaner", "Microsoft Edge", "Microsoft Teams",
+    "Adobe Acrobat Reader", "Intel Management Engine", "AMD Software", "GitHub Desktop", "Visual Studio Code",
+    "Java 8 Update 381", "Unreal Engine", "Calculator Plus", "Drivers Pack", "Sonic Visualiser",
+]
+
+
+@pytest.fixture
+def rules(workdir):
+    return Categorizer(None).rules
+
+
+def substring_match(rules, name):
+    # The matcher RuleEngine replaced: first category with a keyword anywhere in the name
+    lowered = name.lower()
+    for category, keywords in rules.items():
+        for keyword in keywords:
+            if keyword in lowered:
+                return category
+    return "Unknown"
+
+
+def test_agrees_with_the_substring_matcher(rules):
+    engine = RuleEngine(rules)
+    assert engine.match_many(SAMPLE) == {name: substring_match(rules, name) for name in SAMPLE}
+
+
+@pytest.mark.parametrize("name", ["Knowledge Base Viewer", "Digital Camera Utility", "JavaScript Tools",
+                                  "Wordpad Plus", "NordVPN"])
+def test_keywords_inside_other_words_no_longer_match(rules, name):
+    assert substring_match(rules, name) != "Unknown"
+    assert RuleEngine(rules).match(name) == "Unknown"
+
+
+@pytest.mark.parametrize("name, category", [("Notepad++ Drivers", "System"), ("Indie Games", "Games"),
+                                            ("c++ tools", "Development"), ("Tools for C++", "Development"),
+                                            ("My 7-zip", "Utilities"), ("7-Zipper", "Unknown")])
+def test_boundaries_handle_plurals_and_punctuation(name, category):
+    engine = RuleEngine({"Development": ["c++"], "Utilities": ["7-zip"], "System": ["driver"], "Games": ["game"]})
+    assert engine.match(name) == category
+
+
+def test_most_specific_keyword_wins(rules):
+    engine = RuleEngine(rules)
+    # "microsoft visual c++" (System) outweighs the shorter "sdk" (Development)
+    assert engine.match("Microsoft Visual C++ SDK") == "System"
+    # The old matcher returned the first category in declaration order
+    assert substring_match(rules, "Microsoft Visual C++ SDK") == "Development"
+
+
+def test_weights_and_ties():
+    engine = RuleEngine({"A": {"alpha": 1, "beta": 1}, "B": {"gamma": 1.5}, "C": ["alpha"]})
+    assert engine.scores("alpha beta gamma") == {"A": 2.0, "B": 1.5, "C": 5.0}
+    assert engine.match("alpha beta gamma") == "C"
+    assert engine.match("beta gamma") == "B"
+    # Equal scores: the category declared first wins
+    tied = RuleEngine({"First": {"one": 2}, "Second": {"two": 2}})
+    assert tied.match("two one") == "First"
+    assert RuleEngine({}).match("anything") == "Unknown"
+
+
+def test_packs_extend_rules_and_reload_when_changed(tmp_path):
+    engine = RuleEngine({"Media": ["player"]}, pack_dir=str(tmp_path))
+    assert engine.match("Sonic Visualiser") == "Unknown"
+    assert engine.reload_if_changed() is False
+
+    pack = tmp_path / "audio.json"
+    pack.write_text(json.dumps({"Audio": {"visualiser": 20}, "Media": ["sonic"]}))
+    assert engine.reload_if_changed() is True
+    assert engine.categories == ["Media", "Audio"]
+    assert engine.scores("Sonic Visualiser") == {"Audio": 20.0, "Media": 5.0}
+
+    (tmp_path / "broken.json").write_text("[1, 2]")
+    assert engine.reload_if_changed() is True
+    assert engine.match("Sonic Visualiser") == "Audio"
+    assert engine.reload_if_changed() is False
+
+    os.remove(pack)
+    assert engine.reload_if_changed() is True
+    assert engine.match("Sonic Visualiser") == "Unknown"
+
+
+def test_categorizer_reload_rules_picks_up_new_packs(workdir):
+    categorizer = Categorizer(None)
+    assert categorizer.categorize_many(["Sonic Visualiser"])["Sonic Visualiser"]["category"] == "Unknown"
+    os.makedirs(categorizer.rules_dir)
+    with open(os.path.join(categorizer.rules_dir, "audio.json"), 'w', encoding='utf-8') as f:
+        json.dump({"Media": ["visualiser"]}, f)
+
+    assert categorizer.reload_rules() is True
+    assert categorizer.categorize_many(["Sonic Visualiser"])["Sonic Visualiser"]["category"] == "Media"
@@ -0,0 +1,40 @@
+import time
+
+from appnort.registry import HIVES, UNINSTALL_PATHS, FakeRegistryBackend
+from appnort.scanner import Scanner
+
+
+class SlowFirstHive(FakeRegistryBackend):
+    # HKLM answers late, so the HKCU readers finish first
+    def iter_subkeys(self, hive, path, should_read=None):
+        for record in super().iter_subkeys(hive, path, should_read):
+            if hive == "HKLM":
+                time.sleep(0.002)
+            yield record
+
+
+def duplicated_registry():
+    backend = SlowFirstHive()
+    for i, (hive, path) in enumerate((h, p) for h in HIVES for p in UNINSTALL_PATHS):
+        for n in range(20):
+            backend.set_subkey(hive, path, f"app{n}", {"DisplayName": f"Shared App {n}", "DisplayVersion": str(i)})
+            backend.set_subkey(hive, path, f"own{n}", {"DisplayName": f"{hive} {i} App {n}"})
+    return backend
+
+
+def test_duplicates_resolve_in_serial_hive_order():
+    programs = Scanner(duplicated_registry()).scan_installed_programs()
+    shared = [p for p in programs if p["name"].startswith("Shared")]
+    # HKLM\...\Uninstall (location 0) wins even though it was read last
+    assert len(shared) == 20
+    assert {p["version"] for p in shared} == {"0"}
+    assert [p["name"] for p in programs] == (
+        [f"Shared App {n}" if k == 0 else f"HKLM 0 App {n}" for n in range(20) for k in range(2)]
+        + [f"{hive} {i} App {n}" for i, hive in ((1, "HKLM"), (2, "HKCU"), (3, "HKCU")) for n in range(20)])
+
+
+def test_scan_order_is_stable_across_runs():
+    registry = duplicated_registry()
+    first = [(p["name"], p["version"]) for p in Scanner(registry).scan_installed_programs()]
+    for _ in range(3):
+        assert [(p["name"], p["version"]) for p in Scanner(registry).scan_installed_programs()] == first
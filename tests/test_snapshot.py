@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from appnort.registry import HIVES, UNINSTALL_PATHS, FakeRegistryBackend
+from appnort.scanner import Scanner
+from appnort.snapshot import SNAPSHOT_VERSION, ScanSnapshot
+
+HKLM, HKCU = HIVES[0], HIVES[1]
+UNINSTALL = UNINSTALL_PATHS[0]
+
+
+class CountingBackend(FakeRegistryBackend):
+    # Counts the subkeys whose values were actually read
+    def __init__(self, data=None):
+        super().__init__(data)
+        self.reads = 0
+
+    def iter_subkeys(self, hive, path, should_read=None):
+        for name, values, last_write in super().iter_subkeys(hive, path, should_read):
+            if values is not None:
+                self.reads += 1
+            yield name, values, last_write
+
+
+def registry():
+    backend = CountingBackend()
+    backend.set_subkey(HKLM, UNINSTALL, "git", {"DisplayName": "Git", "DisplayVersion": "2.40"}, last_write=1)
+    backend.set_subkey(HKLM, UNINSTALL, "vlc", {"DisplayName": "VLC media player", "DisplayVersion": "3.0"},
+                       last_write=1)
+    backend.set_subkey(HKCU, UNINSTALL, "zoom", {"DisplayName": "Zoom", "DisplayVersion": "5.0"}, last_write=1)
+    return backend
+
+
+def names(programs):
+    return sorted(p["name"] for p in programs)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "scan_snapshot.json")
+
+
+def scan(backend, snapshot_path):
+    return Scanner(backend).scan_incremental(ScanSnapshot(snapshot_path).load())
+
+
+def test_diff():
+    git, vlc, zoom = ({"name": n, "version": "1"} for n in ("Git", "VLC", "Zoom"))
+    old = {"a": {"program": git}, "b": {"program": vlc}, "c": {"program": zoom}, "d": {"program": None}}
+    new = {"a": {"program": git}, "b": {"program": dict(vlc, version="2")}, "c": {"program": None},
+           "e": {"program": {"name": "Slack"}}}
+    assert ScanSnapshot.diff(old, new) == {"added": [{"name": "Slack"}], "removed": [zoom],
+                                           "updated": [dict(vlc, version="2")]}
+    assert ScanSnapshot.diff(new, {}) == {"added": [], "removed": [git, dict(vlc, version="2"), {"name": "Slack"}],
+                                          "updated": []}
+    assert ScanSnapshot.diff(old, old) == {"added": [], "removed": [], "updated": []}
+
+
+def test_incremental_scan_detects_added_removed_and_updated(snapshot_path):
+    backend = registry()
+    first = scan(backend, snapshot_path)
+    assert names(first["added"]) == names(first["programs"]) == ["Git", "VLC media player", "Zoom"]
+    assert first["removed"] == first["updated"] == []
+
+    backend.set_subkey(HKLM, UNINSTALL, "git", {"DisplayName": "Git", "DisplayVersion": "2.45"}, last_write=2)
+    backend.delete_subkey(HKCU, UNINSTALL, "zoom")
+    backend.set_subkey(HKCU, UNINSTALL, "slack", {"DisplayName": "Slack"}, last_write=2)
+    second = scan(backend, snapshot_path)
+
+    assert names(second["programs"]) == ["Git", "Slack", "VLC media player"]
+    assert names(second["added"]) == ["Slack"]
+    assert names(second["removed"]) == ["Zoom"]
+    assert [(p["name"], p["version"]) for p in second["updated"]] == [("Git", "2.45")]
+
+
+def test_unchanged_subkeys_are_reused_without_reading(snapshot_path):
+    backend = registry()
+    scan(backend, snapshot_path)
+    assert backend.reads == 3
+
+    # Same last-write time: the stale values on disk are trusted, not re-read
+    backend.set_subkey(HKLM, UNINSTALL, "vlc", {"DisplayName": "VLC media player", "DisplayVersion": "9.9"},
+                       last_write=1)
+    backend.reads = 0
+    result = scan(backend, snapshot_path)
+    assert backend.reads == 0
+    assert result["added"] == result["removed"] == result["updated"] == []
+    assert {p["name"]: p["version"] for p in result["programs"]}["VLC media player"] == "3.0"
+
+    # A newer last-write time is read again
+    backend.set_subkey(HKLM, UNINSTALL, "vlc", {"DisplayName": "VLC media player", "DisplayVersion": "9.9"},
+                       last_write=5)
+    result = scan(backend, snapshot_path)
+    assert backend.reads == 1
+    assert [p["version"] for p in result["updated"]] == ["9.9"]
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]", '{"version": 1, "entries": [1]}',
+                                     json.dumps({"version": SNAPSHOT_VERSION + 1, "entries": {"x": {}}})])
+def test_unreadable_snapshot_means_a_full_scan(snapshot_path, content):
+    with open(snapshot_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    assert ScanSnapshot(snapshot_path).load().entries == {}
+
+    backend = registry()
+    result = scan(backend, snapshot_path)
+    assert backend.reads == 3
+    assert names(result["added"]) == ["Git", "VLC media player", "Zoom"]
+    # ...and leaves a valid snapshot behind
+    assert len(ScanSnapshot(snapshot_path).load().entries) == 3
+
+
+def test_damaged_records_are_read_again(snapshot_path):
+    backend = registry()
+    scan(backend, snapshot_path)
+    with open(snapshot_path, encoding='utf-8') as f:
+        data = json.load(f)
+    git_key = next(key for key in data["entries"] if key.endswith("\\git"))
+    vlc_key = next(key for key in data["entries"] if key.endswith("\\vlc"))
+    data["entries"][git_key] = "junk"
+    data["entries"][vlc_key]["program"] = ["VLC"]
+    with open(snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    backend.reads = 0
+    result = scan(backend, snapshot_path)
+    assert backend.reads == 2
+    assert names(result["added"]) == ["Git", "VLC media player"]
+
+
+def test_missing_last_write_is_never_unchanged():
+    snapshot = ScanSnapshot()
+    snapshot.entries = {"k": {"last_write": None, "program": {"name": "Git"}}}
+    assert not snapshot.is_unchanged("k", None)
+    assert not snapshot.is_unchanged("other", 1)
+    assert snapshot.program("k") == {"name": "Git"}
+    assert snapshot.program("other") is None